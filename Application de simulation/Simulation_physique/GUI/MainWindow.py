@@ -8,13 +8,17 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
     QHBoxLayout,
     QPushButton,
-    QTabWidget
+    QTabWidget,
+    QCheckBox,
+    QLabel,
+    QFileDialog
 )
-from PySide6.QtCore import Signal
-from PySide6.QtGui import QIcon
+from PySide6.QtCore import Signal, QTimer
+from PySide6.QtGui import QIcon, QFontDatabase
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 
 from sim_2d_propre import ThermalSimulation
+from chronometres import texte_bilan
 from GUI.parametersTab import ParametersTab
 
 class MainWindow(QMainWindow):
@@ -82,18 +86,46 @@ class MainWindow(QMainWindow):
         self.btn_stop.clicked.connect(self.on_stop_test)
         button_layout.addWidget(self.btn_stop)
 
+        # Chronomètres par phase : bilan affiché sous les boutons, trace exportable
+        self.chk_chronometres = QCheckBox("Chronomètres")
+        self.chk_chronometres.toggled.connect(self.on_chronometres_toggled)
+        button_layout.addWidget(self.chk_chronometres)
+
+        self.btn_trace = QPushButton("Exporter la trace")
+        self.btn_trace.setEnabled(False)
+        self.btn_trace.clicked.connect(self.on_export_trace)
+        button_layout.addWidget(self.btn_trace)
+
         sim_layout.addLayout(button_layout)
 
+        self.label_chronometres = QLabel()
+        self.label_chronometres.setFont(QFontDatabase.systemFont(QFontDatabase.FixedFont))
+        self.label_chronometres.setVisible(False)
+        sim_layout.addWidget(self.label_chronometres)
+
+        self.minuteur_chronometres = QTimer(self)
+        self.minuteur_chronometres.setInterval(500)  # ms entre deux bilans
+        self.minuteur_chronometres.timeout.connect(self.update_chronometres)
+
     def on_start_test(self):
         """
         Lorsque l'utilisateur clique sur 'Démarrer le Test':
-         1) On supprime l'ancienne figure.
-         2) On recrée une nouvelle simulation (re-lira le JSON).
+         1) Si le JSON n'a pas changé, on réutilise la simulation et sa figure (pas de reconstruction).
+         2) Sinon on supprime l'ancienne figure et on recrée une nouvelle simulation (re-lira le JSON).
          3) On ajoute la nouvelle figure.
          4) On lance la simulation.
         """
         self.btn_start.setDisabled(True)
 
+        with open(self.param_file_path, 'r') as file:
+            params = json.load(file)
+        if self.simulation is not None and self.simulation.params == params:
+            # Mêmes paramètres : les tableaux, les matrices et les noyaux compilés restent valides
+            self.simulation.reinitialiser()
+            self.is_running = True
+            self.simulation.start_test()
+            return
+
         # Retirer l'ancien canvas du layout
         if self.canvas is not None:
             layout = self.tab_simulation.layout()
@@ -103,6 +135,7 @@ class MainWindow(QMainWindow):
 
         # Crée une nouvelle instance de simulation (utilise param_file_path => le JSON)
         self.simulation = ThermalSimulation(self.param_file_path, on_simulation_end=self.simulation_ended_cb)
+        self.simulation.chronometres.activer(self.chk_chronometres.isChecked())
 
         # Crée un nouveau canvas
         self.canvas = FigureCanvas(self.simulation.fig)
@@ -127,6 +160,36 @@ class MainWindow(QMainWindow):
         """
         self.btn_start.setEnabled(True)
 
+    def on_chronometres_toggled(self, actif):
+        """Allume ou éteint les chronomètres de la simulation et l'affichage du bilan."""
+        self.simulation.chronometres.activer(actif)
+        self.label_chronometres.setVisible(actif)
+        self.btn_trace.setEnabled(actif)
+        if actif:
+            self.label_chronometres.setText("(en attente de la simulation)")
+            self.minuteur_chronometres.start()
+        else:
+            self.minuteur_chronometres.stop()
+
+    def update_chronometres(self):
+        """Affiche le bilan des chronomètres depuis le bilan précédent."""
+        simulation = self.simulation
+        bilan = simulation.chronometres.releve(simulation.state["simulation_steps"], simulation.dt)
+        if bilan["phases"]:
+            self.label_chronometres.setText(texte_bilan(bilan))
+
+    def on_export_trace(self):
+        """Écrit la trace des chronomètres (format Chrome Trace Event, pour chrome://tracing ou Perfetto)."""
+        filename, _ = QFileDialog.getSaveFileName(
+            parent=self,
+            caption="Exporter la trace",
+            dir="trace_frames.json",
+            filter="Trace JSON (*.json);;Tous les fichiers (*)"
+        )
+        if filename:
+            self.simulation.chronometres.ecrire_trace(filename)
+            print(f"Fichier sauvegardé: {filename}")
+
     def on_param_file_changed(self, new_path):
         """Met à jour self.param_file_path pour la prochaine simulation."""
         self.param_file_path = new_path
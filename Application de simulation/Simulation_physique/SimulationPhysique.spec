@@ -0,0 +1,36 @@
+# -*- mode: python ; coding: utf-8 -*-
+"""
+Construction de l'exécutable (dossier, pas fichier unique) :
+    pyinstaller SimulationPhysique.spec
+
+Le résultat est dist/SimulationPhysique/ : l'exécutable et son dossier _internal, à distribuer ensemble.
+Le mode dossier garde les fichiers à un emplacement fixe d'un lancement à l'autre (un exécutable
+« onefile » s'extrait dans un nouveau dossier temporaire à chaque lancement).
+
+Les modules qui contiennent des noyaux Numba sont livrés en .py dans _internal au lieu d'être
+compilés dans l'archive PYZ : Numba ne garde un cache que pour une fonction dont le fichier source
+existe. main.py place ce cache dans un dossier utilisateur persistant (NUMBA_CACHE_DIR).
+"""
+
+# Modules à noyaux @njit(cache=...) utilisés par l'interface et par --precompiler
+NOYAUX = ["thermal_engine", "probes", "rendu"]
+
+a = Analysis(
+    ["main.py"],
+    datas=[("parametres.json", "."), ("../icon.ico", ".")] + [(f"{nom}.py", ".") for nom in NOYAUX],
+)
+a.pure = [module for module in a.pure if module[0] not in NOYAUX]
+
+pyz = PYZ(a.pure)
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    [],
+    exclude_binaries=True,
+    name="SimulationPhysique",
+    icon="../icon.ico",
+    console=False,
+)
+
+coll = COLLECT(exe, a.binaries, a.datas, name="SimulationPhysique")
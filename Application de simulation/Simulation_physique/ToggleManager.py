@@ -1,6 +1,16 @@
+import numpy as np
+
 class ToggleManager:
     def __init__(self, toggle_time: list[float], dt):
         self.toggle_steps = [int(t / dt) for t in toggle_time]
 
     def toggle(self, sim_step) -> bool:
         return any(sim_step == toggle_step for toggle_step in self.toggle_steps)
+
+    def calendrier(self, n_steps) -> np.ndarray:
+        """Retourne un tableau (n_steps,) valant 1 aux pas où l'état doit basculer, pour les noyaux compilés."""
+        bascules = np.zeros(n_steps, dtype=np.uint8)
+        for toggle_step in self.toggle_steps:
+            if 0 <= toggle_step < n_steps:
+                bascules[toggle_step] = 1
+        return bascules
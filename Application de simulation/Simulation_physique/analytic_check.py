@@ -0,0 +1,292 @@
+"""
+Vérification de la précision contre des solutions analytiques, et coût de chaque mode de calcul.
+
+Sans TEC ni perturbation, la plaque du moteur obéit à
+    dT/dt = alpha * laplacien(T) - m (T - T_ambiant),    m = 2 h / (rho cp e)   (convection des deux faces)
+avec sur les côtés une condition de Robin -k dT/dn = h (T - T_ambiant) (convection des côtés exposés).
+La solution est un produit de séries de la paroi plane : modes cos(lambda (x - xc)) où
+lambda tan(lambda a) = h / k (xc centre et a demi-largeur du domaine), amortis en exp(-alpha lambda² t),
+le tout multiplié par exp(-m t).
+Deux cas sont simulés :
+    - "uniforme" : plaque uniforme à T_piece qui refroidit (série complète, décroissance exponentielle
+      pilotée par la convection des faces, bords plus froids) ;
+    - "mode" : champ initial séparable T_ambiant + A cos(lambda_n (x - xc)) cos(mu_n (y - yc)),
+      qui décroît sans se déformer en exp(-(m + alpha (lambda_n² + mu_n²)) t).
+
+La solution de référence est celle du domaine que le moteur discrétise réellement : la réunion des
+cellules actives, entre les cellules fantômes. Sur la grille uniforme, ce sont Nx - 2 cellules de dx
+(la plaque simulée est plus étroite que Lx de deux cellules) ; sur le maillage raffiné, la plaque Lx x Ly.
+L'erreur mesurée ne vient donc que de la discrétisation (espace, temps, précision).
+
+Pour chaque mode (solveur, précision, maillage), chaque résolution et chaque dt (solveurs implicites),
+on mesure l'erreur maximale et l'erreur quadratique moyenne sur les cellules actives à dix instants,
+et le temps de calcul. Le tableau de chaque mode marque d'un * les calculs sur le front de Pareto
+(aucun autre calcul n'est à la fois plus rapide et plus précis), puis un front commun à tous les modes
+est donné.
+
+Exemple :
+    python analytic_check.py parametres.json
+    python analytic_check.py parametres.json --cas mode --res 25 50 100 200 --dt 0.5 2 10 --sortie verification.csv
+"""
+
+import argparse
+import contextlib
+import copy
+import csv
+import io
+import json
+import os
+import time
+
+import numpy as np
+from scipy.optimize import brentq
+
+from thermal_engine import ThermalEngine
+
+# Mode : (options ajoutées à simulation_parameters, vrai si dt est libre)
+MODES = {
+    "explicite": ({}, False),
+    "explicite float32": ({"precision": "float32"}, False),
+    "explicite raffiné": ({"maillage": "raffine"}, False),
+    "adi": ({"solveur": "adi"}, True),
+    "adi float32": ({"solveur": "adi", "precision": "float32"}, True),
+    "expo": ({"solveur": "expo"}, True),
+}
+
+N_INSTANTS = 10  # Instants de comparaison (fins de frame), répartis sur la durée
+
+
+def racines_robin(beta, demi_longueur, n):
+    """n premières racines de lambda tan(lambda a) = beta (modes symétriques de la paroi plane de demi-largeur a)."""
+    racines = []
+    for k in range(n):
+        bas = k * np.pi / demi_longueur
+        haut = (k + 0.5) * np.pi / demi_longueur * (1 - 1e-12)
+        racines.append(brentq(lambda lam: lam * np.tan(lam * demi_longueur) - beta, bas, haut))
+    return np.array(racines)
+
+
+def domaine_actif(centres, largeurs):
+    """Centre et demi-largeur du domaine couvert par les cellules actives d'un axe (sans les cellules fantômes)."""
+    bas = centres[1] - largeurs[1] / 2
+    haut = centres[-2] + largeurs[-2] / 2
+    return (bas + haut) / 2, (haut - bas) / 2
+
+
+class _SolutionPlaque:
+    """Grandeurs communes : diffusivité, taux de convection des faces, domaine actif et racines de chaque axe."""
+
+    def __init__(self, engine, n_termes):
+        self.T_ambiant = engine.T_ambiant
+        self.alpha = engine.k / (engine.rho * engine.cp)
+        self.m = 2 * engine.h_conv / (engine.rho * engine.cp * engine.thickness)
+        beta = engine.h_conv / engine.k
+        # Positions comptées depuis le centre du domaine actif, de demi-largeurs a (x) et b (y)
+        self.cx, self.a = domaine_actif(engine.centres_x, engine.largeurs_x)
+        self.cy, self.b = domaine_actif(engine.centres_y, engine.largeurs_y)
+        self.lambdas = racines_robin(beta, self.a, n_termes)
+        self.mus = racines_robin(beta, self.b, n_termes)
+
+
+class RefroidissementUniforme(_SolutionPlaque):
+    """Plaque uniforme à T_piece à t = 0 (état initial du moteur)."""
+
+    nom = "uniforme"
+
+    def __init__(self, engine, n_termes=100):
+        super().__init__(engine, n_termes)
+        self.ecart_initial = engine.T_piece - self.T_ambiant
+
+    @staticmethod
+    def _coefficients(racines, demi_longueur):
+        s = np.sin(racines * demi_longueur)
+        return 2 * s / (racines * demi_longueur + s * np.cos(racines * demi_longueur))
+
+    def _serie(self, t, positions, racines, demi_longueur):
+        termes = (self._coefficients(racines, demi_longueur) * np.exp(-self.alpha * racines ** 2 * t))
+        return np.cos(np.outer(positions, racines)) @ termes
+
+    def initialiser(self, engine):
+        pass  # Le moteur part déjà d'une plaque uniforme à T_piece
+
+    def champ(self, t, x, y):
+        fx = self._serie(t, x - self.cx, self.lambdas, self.a)
+        fy = self._serie(t, y - self.cy, self.mus, self.b)
+        return self.T_ambiant + self.ecart_initial * np.exp(-self.m * t) * np.outer(fy, fx)
+
+
+class ModeSepare(_SolutionPlaque):
+    """Champ initial formé d'un seul mode propre (n-ième mode symétrique sur chaque axe)."""
+
+    nom = "mode"
+
+    def __init__(self, engine, n=2, amplitude=50.0):
+        super().__init__(engine, n)
+        self.lam, self.mu = self.lambdas[n - 1], self.mus[n - 1]
+        self.amplitude = amplitude
+        self.taux = self.m + self.alpha * (self.lam ** 2 + self.mu ** 2)
+
+    def initialiser(self, engine):
+        T0 = self.champ(0.0, engine.centres_x, engine.centres_y)
+        engine.state["T"][:] = T0
+        engine.state["T_new"][:] = T0
+
+    def champ(self, t, x, y):
+        forme = np.outer(np.cos(self.mu * (y - self.cy)), np.cos(self.lam * (x - self.cx)))
+        return self.T_ambiant + self.amplitude * np.exp(-self.taux * t) * forme
+
+
+CAS = {"uniforme": RefroidissementUniforme, "mode": ModeSepare}
+
+
+def params_verification(params, duree=None):
+    """Copie des paramètres sans sources (TEC et perturbation éteints), matériau homogène, sans arrêt anticipé."""
+    p = copy.deepcopy(params)
+    p["TEC"]["courant"] = 0.0
+    p["TEC"]["TEC_momment_inversion"] = []
+    p["perturbation_properties"]["power"] = 0.0
+    p["perturbation_properties"]["PERTU_momment_inversion"] = []
+    p["material_properties"]["diff_de_densite"] = 1.0
+    p["simulation_parameters"].pop("arret_stationnaire", None)
+    p["simulation_parameters"].pop("instantanes", None)
+    if duree is not None:
+        p["simulation_parameters"]["sim_duration"] = duree
+    return p
+
+
+def _construire(params):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ThermalEngine(params=params)
+
+
+def executer_cas(params, nom_cas, mode, res, dt=None):
+    """
+    Simule un cas dans un mode donné. Retourne un dictionnaire : cas, mode, res, cellules, dt,
+    pas, erreur_max et erreur_rms (°C, maximum sur les instants de comparaison),
+    construction et calcul (s).
+    """
+    p = copy.deepcopy(params)
+    p["simulation_parameters"].update(MODES[mode][0], res_spatiale=res)
+    if dt is not None:
+        p["simulation_parameters"]["dt"] = dt
+    # Une frame par instant de comparaison : toutes les frames finissent sur un instant, quel que soit dt
+    # (le pas du schéma explicite n'est connu qu'une fois le moteur construit)
+    pas = _construire(p).dt
+    p["simulation_parameters"]["res_temporelle"] = max(1, round(p["simulation_parameters"]["sim_duration"] / N_INSTANTS / pas))
+
+    debut = time.perf_counter()
+    engine = _construire(p)
+    construction = time.perf_counter() - debut
+    solution = CAS[nom_cas](engine)
+    solution.initialiser(engine)
+
+    erreur_max = erreur_rms = 0.0
+    calcul = 0.0
+    fini = False
+    while not fini:
+        debut = time.perf_counter()
+        fini = engine.avancer_frame()
+        calcul += time.perf_counter() - debut
+        t = engine.state["simulation_steps"] * engine.dt
+        reference = solution.champ(t, engine.centres_x, engine.centres_y)
+        ecart = (engine.state["T"].astype(np.float64) - reference)[1:-1, 1:-1]  # Cellules actives
+        erreur_max = max(erreur_max, float(np.abs(ecart).max()))
+        erreur_rms = max(erreur_rms, float(np.sqrt(np.mean(ecart ** 2))))
+
+    return {
+        "cas": nom_cas, "mode": mode, "res": res, "cellules": engine.Ny * engine.Nx, "dt": engine.dt,
+        "pas": engine.state["simulation_steps"], "erreur_max": erreur_max, "erreur_rms": erreur_rms,
+        "construction": construction, "calcul": calcul,
+    }
+
+
+def front_pareto(resultats):
+    """Indices des calculs qu'aucun autre ne bat à la fois en temps total et en erreur maximale."""
+    front = []
+    for i, r in enumerate(resultats):
+        cout, erreur = r["construction"] + r["calcul"], r["erreur_max"]
+        domine = any(
+            (s["construction"] + s["calcul"] <= cout and s["erreur_max"] <= erreur)
+            and (s["construction"] + s["calcul"] < cout or s["erreur_max"] < erreur)
+            for s in resultats
+        )
+        if not domine:
+            front.append(i)
+    return front
+
+
+def verifier(params, cas, modes, resolutions, liste_dt):
+    """Exécute toute la matrice (cas x modes x résolutions x dt). Retourne la liste des résultats."""
+    resultats = []
+    for mode in modes:
+        dt_libre = MODES[mode][1]
+        # Construction à blanc : compilation et chargement des noyaux hors chronomètre
+        p = copy.deepcopy(params)
+        p["simulation_parameters"].update(MODES[mode][0], res_spatiale=min(resolutions))
+        _construire(p)
+        for nom_cas in cas:
+            for res in resolutions:
+                for dt in (liste_dt if dt_libre else [None]):
+                    resultats.append(executer_cas(params, nom_cas, mode, res, dt))
+                    r = resultats[-1]
+                    print(f"{nom_cas:>8} {mode:>18} res {res:4d} dt {r['dt']:8.4g} s : erreur max {r['erreur_max']:.3e} °C "
+                          f"({r['construction'] + r['calcul']:.2f} s)", flush=True)
+    return resultats
+
+
+ENTETE = (f"  {'mode':>18} {'res':>5} {'cellules':>9} {'dt (s)':>9} {'pas':>8} {'err. max (°C)':>14} "
+          f"{'err. RMS (°C)':>14} {'constr. (s)':>11} {'calcul (s)':>10}")
+
+
+def _ligne(r, sur_front):
+    return (f"{'*' if sur_front else ' '} {r['mode']:>18} {r['res']:5d} {r['cellules']:9d} {r['dt']:9.4g} {r['pas']:8d} "
+            f"{r['erreur_max']:14.3e} {r['erreur_rms']:14.3e} {r['construction']:11.3f} {r['calcul']:10.3f}")
+
+
+def afficher_tableaux(resultats):
+    """Un tableau par cas et par mode (trié par temps total, * = front de Pareto du mode), puis le front commun du cas."""
+    for nom_cas in dict.fromkeys(r["cas"] for r in resultats):
+        du_cas = [r for r in resultats if r["cas"] == nom_cas]
+        print(f"\n=== Cas {nom_cas} ===")
+        for mode in dict.fromkeys(r["mode"] for r in du_cas):
+            du_mode = sorted((r for r in du_cas if r["mode"] == mode), key=lambda r: r["construction"] + r["calcul"])
+            front = set(front_pareto(du_mode))
+            print(ENTETE)
+            for i, r in enumerate(du_mode):
+                print(_ligne(r, i in front))
+        commun = sorted((du_cas[i] for i in front_pareto(du_cas)), key=lambda r: r["construction"] + r["calcul"])
+        print(f"\nFront de Pareto, tous modes confondus (cas {nom_cas}) :")
+        print(ENTETE)
+        for r in commun:
+            print(_ligne(r, True))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Erreur et coût des modes de calcul contre des solutions analytiques.")
+    parser.add_argument("parametres", nargs="?", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "parametres.json"),
+                        help="Fichier JSON de référence : dimensions, matériau, h (défaut : parametres.json à côté du script)")
+    parser.add_argument("--cas", nargs="+", choices=list(CAS), default=list(CAS))
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--res", type=int, nargs="+", default=[25, 50, 100], help="Résolutions (cellules sur le petit côté)")
+    parser.add_argument("--dt", type=float, nargs="+", default=[0.1, 0.5, 2.0, 10.0],
+                        help="Pas de temps essayés par les solveurs implicites (s)")
+    parser.add_argument("--duree", type=float, default=None, help="Durée simulée (s, défaut : sim_duration du JSON)")
+    parser.add_argument("--sortie", default=None, help="Fichier CSV de tous les résultats")
+    args = parser.parse_args(argv)
+
+    with open(args.parametres, "r") as f:
+        params = params_verification(json.load(f), args.duree)
+
+    resultats = verifier(params, args.cas, args.modes, args.res, args.dt)
+    afficher_tableaux(resultats)
+
+    if args.sortie:
+        with open(args.sortie, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(resultats[0].keys()))
+            writer.writeheader()
+            writer.writerows(resultats)
+        print(f"Fichier sauvegardé: {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
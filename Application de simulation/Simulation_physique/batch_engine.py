@@ -0,0 +1,151 @@
+"""
+Moteur par lots : avance N plaques de même grille en un seul appel compilé.
+
+Pour les petites grilles (environ 25x50, voir parametres_initiaux.json), paralléliser le stencil
+d'une seule plaque ne rentabilise pas les fils. Ici, chaque fil prend une plaque complète :
+le prange porte sur l'axe des scénarios et chaque plaque garde ses propres matériau, sources
+et convection (tableaux de forme (N, Ny, Nx)).
+"""
+
+import numpy as np
+from numba import njit, prange
+
+from thermal_engine import CACHE_JIT, ThermalEngine
+
+# Même noyau que ThermalEngine._update_temperature_precalcule, compilé sans parallélisme interne
+_pas_plaque = njit(ThermalEngine._update_temperature_precalcule.py_func)
+
+
+@njit(parallel=True, nogil=True, cache=CACHE_JIT)
+def _update_temperature_lot(T, T_new, coef_int, coef_bord, coef_src, coef_conv, P_perm, P_mouse,
+                            dx_dy, T_ambiant, aire_sides_up_down, aire_sides_left_right, aire_top):
+    """Avance d'un pas toutes les plaques de la pile (N, Ny, Nx), une plaque par itération parallèle."""
+    for n in prange(T.shape[0]):
+        _pas_plaque(T[n], T_new[n], coef_int[n], coef_bord[n], coef_src[n], coef_conv[n],
+                    P_perm[n], P_mouse, dx_dy[n], T_ambiant, aire_sides_up_down[n],
+                    aire_sides_left_right[n], aire_top[n])
+    return T_new
+
+
+class BatchThermalEngine:
+    """
+    Regroupe plusieurs scénarios ThermalEngine de même grille (Ny, Nx) et les avance ensemble.
+    Tous les scénarios partagent le plus petit dt stable du lot ; durée, nombre de pas par frame
+    et précision doivent être les mêmes pour tous.
+    """
+
+    def __init__(self, liste_params):
+        self.engines = [ThermalEngine(params=params) for params in liste_params]
+        if any(e.solveur != "explicite" for e in self.engines):
+            raise ValueError("Le moteur par lots ne prend en charge que le solveur explicite.")
+        if any(e.maillage != "uniforme" for e in self.engines):
+            raise ValueError("Le moteur par lots ne prend en charge que le maillage uniforme.")
+        formes = {(e.Ny, e.Nx) for e in self.engines}
+        if len(formes) != 1:
+            raise ValueError(f"Tous les scénarios d'un lot doivent avoir la même grille, reçu : {sorted(formes)}")
+        # Le lot s'arrête et échantillonne au même pas pour tous, et empile les champs dans un seul tableau
+        for nom, valeurs in (("la même durée (sim_duration)", {e.steps_total for e in self.engines}),
+                             ("le même pas par frame (res_temporelle)", {e.steps_per_frame for e in self.engines}),
+                             ("la même précision", {str(e.dtype) for e in self.engines})):
+            if len(valeurs) != 1:
+                raise ValueError(f"Tous les scénarios d'un lot doivent avoir {nom}, reçu : {sorted(valeurs)}")
+
+        # Pas de temps commun : le plus contraignant du lot
+        self.dt = min(e.dt for e in self.engines)
+        for e in self.engines:
+            if e.dt != self.dt:
+                e.definir_dt(self.dt)
+
+        premier = self.engines[0]
+        self.N = len(self.engines)
+        self.Ny, self.Nx = premier.Ny, premier.Nx
+        self.steps_total = premier.steps_total
+        self.steps_per_frame = premier.steps_per_frame
+        self.T_ambiant = premier.T_ambiant
+
+        # Piles de coefficients (N, Ny, Nx) et scalaires géométriques (N,)
+        self.coef_int = np.stack([e.coef_voisins_interieur for e in self.engines])
+        self.coef_bord = np.stack([e.coef_voisins_bord for e in self.engines])
+        self.coef_src = np.stack([e.coef_source for e in self.engines])
+        self.coef_conv = np.stack([e.coef_convection for e in self.engines])
+        self.dx_dy = np.array([e.dx * e.dy for e in self.engines])
+        self.aire_sides_up_down = np.array([e.aire_sides_up_down for e in self.engines])
+        self.aire_sides_left_right = np.array([e.aire_sides_left_right for e in self.engines])
+        self.aire_top = np.array([e.aire_top for e in self.engines])
+        self.P_mouse = np.zeros((self.Ny, self.Nx), dtype=premier.dtype)
+
+        # Chaque moteur écrit ses sources directement dans sa tranche de la pile
+        self.P_perm = np.stack([e.P_perm for e in self.engines])
+        for n, e in enumerate(self.engines):
+            e.P_perm = self.P_perm[n]
+
+        # Événements on/off regroupés par pas de temps : {pas: [(scénario, "tec" ou "pertu"), ...]}
+        self.evenements = {}
+        for n, e in enumerate(self.engines):
+            for pas in e.TEC_momment_inversion.toggle_steps:
+                self.evenements.setdefault(pas, []).append((n, "tec"))
+            for pas in e.PERTU_momment_inversion.toggle_steps:
+                self.evenements.setdefault(pas, []).append((n, "pertu"))
+
+        # Indices des thermistances de chaque scénario pour la lecture groupée
+        self.therm_i = np.array([[pos[0] for pos in e.thermistances_pos] for e in self.engines])
+        self.therm_j = np.array([[pos[1] for pos in e.thermistances_pos] for e in self.engines])
+
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        """Remet toutes les plaques à t=0 et vide l'historique."""
+        for e in self.engines:
+            e.reinitialiser()
+        self.T = np.stack([e.state["T"] for e in self.engines])
+        self.T_new = self.T.copy()
+        self.simulation_steps = 0
+        self.T_hist = []
+
+    def _appliquer_evenements(self, pas):
+        """Bascule les sources des scénarios qui ont un moment d'inversion à ce pas."""
+        touches = set()
+        for n, source in self.evenements.get(pas, ()):
+            if source == "tec":
+                self.engines[n].toggle_power()
+            else:
+                self.engines[n].toggle_perturbation()
+            touches.add(n)
+        # Au premier pas, les sources de tous les scénarios sont écrites selon leur état initial
+        for n in (range(self.N) if pas == 0 else touches):
+            self.engines[n]._mettre_a_jour_sources()
+
+    def _enregistrer_thermistances(self):
+        """Ajoute la lecture des thermistances de toutes les plaques, tableau de forme (N, 3)."""
+        self.T_hist.append(self.T[np.arange(self.N)[:, None], self.therm_i, self.therm_j])
+
+    def avancer_frame(self):
+        """Avance toutes les plaques d'une frame. Retourne True lorsque la durée est atteinte."""
+        for _ in range(self.steps_per_frame):
+            self._appliquer_evenements(self.simulation_steps)
+
+            if self.simulation_steps * self.dt > self.steps_total:
+                self._enregistrer_thermistances()
+                return True
+
+            self.T_new = _update_temperature_lot(
+                self.T, self.T_new, self.coef_int, self.coef_bord, self.coef_src, self.coef_conv,
+                self.P_perm, self.P_mouse, self.dx_dy, self.T_ambiant, self.aire_sides_up_down,
+                self.aire_sides_left_right, self.aire_top
+            )
+            self.T, self.T_new = self.T_new, self.T  # Échange des buffers
+            self.simulation_steps += 1
+
+        self._enregistrer_thermistances()
+        return False
+
+    def executer(self):
+        """Exécute tous les scénarios jusqu'à la fin de la durée de simulation."""
+        while not self.avancer_frame():
+            pass
+
+    def historique(self, n):
+        """Retourne les colonnes temps, T1, T2, T3 du scénario n (même format que ThermalEngine.historique)."""
+        traces = np.array([lecture[n] for lecture in self.T_hist])
+        time_values = np.arange(len(traces)) * self.dt * self.steps_per_frame
+        return np.column_stack((time_values, traces))
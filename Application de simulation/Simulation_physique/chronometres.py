@@ -0,0 +1,202 @@
+"""
+Chronomètres par phase, pour savoir où passe le temps d'une frame : noyau, bascules du TEC et
+réécriture de P_perm, sondes, historique, publication par le fil de calcul, puis courbes, champ et
+dessin matplotlib côté interface.
+
+Désactivés, ils ne coûtent qu'un test de booléen ou un contexte vide par phase. Activés, chaque
+mesure est cumulée par phase (bilan glissant lu par l'interface) et gardée dans une trace bornée,
+exportable au format Chrome Trace Event (JSON), lisible dans chrome://tracing ou ui.perfetto.dev.
+
+Les phases s'emboîtent : une phase mesurée pendant une autre (dans le même fil) est cumulée comme
+sous-phase de celle-ci, et le bilan l'affiche en retrait sous sa phase parente, dont le temps la
+comprend déjà.
+
+Deux façons de mesurer :
+    with chronometres.mesurer("historique"):    # une tranche contiguë
+        ...
+    pointage = chronometres.pointage()          # boucle de pas : temps cumulé par phase sur la frame
+    pointage("bascules"); ...; pointage.terminer()
+"""
+
+import collections
+import contextlib
+import json
+import threading
+import time
+
+_NUL = contextlib.nullcontext()
+
+
+class _Mesure:
+    """Tranche chronométrée par un bloc with."""
+
+    __slots__ = ("chronometres", "phase", "chemin", "debut")
+
+    def __init__(self, chronometres, phase):
+        self.chronometres = chronometres
+        self.phase = phase
+
+    def __enter__(self):
+        pile = self.chronometres._pile_du_fil()
+        pile.append(self.phase)
+        self.chemin = tuple(pile)
+        self.debut = time.perf_counter_ns()
+
+    def __exit__(self, *exc):
+        fin = time.perf_counter_ns()
+        self.chronometres._pile_du_fil().pop()
+        self.chronometres.ajouter(self.chemin, self.debut, fin)
+
+
+class _Pointage:
+    """Attribue le temps écoulé depuis le point précédent à une phase ; les totaux sont ajoutés par terminer()."""
+
+    def __init__(self, chronometres):
+        self.chronometres = chronometres
+        self.parent = tuple(chronometres._pile_du_fil())  # Phases ouvertes autour de la boucle de pas
+        self.durees = {}
+        self.precedent = time.perf_counter_ns()
+
+    def __call__(self, phase):
+        maintenant = time.perf_counter_ns()
+        self.durees[phase] = self.durees.get(phase, 0) + maintenant - self.precedent
+        self.precedent = maintenant
+
+    def terminer(self):
+        self.chronometres.ajouter_cumuls({self.parent + (phase,): duree for phase, duree in self.durees.items()},
+                                         self.precedent)
+
+
+def _ordre_arbre(chemins):
+    """
+    Trie les chemins de phases pour l'affichage : chaque phase est suivie de ses sous-phases, les
+    phases sœurs dans l'ordre de leur première mesure (une phase parente finit après ses sous-phases :
+    son rang est celui de sa première descendante).
+    """
+    rang = {}
+    for numero, chemin in enumerate(chemins):
+        for longueur in range(1, len(chemin) + 1):
+            rang.setdefault(chemin[:longueur], numero)
+    return sorted(chemins, key=lambda chemin: [rang[chemin[:longueur]] for longueur in range(1, len(chemin) + 1)])
+
+
+class ChronometresFrames:
+    """Cumuls par phase depuis le dernier relevé et trace des dernières mesures, partagés entre fils."""
+
+    def __init__(self, capacite_trace=200000):
+        self.actif = False
+        self.capacite_trace = capacite_trace
+        self._verrou = threading.Lock()
+        self._piles = threading.local()  # Phases ouvertes (blocs with en cours), par fil
+        self.vider()
+
+    def activer(self, actif=True):
+        """Allume (la trace repart de zéro) ou éteint les chronomètres."""
+        if actif and not self.actif:
+            self.vider()
+        self.actif = actif
+
+    def _pile_du_fil(self):
+        """Phases ouvertes dans le fil courant, de la plus englobante à la plus intérieure."""
+        pile = getattr(self._piles, "pile", None)
+        if pile is None:
+            pile = self._piles.pile = []
+        return pile
+
+    def vider(self):
+        with self._verrou:
+            self._cumuls = {}  # chemin (phase parente, ..., phase) -> [total en ns, nombre de mesures]
+            self._trace = collections.deque(maxlen=self.capacite_trace)
+            self._noms_fils = {}
+            self._origine = time.perf_counter_ns()
+            self._releve_precedent = (self._origine, None)  # (instant, pas simulés)
+
+    def mesurer(self, phase):
+        """Contexte qui chronomètre son bloc (contexte vide si les chronomètres sont éteints)."""
+        if not self.actif:
+            return _NUL
+        return _Mesure(self, phase)
+
+    def pointage(self):
+        """Pointage pour une boucle de pas, ou None si les chronomètres sont éteints."""
+        return _Pointage(self) if self.actif else None
+
+    def ajouter(self, chemin, debut, fin):
+        """Ajoute une tranche [debut, fin] (ns, perf_counter_ns) à la phase chemin[-1] (sous-phase de chemin[:-1]) et à la trace."""
+        fil = threading.current_thread()
+        with self._verrou:
+            cumul = self._cumuls.setdefault(chemin, [0, 0])
+            cumul[0] += fin - debut
+            cumul[1] += 1
+            self._noms_fils[fil.ident] = fil.name
+            self._trace.append(("X", chemin[-1], fil.ident, debut, fin - debut))
+
+    def ajouter_cumuls(self, durees, fin):
+        """Ajoute les totaux d'une frame {chemin: ns} (une mesure par phase) ; la trace les garde comme compteurs."""
+        fil = threading.current_thread()
+        with self._verrou:
+            for chemin, duree in durees.items():
+                cumul = self._cumuls.setdefault(chemin, [0, 0])
+                cumul[0] += duree
+                cumul[1] += 1
+            self._noms_fils[fil.ident] = fil.name
+            self._trace.append(("C", "boucle de pas (ms par frame)", fil.ident, fin,
+                                {chemin[-1]: duree for chemin, duree in durees.items()}))
+
+    def releve(self, pas_simules, dt):
+        """
+        Bilan depuis le relevé précédent (les cumuls repartent de zéro) : durée du relevé (s), pas
+        simulés par seconde, secondes simulées par seconde et, par phase, (nom, niveau, ms par mesure,
+        mesures par seconde, part du temps en %). Le niveau vaut 0 pour une phase de premier rang, 1
+        pour ses sous-phases, etc. ; chaque phase est suivie de ses sous-phases.
+        """
+        maintenant = time.perf_counter_ns()
+        with self._verrou:
+            cumuls, self._cumuls = self._cumuls, {}
+            instant, pas_precedents = self._releve_precedent
+            self._releve_precedent = (maintenant, pas_simules)
+        duree = max((maintenant - instant) / 1e9, 1e-9)
+        pas_par_s = None
+        if pas_precedents is not None and pas_simules >= pas_precedents:
+            pas_par_s = (pas_simules - pas_precedents) / duree
+        phases = []
+        for chemin in _ordre_arbre(list(cumuls)):
+            total, nombre = cumuls[chemin]
+            phases.append((chemin[-1], len(chemin) - 1, total / nombre / 1e6, nombre / duree, 100 * total / 1e9 / duree))
+        return {
+            "duree": duree,
+            "pas_par_s": pas_par_s,
+            "secondes_simulees_par_s": pas_par_s * dt if pas_par_s is not None else None,
+            "phases": phases,
+        }
+
+    def ecrire_trace(self, chemin):
+        """Écrit la trace au format Chrome Trace Event (temps en µs depuis l'activation)."""
+        with self._verrou:
+            trace = list(self._trace)
+            noms_fils = dict(self._noms_fils)
+        evenements = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": fil, "args": {"name": nom}}
+                      for fil, nom in noms_fils.items()]
+        for genre, phase, fil, debut, valeur in trace:
+            evenement = {"name": phase, "ph": genre, "pid": 1, "tid": fil, "ts": (debut - self._origine) / 1e3}
+            if genre == "X":
+                evenement["dur"] = valeur / 1e3
+            else:
+                evenement["args"] = {nom: duree / 1e6 for nom, duree in valeur.items()}
+            evenements.append(evenement)
+        with open(chemin, "w") as f:
+            json.dump({"traceEvents": evenements, "displayTimeUnit": "ms"}, f)
+
+
+def texte_bilan(bilan):
+    """Met en forme un bilan de ChronometresFrames.releve() pour l'affichage."""
+    if bilan["pas_par_s"] is None:
+        lignes = ["(en attente de la simulation)"]
+    else:
+        lignes = [f"{bilan['pas_par_s']:.0f} pas/s, {bilan['secondes_simulees_par_s']:.2f} s simulées par seconde"]
+    lignes.append(f"{'phase':<32}{'ms/mesure':>10}{'mesures/s':>11}{'% temps':>9}")
+    for phase, niveau, ms, frequence, part in bilan["phases"]:
+        lignes.append(f"{'  ' * niveau + phase:<32}{ms:10.3f}{frequence:11.1f}{part:9.1f}")
+    if any(niveau for _, niveau, _, _, _ in bilan["phases"]):
+        lignes.append("(phases en retrait : comprises dans la phase au-dessus)")
+    return "\n".join(lignes)
@@ -0,0 +1,339 @@
+"""
+Décomposition de domaine en mémoire partagée pour les très grandes plaques.
+
+Les deux champs de température (courant et suivant) vivent dans des blocs multiprocessing.shared_memory.
+La grille (Ny, Nx) est découpée en bandes de lignes ; chaque processus de travail possède une bande,
+garde ses propres coefficients (la bande seulement, qui tient dans son cache) et ne met à jour que ses
+lignes. Les lignes de halo (dernière ligne de la bande du dessus, première de celle du dessous) sont
+lues directement dans le champ partagé : l'échange des halos se fait par la barrière de synchronisation
+à la fin de chaque pas, après laquelle toutes les bandes du pas précédent sont écrites.
+
+Le processus principal ne calcule rien : il découpe la simulation en paquets de pas (jusqu'à la fin de
+la frame ou jusqu'à la prochaine lecture des sondes), puis lit thermistances et sondes dans le champ
+partagé. Les résultats sont identiques, bit pour bit, à ceux du noyau précalculé de ThermalEngine.
+
+Exemple :
+    python domain_decomposition.py parametres.json resultats.csv --travailleurs 4
+    python domain_decomposition.py parametres.json --scaling 1 2 4 8 --res 1000 --pas 100
+"""
+
+import argparse
+import copy
+import json
+import multiprocessing as mp
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+from numba import njit
+
+from probes import echantillonner_sondes
+from thermal_engine import CACHE_JIT, ThermalEngine, _sources_et_faces
+
+
+@njit(nogil=True, cache=CACHE_JIT)
+def _pas_bande(T, T_new, i_debut, i_fin, coef_int, coef_bord, coef_src, coef_conv, P_perm, P_mouse,
+               dx_dy, T_piece, aire_sides_up_down, aire_sides_left_right, aire_top):
+    """
+    Met à jour les lignes [i_debut, i_fin) du champ partagé avec les mêmes expressions (et le même
+    ordre des opérations) que ThermalEngine._update_temperature_precalcule. Les tableaux de
+    coefficients ne contiennent que la bande : la ligne i y est à l'indice i - i_debut.
+    """
+    Ny, Nx = T.shape
+    for i in range(i_debut, i_fin):
+        b = i - i_debut
+        if i == 1 or i == Ny - 2:
+            # Bord haut ou bas, coins compris
+            di = 1 if i == 1 else -1
+            for j in range(2, Nx - 2):
+                T_ij = T[i, j]
+                val = T_ij + coef_bord[b, j] * (T[i + di, j] + T[i, j + 1] + T[i, j - 1] - 3 * T_ij)
+                val += coef_conv[b, j] * (T_piece - T_ij) * aire_sides_up_down
+                T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[b, j], coef_conv[b, j],
+                                                P_perm[b, j], P_mouse[b, j], T_piece, aire_top)
+            for j in (1, Nx - 2):
+                dj = 1 if j == 1 else -1
+                T_ij = T[i, j]
+                val = T_ij + coef_bord[b, j] * (T[i + di, j] + T[i, j + dj] - 2 * T_ij)
+                val += 2 * coef_conv[b, j] * (T_piece - T_ij) * aire_sides_up_down
+                T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[b, j], coef_conv[b, j],
+                                                P_perm[b, j], P_mouse[b, j], T_piece, aire_top)
+        else:
+            # Intérieur : stencil à 5 points
+            for j in range(2, Nx - 2):
+                T_ij = T[i, j]
+                val = T_ij + coef_int[b, j] * (
+                    T[i + 1, j] + T[i - 1, j] + T[i, j + 1] + T[i, j - 1] - 4 * T_ij
+                ) / dx_dy
+                T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[b, j], coef_conv[b, j],
+                                                P_perm[b, j], P_mouse[b, j], T_piece, aire_top)
+            # Bords gauche et droit
+            j = 1
+            T_ij = T[i, j]
+            val = T_ij + coef_bord[b, j] * (T[i + 1, j] + T[i - 1, j] + T[i, j + 1] - 3 * T_ij)
+            val += coef_conv[b, j] * (T_piece - T_ij) * aire_sides_left_right
+            T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[b, j], coef_conv[b, j],
+                                            P_perm[b, j], P_mouse[b, j], T_piece, aire_top)
+            j = Nx - 2
+            T_ij = T[i, j]
+            val = T_ij + coef_bord[b, j] * (T[i + 1, j] + T[i - 1, j] + T[i, j - 1] - 3 * T_ij)
+            val += coef_conv[b, j] * (T_piece - T_ij) * aire_sides_left_right
+            T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[b, j], coef_conv[b, j],
+                                            P_perm[b, j], P_mouse[b, j], T_piece, aire_top)
+    return T_new
+
+
+def _travailleur(noms, forme, dtype, i_debut, i_fin, bande, sources, calendriers, scalaires,
+                 barriere_pas, barriere_frame):
+    """
+    Boucle d'un processus de travail : attend une commande (nombre de pas ou arrêt) dans le bloc
+    partagé, avance sa bande de ce nombre de pas en se synchronisant avec les autres à chaque pas.
+    """
+    blocs = [shared_memory.SharedMemory(name=nom) for nom in noms]
+    champs = [np.ndarray(forme, dtype=dtype, buffer=bloc.buf) for bloc in blocs[:2]]
+    commande = np.ndarray((2,), dtype=np.int64, buffer=blocs[2].buf)
+    calendrier_tec, calendrier_pertu = calendriers
+    P_tec, P_pertu, masque_pertu = sources
+    P_perm = np.zeros_like(P_tec)
+    P_mouse = np.zeros_like(P_tec)
+    sim_steps = 0
+    power_enabled = 0
+    perturbation_state = 0
+    try:
+        while True:
+            barriere_frame.wait()
+            n_pas, arret = commande
+            if arret:
+                break
+            for n in range(n_pas):
+                # Bascules lues dans le même calendrier par chaque processus, comme dans _avancer_pas_fusionnes
+                change = n == 0
+                if sim_steps < calendrier_tec.shape[0]:
+                    if calendrier_tec[sim_steps]:
+                        power_enabled = 1 - power_enabled
+                        change = True
+                    if calendrier_pertu[sim_steps]:
+                        perturbation_state = 1 - perturbation_state
+                        change = True
+                if change:
+                    P_perm[:] = power_enabled * P_tec
+                    P_perm[masque_pertu] = perturbation_state * P_pertu[masque_pertu]
+
+                _pas_bande(champs[sim_steps % 2], champs[1 - sim_steps % 2], i_debut, i_fin, *bande,
+                           P_perm, P_mouse, *scalaires)
+                sim_steps += 1
+                if n < n_pas - 1:
+                    barriere_pas.wait()  # Le pas suivant lit les halos écrits par les voisins
+            barriere_frame.wait()
+    except Exception:
+        # Débloque le processus principal et les autres bandes plutôt que de les laisser attendre
+        barriere_pas.abort()
+        barriere_frame.abort()
+        raise
+    finally:
+        del champs, commande
+        for bloc in blocs:
+            bloc.close()
+
+
+class PlaqueDecomposee:
+    """
+    Simulation explicite (noyau précalculé, maillage uniforme) répartie sur plusieurs processus.
+    Le moteur ThermalEngine sous-jacent (self.engine) fournit coefficients, calendriers, sondes et
+    historique ; son champ courant est une vue sur la mémoire partagée.
+    """
+
+    def __init__(self, param_file_path="parametres.json", params=None, n_travailleurs=None):
+        self.engine = e = ThermalEngine(param_file_path, params)
+        if e.solveur != "explicite" or e.noyau != "precalcule" or e.maillage != "uniforme":
+            raise ValueError("La décomposition de domaine ne prend en charge que le solveur explicite "
+                             "précalculé sur maillage uniforme.")
+        self.n_travailleurs = n_travailleurs or os.cpu_count()
+        lignes_actives = e.Ny - 2
+        if self.n_travailleurs > lignes_actives:
+            raise ValueError(f"Trop de travailleurs ({self.n_travailleurs}) pour {lignes_actives} lignes actives.")
+
+        # Bandes de lignes actives de hauteurs presque égales
+        limites = np.linspace(1, e.Ny - 1, self.n_travailleurs + 1).round().astype(int)
+        self.bandes = list(zip(limites[:-1], limites[1:]))
+
+        # Deux champs partagés (courant/suivant, échangés à chaque pas) et la commande [n_pas, arrêt]
+        taille = e.Ny * e.Nx * np.dtype(e.dtype).itemsize
+        self.blocs = [shared_memory.SharedMemory(create=True, size=taille) for _ in range(2)]
+        self.blocs.append(shared_memory.SharedMemory(create=True, size=2 * 8))
+        self.champs = [np.ndarray((e.Ny, e.Nx), dtype=e.dtype, buffer=bloc.buf) for bloc in self.blocs[:2]]
+        self.commande = np.ndarray((2,), dtype=np.int64, buffer=self.blocs[2].buf)
+        self.commande[:] = 0
+
+        # Sources unitaires : même écriture que _mettre_a_jour_sources (TEC puis perturbation)
+        P_tec = np.zeros((e.Ny, e.Nx), dtype=e.dtype)
+        P_tec[e.yl_start:e.yl_end, e.xl_start:e.xl_end] = 1 * (e.couplage_thermique * e.initial_P_in) / e.surface_source
+        P_pertu = np.zeros((e.Ny, e.Nx), dtype=e.dtype)
+        P_pertu[e.y_perturbation, e.x_perturbation] = e.P_perturbation
+        masque_pertu = np.zeros((e.Ny, e.Nx), dtype=np.bool_)
+        masque_pertu[e.y_perturbation, e.x_perturbation] = True
+
+        contexte = mp.get_context("spawn")  # Même comportement sous Windows et Linux
+        self.barriere_pas = contexte.Barrier(self.n_travailleurs)
+        self.barriere_frame = contexte.Barrier(self.n_travailleurs + 1)
+        scalaires = (e.dx * e.dy, e.T_ambiant, e.aire_sides_up_down, e.aire_sides_left_right, e.aire_top)
+        self.processus = []
+        for i_debut, i_fin in self.bandes:
+            lignes = slice(i_debut, i_fin)
+            bande = tuple(np.ascontiguousarray(c[lignes]) for c in (
+                e.coef_voisins_interieur, e.coef_voisins_bord, e.coef_source, e.coef_convection))
+            sources = (P_tec[lignes].copy(), P_pertu[lignes].copy(), masque_pertu[lignes].copy())
+            p = contexte.Process(
+                target=_travailleur,
+                args=([b.name for b in self.blocs], (e.Ny, e.Nx), e.dtype, i_debut, i_fin, bande, sources,
+                      (e.calendrier_tec, e.calendrier_pertu), scalaires, self.barriere_pas, self.barriere_frame),
+                daemon=True,
+            )
+            p.start()
+            self.processus.append(p)
+
+        self.reinitialiser()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def reinitialiser(self):
+        """Remet la plaque à t=0 (seulement avant le premier pas : les processus comptent les pas depuis le départ)."""
+        self.engine.reinitialiser()
+        for champ in self.champs:
+            champ[:] = self.engine.state["T"]
+        self._exposer_champ()
+
+    def _exposer_champ(self):
+        e = self.engine
+        e.state["T"] = self.champs[e.state["simulation_steps"] % 2]
+        e.state["T_new"] = self.champs[1 - e.state["simulation_steps"] % 2]
+
+    def _avancer_pas(self, n_pas):
+        """Fait avancer toutes les bandes de n_pas pas et met à jour l'état on/off du moteur."""
+        e = self.engine
+        debut = e.state["simulation_steps"]
+        self.commande[:] = (n_pas, 0)
+        self.barriere_frame.wait()  # Départ
+        self.barriere_frame.wait()  # Toutes les bandes ont fini
+        pas = slice(debut, debut + n_pas)
+        e.power_enabled = (e.power_enabled + int(e.calendrier_tec[pas].sum())) % 2
+        e.perturbation_state = (e.perturbation_state + int(e.calendrier_pertu[pas].sum())) % 2
+        e.state["simulation_steps"] = debut + n_pas
+        self._exposer_champ()
+
+    def avancer_frame(self):
+        """Avance d'une frame, comme ThermalEngine.avancer_frame. Retourne True lorsque la durée est atteinte."""
+        e = self.engine
+        sondes = e.sondes
+        fin_frame = e.state["simulation_steps"] + e.steps_per_frame
+        fini = False
+        while e.state["simulation_steps"] < fin_frame:
+            sim_steps = e.state["simulation_steps"]
+            # Lecture des sondes dans l'état au début du pas, puis vérifie si on a atteint la fin
+            fini = sim_steps >= e.n_pas_fin
+            if sim_steps % sondes.pas == 0 or fini:
+                sondes.n_echantillons = echantillonner_sondes(
+                    e.state["T"], sim_steps, e.dt, sondes.indices_i, sondes.indices_j, sondes.poids,
+                    sondes.valeurs, sondes.temps, sondes.n_echantillons)
+            if fini:
+                break
+            prochain = min(fin_frame, (sim_steps // sondes.pas + 1) * sondes.pas, e.n_pas_fin)
+            self._avancer_pas(prochain - sim_steps)
+        e._enregistrer_thermistances(e.state["T"])
+        return fini
+
+    def executer(self):
+        """Exécute toute la simulation jusqu'à sim_duration."""
+        while not self.avancer_frame():
+            pass
+
+    def fermer(self):
+        """Arrête les processus de travail et libère la mémoire partagée (le champ est copié dans le moteur)."""
+        if not self.processus:
+            return
+        e = self.engine
+        e.state["T"] = e.state["T"].copy()
+        e.state["T_new"] = e.state["T_new"].copy()
+        self.commande[:] = (0, 1)
+        try:
+            self.barriere_frame.wait(timeout=10)
+        except Exception:
+            pass  # Un travailleur a échoué : la barrière est déjà rompue
+        for p in self.processus:
+            p.join(timeout=10)
+            if p.is_alive():
+                p.terminate()
+        self.processus = []
+        del self.champs, self.commande
+        for bloc in self.blocs:
+            bloc.close()
+            bloc.unlink()
+
+
+def rapport_scaling(params, liste_travailleurs, n_pas):
+    """
+    Chronomètre n_pas pas pour chaque nombre de travailleurs (après un pas de mise en route) et
+    le noyau précalculé d'un seul processus comme référence. Retourne [(travailleurs, durée en s)],
+    avec 0 travailleur pour la référence.
+    """
+    reference = ThermalEngine(params=copy.deepcopy(params))
+    reference._appel_fusionne(1)
+    debut = time.perf_counter()
+    reference._appel_fusionne(n_pas)
+    resultats = [(0, time.perf_counter() - debut)]
+    for n in liste_travailleurs:
+        with PlaqueDecomposee(params=copy.deepcopy(params), n_travailleurs=n) as plaque:
+            plaque._avancer_pas(1)
+            debut = time.perf_counter()
+            plaque._avancer_pas(n_pas)
+            resultats.append((n, time.perf_counter() - debut))
+    return resultats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation d'une grande plaque répartie en bandes sur plusieurs processus.")
+    parser.add_argument("parametres", help="Fichier JSON de paramètres")
+    parser.add_argument("sortie", nargs="?", help="Fichier CSV des traces T1/T2/T3 (simulation complète)")
+    parser.add_argument("--travailleurs", type=int, default=None, help="Nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument("--res", type=int, default=None, help="Remplace res_spatiale du JSON")
+    parser.add_argument("--scaling", type=int, nargs="+", default=None,
+                        help="Rapport d'accélération pour ces nombres de travailleurs au lieu d'une simulation")
+    parser.add_argument("--pas", type=int, default=100, help="Nombre de pas chronométrés par le rapport")
+    args = parser.parse_args(argv)
+
+    with open(args.parametres, "r") as f:
+        params = json.load(f)
+    if args.res:
+        params["simulation_parameters"]["res_spatiale"] = args.res
+
+    if args.scaling:
+        resultats = rapport_scaling(params, args.scaling, args.pas)
+        reference = resultats[0][1]
+        un = dict(resultats).get(1)
+        print(f"{'travailleurs':>12} {'durée (s)':>10} {'pas/s':>8} {'vs 1 proc. Numba':>17} {'vs 1 travailleur':>17}")
+        for n, duree in resultats:
+            nom = "réf." if n == 0 else str(n)
+            vs_un = f"x{un / duree:.2f}" if un else "-"
+            print(f"{nom:>12} {duree:10.3f} {args.pas / duree:8.1f} {f'x{reference / duree:.2f}':>17} {vs_un:>17}")
+        print(f"({os.cpu_count()} cœurs disponibles ; réf. : noyau multi-pas de ThermalEngine, tous les fils Numba)")
+        return
+
+    if not args.sortie:
+        parser.error("le fichier de sortie est requis pour une simulation")
+    with PlaqueDecomposee(params=params, n_travailleurs=args.travailleurs) as plaque:
+        debut = time.perf_counter()
+        plaque.executer()
+        duree = time.perf_counter() - debut
+        print(f"{plaque.engine.state['simulation_steps']} pas simulés en {duree:.2f} s "
+              f"({plaque.n_travailleurs} travailleurs, bandes de {plaque.engine.Ny // plaque.n_travailleurs} lignes)")
+    plaque.engine.ecrire_csv(args.sortie)
+    print(f"Fichier sauvegardé: {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Intégrateur exponentiel pour le solveur "expo" de ThermalEngine.
+
+Entre deux bascules du TEC ou de la perturbation, la plaque obéit à dT/dt = A T + b avec A et b
+constants. La solution exacte est
+    T(t + tau) = T_eq + exp(tau A) (T(t) - T_eq),   avec A T_eq = -b.
+T_eq vient d'une résolution creuse (même factorisation que steady_state.py) et l'action
+exp(tau A) v est calculée dans un sous-espace de Krylov (méthode d'Arnoldi avec contrôle d'erreur
+et sous-pas adaptatifs, à la manière d'Expokit). On saute ainsi directement d'un événement au
+suivant, les instants d'échantillonnage étant ajoutés comme cibles intermédiaires.
+"""
+
+import math
+
+import numpy as np
+from scipy.linalg import expm
+from scipy.sparse.linalg import splu
+
+from steady_state import assembler_operateur
+
+
+def expv(t, A, v, m=30, tol=1e-8, norme_A=None):
+    """
+    Retourne exp(t A) v par projection de Krylov de dimension m (Sidje, Expokit), avec sous-pas
+    choisis pour que l'erreur locale estimée reste sous tol par unité de temps.
+    """
+    n = v.shape[0]
+    m = min(m, n)
+    norme_A = norme_A if norme_A is not None else abs(A).sum(axis=1).max()
+    w = v.copy()
+    beta = np.linalg.norm(w)
+    if beta == 0.0 or t == 0.0:
+        return w
+
+    tolerance_rupture = 1e-7
+    gamma, delta = 0.9, 1.2
+    xm = 1.0 / m
+    facteur = (((m + 1) / math.e) ** (m + 1)) * math.sqrt(2 * math.pi * (m + 1))
+    t_nouveau = (1.0 / norme_A) * ((facteur * tol) / (4.0 * beta * norme_A)) ** xm
+    t_fait = 0.0
+
+    while t_fait < t:
+        t_pas = min(t - t_fait, t_nouveau)
+        V = np.zeros((n, m + 1), order='F')
+        H = np.zeros((m + 2, m + 2))
+        V[:, 0] = w / beta
+
+        # Arnoldi
+        mb = m
+        rupture = False
+        for j in range(m):
+            p = A @ V[:, j]
+            # Gram-Schmidt classique appliqué deux fois (stable et vectorisé)
+            h = V[:, :j + 1].T @ p
+            p -= V[:, :j + 1] @ h
+            correction = V[:, :j + 1].T @ p
+            p -= V[:, :j + 1] @ correction
+            H[:j + 1, j] = h + correction
+            s = np.linalg.norm(p)
+            if s < tolerance_rupture:
+                # Rupture heureuse : le sous-espace est invariant, le pas peut aller jusqu'au bout
+                rupture = True
+                mb = j + 1
+                t_pas = t - t_fait
+                break
+            H[j + 1, j] = s
+            V[:, j + 1] = p / s
+
+        if not rupture:
+            H[m + 1, m] = 1.0
+            norme_av = np.linalg.norm(A @ V[:, m])
+
+        # Contrôle de l'erreur locale, réduction du pas si nécessaire
+        while True:
+            if rupture:
+                F = expm(t_pas * H[:mb, :mb])
+                erreur = tolerance_rupture
+                break
+            F = expm(t_pas * H[:m + 2, :m + 2])
+            phi1 = abs(beta * F[m, 0])
+            phi2 = abs(beta * F[m + 1, 0] * norme_av)
+            if phi1 > 10 * phi2:
+                erreur, xm = phi2, 1.0 / m
+            elif phi1 > phi2:
+                erreur, xm = (phi1 * phi2) / (phi1 - phi2), 1.0 / m
+            else:
+                erreur, xm = phi1, 1.0 / (m - 1)
+            if erreur <= delta * t_pas * tol:
+                break
+            t_pas = gamma * t_pas * (t_pas * tol / erreur) ** xm
+
+        mx = mb if rupture else m + 1
+        w = V[:, :mx] @ (beta * F[:mx, 0])
+        beta = np.linalg.norm(w)
+        t_fait += t_pas
+        if beta == 0.0:
+            break
+        t_nouveau = gamma * t_pas * (t_pas * tol / max(erreur, 1e-300)) ** xm
+
+    return w
+
+
+class ExponentialIntegrator:
+    """Saute d'un instant à l'autre avec la solution exacte du système linéaire de la plaque."""
+
+    def __init__(self, engine, m=30, tol=1e-8):
+        self.engine = engine
+        self.m = m
+        self.tol = tol
+        A, self.indices = assembler_operateur(engine)
+        self.lu = splu(A)
+        self.A = A.tocsr()  # Format plus rapide pour les produits matrice-vecteur d'Arnoldi
+        self.norme_A = abs(self.A).sum(axis=1).max()
+        self._equilibres = {}
+
+    def equilibre(self, T_ambiant):
+        """Champ d'équilibre (cellules actives) pour les sources actuelles, gardé en mémoire par champ de sources."""
+        e = self.engine
+        cle = (hash(e.P_perm.tobytes()), hash(e.P_mouse.tobytes()), T_ambiant)
+        if cle not in self._equilibres:
+            Ny, Nx = e.Ny, e.Nx
+            b = e.taux_source * (e.P_perm + e.P_mouse) + e.taux_convection * T_ambiant
+            self._equilibres[cle] = self.lu.solve(-b[1:Ny-1, 1:Nx-1].ravel())
+        return self._equilibres[cle]
+
+    def avancer(self, T, duree, T_ambiant):
+        """Avance le champ T (Ny, Nx) de duree secondes, sources constantes ; le pourtour n'est pas modifié."""
+        if duree <= 0:
+            return T
+        Ny, Nx = T.shape
+        T_eq = self.equilibre(T_ambiant)
+        ecart = T[1:Ny-1, 1:Nx-1].ravel() - T_eq
+        tol = self.tol * max(1.0, np.abs(ecart).max())
+        T_actif = T_eq + expv(duree, self.A, ecart, self.m, tol, self.norme_A)
+        T_suivant = T.copy()
+        T_suivant[1:Ny-1, 1:Nx-1] = T_actif.reshape(Ny - 2, Nx - 2)
+        return T_suivant
@@ -0,0 +1,96 @@
+"""
+Maillage cartésien gradué utilisé par ThermalEngine avec l'option "maillage": "raffine".
+
+Le long de chaque axe, les cellules ont la taille fine h dans les zones d'intérêt (empreinte du TEC,
+bande de densité modifiée, thermistances, perturbation) et grossissent d'un facteur `croissance`
+par cellule en s'en éloignant, jusqu'à la taille grossière facteur * h. Les zones fines sont
+alignées sur un réseau de pas h passant par un point d'ancrage : on place ainsi des arêtes
+exactement où on le veut (par exemple aux limites de la bande défectueuse).
+"""
+
+import math
+
+import numpy as np
+
+
+def _zones_alignees(zones, L, h, ancre):
+    """Élargit chaque zone (a, b) aux nœuds du réseau ancre + k*h, la coupe à [0, L] et fusionne celles qui se touchent."""
+    alignees = []
+    for a, b in sorted(zones):
+        a = max(0.0, ancre + math.floor((a - ancre) / h + 1e-9) * h)
+        b = min(L, ancre + math.ceil((b - ancre) / h - 1e-9) * h)
+        if b <= a:
+            continue
+        if alignees and a <= alignees[-1][1] + 1e-9 * h:
+            alignees[-1] = (alignees[-1][0], max(alignees[-1][1], b))
+        else:
+            alignees.append((a, b))
+    return alignees
+
+
+def _cellules_zone(a, b, h, ancre):
+    """Largeurs des cellules d'une zone fine : les nœuds du réseau compris dans [a, b], plus ses extrémités."""
+    k_min = math.ceil((a - ancre) / h - 1e-9)
+    k_max = math.floor((b - ancre) / h + 1e-9)
+    noeuds = [ancre + k * h for k in range(k_min, k_max + 1)]
+    points = [a] + [x for x in noeuds if a + 1e-9 * h < x < b - 1e-9 * h] + [b]
+    return list(np.diff(points))
+
+
+def _cellules_intervalle(a, b, h, h_max, croissance, fin_gauche, fin_droite):
+    """
+    Remplit [a, b] de cellules dont la taille vaut h contre une zone fine et croît de `croissance`
+    par cellule en s'en éloignant, sans dépasser h_max. Les largeurs sont ensuite mises à l'échelle
+    pour couvrir exactement l'intervalle.
+    """
+    def taille(x):
+        distances = [x - a] * fin_gauche + [b - x] * fin_droite
+        if not distances:
+            return h_max
+        return min(h_max, h + (croissance - 1) * min(distances))
+
+    largeurs = []
+    x = a
+    while x < b - 1e-9 * h:
+        w = taille(x)
+        for _ in range(3):
+            # La cellule ne doit pas dépasser la taille permise à son autre extrémité
+            w = min(w, taille(min(x + w, b)))
+        largeurs.append(w)
+        x += w
+    # La dernière cellule déborde : on l'enlève et on agrandit les autres, pour ne jamais descendre
+    # sous la taille fine (qui fixe le pas de temps explicite)
+    if len(largeurs) > 1 and sum(largeurs) > b - a:
+        largeurs.pop()
+    return [w * (b - a) / sum(largeurs) for w in largeurs]
+
+
+def largeurs_graduees(L, h, facteur, croissance, zones, ancre):
+    """
+    Retourne les largeurs (m) des cellules couvrant [0, L] : taille h dans les zones fines (liste de
+    (début, fin) en mètres), croissance géométrique jusqu'à facteur * h ailleurs.
+    Les cellules plus étroites que h (coupes au bord de la plaque) sont fusionnées avec leur voisine.
+    """
+    h_max = facteur * h
+    zones = _zones_alignees(zones, L, h, ancre)
+
+    largeurs = []
+    debut = 0.0
+    for a, b in zones + [(L, L)]:
+        if a > debut + 1e-9 * h:
+            largeurs += _cellules_intervalle(debut, a, h, h_max, croissance,
+                                             fin_gauche=debut > 0.0, fin_droite=a < L)
+        if b > a:
+            largeurs += _cellules_zone(a, b, h, ancre)
+        debut = b
+
+    # Fusion des cellules trop étroites, qui limiteraient inutilement le pas de temps explicite
+    i = 0
+    while i < len(largeurs) and len(largeurs) > 1:
+        if largeurs[i] < h * (1 - 1e-6):
+            voisin = i - 1 if i == len(largeurs) - 1 or (i > 0 and largeurs[i - 1] < largeurs[i + 1]) else i + 1
+            largeurs[voisin] += largeurs.pop(i)
+            i = max(i - 1, 0)
+        else:
+            i += 1
+    return np.array(largeurs)
@@ -0,0 +1,282 @@
+"""
+Banc d'essai des noyaux de calcul : mesure si une modification de _update_temperature (ou des noyaux
+voisins) accélère ou ralentit le calcul.
+
+Chaque noyau est chronométré sur une matrice de conditions : taille de grille (cellules sur le petit
+côté, comme res_spatiale), nombre de fils Numba, précision et variante de noyau. Pour chaque cas :
+    - latence d'un pas (médiane de plusieurs répétitions, en µs) ;
+    - débit en millions de mises à jour de cellule par seconde (Mcell/s) ;
+    - efficacité parallèle : débit à n fils / (n x débit à 1 fil) ;
+    - temps de compilation de la configuration, mesuré dans un processus neuf avec un cache Numba vide.
+
+Les résultats sont écrits en JSON (--sortie) et servent de référence pour une mesure ultérieure
+(--reference) : un cas dont le débit baisse de plus de --seuil est signalé comme régression, et le
+script se termine alors avec le code 1.
+
+Exemple :
+    python kernel_benchmark.py --sortie reference.json
+    python kernel_benchmark.py --reference reference.json --seuil 0.1
+    python kernel_benchmark.py --tailles 25 100 400 1600 3200 --fils 1 2 4 8 --variantes precalcule multi-pas
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numba
+import numpy as np
+
+from thermal_engine import ThermalEngine
+
+# Variante : (options ajoutées à simulation_parameters, façon d'avancer)
+# "pas" : un appel Python par pas (_pas_temperature) ; "multi-pas" : n pas dans un seul appel compilé
+VARIANTES = {
+    "original": ({"noyau": "original"}, "pas"),
+    "precalcule": ({}, "pas"),
+    "multi-pas": ({}, "multi-pas"),
+    "adi": ({"solveur": "adi"}, "pas"),
+}
+
+TAILLES_DEFAUT = [25, 50, 100, 200, 400, 800, 1600]
+PRECISIONS = ["float64", "float32"]
+
+
+def _fils_defaut():
+    """1, puis les puissances de 2 jusqu'au nombre de fils Numba disponibles (inclus)."""
+    fils, n = [1], 2
+    while n < numba.config.NUMBA_NUM_THREADS:
+        fils.append(n)
+        n *= 2
+    if numba.config.NUMBA_NUM_THREADS > 1:
+        fils.append(numba.config.NUMBA_NUM_THREADS)
+    return fils
+
+
+def _params_cas(params, variante, taille, precision):
+    p = copy.deepcopy(params)
+    p["simulation_parameters"].update(VARIANTES[variante][0], res_spatiale=taille, precision=precision)
+    return p
+
+
+def _construire(params):
+    """Construit un moteur sans ses messages et le prépare pour un nombre de pas illimité."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = ThermalEngine(params=params)
+    engine.steps_total = float("inf")  # Le noyau multi-pas ne s'arrête jamais de lui-même
+    engine.power_enabled = 1
+    engine._mettre_a_jour_sources()
+    return engine
+
+
+def _fonction_avance(engine, mode):
+    """Retourne avancer(n_pas) qui fait n_pas pas sur l'état du moteur."""
+    if mode == "multi-pas":
+        def avancer(n_pas):
+            T, T_new, sim_steps, *_ = engine._appel_fusionne(n_pas)
+            engine.state.update(T=T, T_new=T_new, simulation_steps=sim_steps)
+    else:
+        def avancer(n_pas):
+            T, T_new = engine.state["T"], engine.state["T_new"]
+            for _ in range(n_pas):
+                T_new = engine._pas_temperature(T, T_new, engine.T_ambiant)
+                T, T_new = T_new, T
+            engine.state.update(T=T, T_new=T_new)
+    return avancer
+
+
+def chronometrer(avancer, duree_cible=0.2, repetitions=5):
+    """
+    Retourne la durée médiane d'un pas (s). Le nombre de pas par répétition est choisi pour que
+    chaque répétition dure environ duree_cible / repetitions.
+    """
+    avancer(2)  # Mise en route (caches, fils Numba)
+    debut = time.perf_counter()
+    avancer(1)
+    un_pas = max(time.perf_counter() - debut, 1e-7)
+    n_pas = int(min(max(duree_cible / repetitions / un_pas, 1), 100000))
+    durees = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        avancer(n_pas)
+        durees.append(time.perf_counter() - debut)
+    return float(np.median(durees)) / n_pas
+
+
+def _compiler(params, file):
+    """Dans un processus neuf (cache Numba vide) : durée de la première construction moins celle de la deuxième."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        debut = time.perf_counter()
+        ThermalEngine(params=copy.deepcopy(params))
+        premiere = time.perf_counter() - debut
+        debut = time.perf_counter()
+        ThermalEngine(params=copy.deepcopy(params))
+        deuxieme = time.perf_counter() - debut
+    file.put(premiere - deuxieme)
+
+
+def temps_compilation(params):
+    """Temps de compilation (s) des noyaux d'une configuration, sans le cache sur disque."""
+    dossier = tempfile.mkdtemp(prefix="numba_bench_")
+    ancien = os.environ.get("NUMBA_CACHE_DIR")
+    os.environ["NUMBA_CACHE_DIR"] = dossier  # Hérité par le processus lancé (spawn relit l'environnement)
+    try:
+        contexte = multiprocessing.get_context("spawn")
+        file = contexte.Queue()
+        processus = contexte.Process(target=_compiler, args=(params, file))
+        processus.start()
+        duree = file.get()
+        processus.join()
+    finally:
+        if ancien is None:
+            del os.environ["NUMBA_CACHE_DIR"]
+        else:
+            os.environ["NUMBA_CACHE_DIR"] = ancien
+        shutil.rmtree(dossier, ignore_errors=True)
+    return duree
+
+
+def executer_banc(params, variantes, tailles, precisions, liste_fils, duree_cible=0.2, compilation=True):
+    """
+    Chronomètre chaque cas de la matrice. Retourne une liste de dictionnaires : variante, taille,
+    cellules, precision, fils, latence_us, mcell_s, efficacite (None sans mesure à 1 fil), compilation_s.
+    """
+    fils_initiaux = numba.get_num_threads()
+    resultats = []
+    compilations = {}  # Les variantes de mêmes options (precalcule, multi-pas) compilent les mêmes noyaux
+    for variante in variantes:
+        options, mode = VARIANTES[variante]
+        for precision in precisions:
+            # La compilation ne dépend que des types (options, précision), pas de la taille
+            cle_compilation = (json.dumps(options, sort_keys=True), precision)
+            if compilation and cle_compilation not in compilations:
+                compilations[cle_compilation] = temps_compilation(_params_cas(params, variante, tailles[0], precision))
+            compile_s = compilations.get(cle_compilation)
+            for taille in tailles:
+                engine = _construire(_params_cas(params, variante, taille, precision))
+                avancer = _fonction_avance(engine, mode)
+                cellules = engine.Ny * engine.Nx
+                debit_un_fil = None
+                for fils in liste_fils:
+                    numba.set_num_threads(fils)
+                    pas = chronometrer(avancer, duree_cible)
+                    debit = cellules / pas / 1e6
+                    if fils == 1:
+                        debit_un_fil = debit
+                    resultats.append({
+                        "variante": variante, "taille": taille, "cellules": cellules, "precision": precision,
+                        "fils": fils, "latence_us": pas * 1e6, "mcell_s": debit,
+                        "efficacite": debit / (fils * debit_un_fil) if debit_un_fil else None,
+                        "compilation_s": compile_s,
+                    })
+                    print(_ligne(resultats[-1]), flush=True)
+                del engine, avancer  # Libère les grandes grilles avant la suivante
+    numba.set_num_threads(fils_initiaux)
+    return resultats
+
+
+def _cle(resultat):
+    return resultat["variante"], resultat["taille"], resultat["precision"], resultat["fils"]
+
+
+def comparer(resultats, reference, seuil):
+    """
+    Compare le débit de chaque cas à la référence. Retourne {clé: (rapport, verdict)} avec verdict
+    "régression", "amélioration" ou "" selon que le rapport sort de [1 - seuil, 1 + seuil].
+    """
+    debits_reference = {_cle(r): r["mcell_s"] for r in reference["resultats"]}
+    comparaison = {}
+    for r in resultats:
+        ref = debits_reference.get(_cle(r))
+        if ref:
+            rapport = r["mcell_s"] / ref
+            verdict = "régression" if rapport < 1 - seuil else "amélioration" if rapport > 1 + seuil else ""
+            comparaison[_cle(r)] = (rapport, verdict)
+    return comparaison
+
+
+def machine():
+    """Description de la machine et des versions, gardée avec les résultats."""
+    return {
+        "processeur": platform.processor() or platform.machine(),
+        "systeme": platform.platform(),
+        "coeurs": os.cpu_count(),
+        "fils_numba": numba.config.NUMBA_NUM_THREADS,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "numba": numba.__version__,
+    }
+
+
+ENTETE = (f"{'variante':>11} {'taille':>6} {'cellules':>10} {'précision':>9} {'fils':>4} "
+          f"{'latence (µs)':>13} {'Mcell/s':>9} {'efficacité':>10} {'compil. (s)':>11}")
+
+
+def _ligne(r, comparaison=None):
+    efficacite = f"{r['efficacite']:.2f}" if r["efficacite"] is not None else "-"
+    compile_s = f"{r['compilation_s']:.2f}" if r["compilation_s"] is not None else "-"
+    ligne = (f"{r['variante']:>11} {r['taille']:6d} {r['cellules']:10d} {r['precision']:>9} {r['fils']:4d} "
+             f"{r['latence_us']:13.1f} {r['mcell_s']:9.1f} {efficacite:>10} {compile_s:>11}")
+    if comparaison is not None and _cle(r) in comparaison:
+        rapport, verdict = comparaison[_cle(r)]
+        ligne += f"  x{rapport:.2f} {verdict}"
+    return ligne
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chronomètre les noyaux de la simulation sur une matrice de conditions.")
+    parser.add_argument("parametres", nargs="?", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "parametres.json"),
+                        help="Fichier JSON de référence (défaut : parametres.json à côté du script)")
+    parser.add_argument("--tailles", type=int, nargs="+", default=TAILLES_DEFAUT, help="Cellules sur le petit côté")
+    parser.add_argument("--fils", type=int, nargs="+", default=None, help="Nombres de fils Numba (défaut : 1, 2, 4... jusqu'au maximum)")
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=PRECISIONS)
+    parser.add_argument("--variantes", nargs="+", choices=list(VARIANTES), default=list(VARIANTES))
+    parser.add_argument("--duree", type=float, default=0.2, help="Durée chronométrée par cas (s)")
+    parser.add_argument("--sans-compilation", action="store_true", help="Ne mesure pas le temps de compilation")
+    parser.add_argument("--sortie", default=None, help="Fichier JSON où écrire les résultats (nouvelle référence)")
+    parser.add_argument("--reference", default=None, help="Fichier JSON d'une mesure précédente à comparer")
+    parser.add_argument("--seuil", type=float, default=0.1, help="Baisse relative du débit signalée comme régression")
+    args = parser.parse_args(argv)
+
+    with open(args.parametres, "r") as f:
+        params = json.load(f)
+    liste_fils = args.fils or _fils_defaut()
+    trop = [n for n in liste_fils if n > numba.config.NUMBA_NUM_THREADS]
+    if trop:
+        parser.error(f"Au plus {numba.config.NUMBA_NUM_THREADS} fils Numba sur cette machine, reçu : {trop}")
+
+    print(ENTETE)
+    resultats = executer_banc(params, args.variantes, args.tailles, args.precisions, liste_fils,
+                              args.duree, not args.sans_compilation)
+
+    if args.sortie:
+        with open(args.sortie, "w") as f:
+            json.dump({"date": time.strftime("%Y-%m-%d %H:%M:%S"), "machine": machine(), "resultats": resultats}, f, indent=4)
+        print(f"Fichier sauvegardé: {args.sortie}")
+
+    if args.reference:
+        with open(args.reference, "r") as f:
+            reference = json.load(f)
+        if reference.get("machine") != machine():
+            print("Attention : la référence a été mesurée sur une autre machine ou avec d'autres versions")
+        comparaison = comparer(resultats, reference, args.seuil)
+        print(f"\nComparaison avec {args.reference} ({reference.get('date', '?')}), seuil {args.seuil:.0%} :")
+        print(ENTETE + "  vs réf.")
+        for r in resultats:
+            print(_ligne(r, comparaison))
+        regressions = [cle for cle, (_, verdict) in comparaison.items() if verdict == "régression"]
+        print(f"{len(comparaison)} cas comparés, {len(regressions)} régression(s)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
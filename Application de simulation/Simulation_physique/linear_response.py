@@ -0,0 +1,182 @@
+"""
+Moteur de réponse linéaire : traces des thermistances par superposition de réponses indicielles.
+
+Pour une géométrie et un matériau fixés, le modèle discret de la plaque est linéaire en la puissance
+des sources. Une trace s'écrit donc
+    T(n) = T_libre(n) + P_tec * somme_k d_k * S_tec(n - s_k) + P_pertu * somme_k d_k * S_pertu(n - s_k)
+où T_libre est le refroidissement sans source, S_tec et S_pertu les réponses à un échelon de 1 W
+(une par source), s_k les pas de bascule et d_k = +1 (allumage) ou -1 (extinction).
+
+Les trois réponses sont calculées une seule fois par géométrie, pas par pas, avec le noyau du moteur,
+puis gardées dans un cache sur disque. N'importe quel calendrier on/off, courant ou couplage
+ne coûte ensuite qu'une convolution vectorisée.
+
+Exemple :
+    python linear_response.py parametres.json resultats.csv
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from ToggleManager import ToggleManager
+from thermal_engine import ThermalEngine
+
+# À incrémenter si le modèle physique du moteur change, pour invalider les réponses en cache
+VERSION_MODELE = 1
+
+
+def cle_geometrie(params):
+    """
+    Empreinte des paramètres qui déterminent les réponses indicielles (tout sauf le courant,
+    le couplage, la puissance de la perturbation, les calendriers et la durée).
+    """
+    geometrie = copy.deepcopy(params)
+    for cle in ("courant", "couplage", "TEC_momment_inversion"):
+        geometrie["TEC"].pop(cle, None)
+    for cle in ("power", "PERTU_momment_inversion"):
+        geometrie["perturbation_properties"].pop(cle, None)
+    for cle in ("sim_duration", "res_temporelle", "arret_stationnaire", "bande_stabilisation"):
+        geometrie["simulation_parameters"].pop(cle, None)
+    geometrie["version_modele"] = VERSION_MODELE
+    texte = json.dumps(geometrie, sort_keys=True)
+    return hashlib.sha256(texte.encode("utf-8")).hexdigest()[:16]
+
+
+def champs_unitaires(engine):
+    """Champs de puissance volumique d'un watt au TEC et à la perturbation, construits comme ThermalEngine._mettre_a_jour_sources."""
+    e = engine
+    P_tec = np.zeros((e.Ny, e.Nx))
+    P_tec[e.yl_start:e.yl_end, e.xl_start:e.xl_end] = 1.0 / e.surface_source
+    P_tec[e.y_perturbation, e.x_perturbation] = 0.0
+    P_pertu = np.zeros((e.Ny, e.Nx))
+    P_pertu[e.y_perturbation, e.x_perturbation] = 1.0 / e.volume_perturbation
+    return P_tec, P_pertu
+
+
+class LinearResponseEngine:
+    """Produit les traces T1/T2/T3 de n'importe quel calendrier à partir des réponses indicielles en cache."""
+
+    def __init__(self, param_file_path="parametres.json", params=None, dossier_cache="cache_reponses"):
+        if params is None:
+            with open(param_file_path, "r") as f:
+                params = json.load(f)
+        self.params = params
+        self.engine = ThermalEngine(params=copy.deepcopy(params))
+        self.dt = self.engine.dt
+        self.steps_per_frame = self.engine.steps_per_frame
+        self.dossier_cache = dossier_cache
+        self.cle = cle_geometrie(params)
+        self.reponses = None
+
+    def _n_pas_fin(self, duree):
+        """Nombre de pas simulés par le moteur pour une durée donnée (premier n tel que n*dt > durée)."""
+        n_pas = int(duree / self.dt)
+        while n_pas * self.dt <= duree:
+            n_pas += 1
+        return n_pas
+
+    def _chemin_cache(self):
+        return os.path.join(self.dossier_cache, f"reponses_{self.cle}.npz")
+
+    def _charger_reponses(self, n_pas):
+        """Charge les réponses du cache si elles couvrent n_pas pas, sinon les calcule et les sauvegarde."""
+        if self.reponses is not None and self.reponses["libre"].shape[0] > n_pas:
+            return
+        chemin = self._chemin_cache()
+        if os.path.exists(chemin):
+            with np.load(chemin) as donnees:
+                if donnees["libre"].shape[0] > n_pas and float(donnees["dt"]) == self.dt:
+                    self.reponses = {cle: donnees[cle] for cle in ("libre", "tec", "pertu")}
+                    return
+        debut = time.perf_counter()
+        self.reponses = self._calculer_reponses(n_pas)
+        print(f"Réponses indicielles calculées en {time.perf_counter() - debut:.1f} s ({n_pas} pas)")
+        os.makedirs(self.dossier_cache, exist_ok=True)
+        np.savez(chemin, dt=self.dt, **self.reponses)
+
+    def _calculer_reponses(self, n_pas):
+        """Simule les trois réponses de base (libre, échelon TEC de 1 W, échelon perturbation de 1 W)."""
+        e = self.engine
+        P_tec, P_pertu = champs_unitaires(e)
+
+        reponses = {}
+        for nom, P, T_depart, T_ambiant in (("libre", np.zeros((e.Ny, e.Nx)), e.T_piece, e.T_ambiant),
+                                            ("tec", P_tec, 0.0, 0.0),
+                                            ("pertu", P_pertu, 0.0, 0.0)):
+            e.P_perm = P
+            T = np.full((e.Ny, e.Nx), T_depart, dtype=np.float64)
+            T_new = T.copy()
+            lectures = np.empty((n_pas + 1, len(e.thermistances_pos)))
+            for n in range(n_pas + 1):
+                lectures[n] = [T[pos] for pos in e.thermistances_pos]
+                if n == n_pas:
+                    break
+                T_new = e._pas_temperature(T, T_new, T_ambiant)
+                T, T_new = T_new, T  # Échange des buffers
+            reponses[nom] = lectures
+        return reponses
+
+    def _superposer(self, n_sortie, reponse, inversions):
+        """Somme des réponses décalées aux pas de bascule, avec +1 à l'allumage et -1 à l'extinction."""
+        resultat = np.zeros((len(n_sortie), reponse.shape[1]))
+        signe = 1.0
+        for pas in sorted(set(ToggleManager(inversions, self.dt).toggle_steps)):
+            decalage = n_sortie - pas
+            actif = decalage > 0
+            resultat[actif] += signe * reponse[decalage[actif]]
+            signe = -signe
+        return resultat
+
+    def traces(self, TEC_momment_inversion=None, courant=None, couplage=None,
+               PERTU_momment_inversion=None, puissance_pertu=None, duree=None):
+        """
+        Retourne les colonnes temps, T1, T2, T3 (même échantillonnage et format que ThermalEngine.historique)
+        pour le calendrier et les puissances donnés ; les valeurs absentes sont prises dans le JSON.
+        """
+        p = self.params
+        TEC_momment_inversion = p["TEC"]["TEC_momment_inversion"] if TEC_momment_inversion is None else TEC_momment_inversion
+        courant = p["TEC"]["courant"] if courant is None else courant
+        couplage = p["TEC"]["couplage"] if couplage is None else couplage
+        PERTU_momment_inversion = (p["perturbation_properties"]["PERTU_momment_inversion"]
+                                   if PERTU_momment_inversion is None else PERTU_momment_inversion)
+        puissance_pertu = p["perturbation_properties"]["power"] if puissance_pertu is None else puissance_pertu
+        duree = p["simulation_parameters"]["sim_duration"] if duree is None else duree
+
+        # Pas d'échantillonnage du moteur : une lecture par frame, plus la lecture finale
+        n_fin = self._n_pas_fin(duree)
+        n_sortie = np.append(np.arange(self.steps_per_frame, n_fin + 1, self.steps_per_frame), n_fin)
+        self._charger_reponses(n_fin)
+
+        puissance_tec = couplage * (0.3123 * (courant ** 2) + 1.0217 * courant)
+        T = (self.reponses["libre"][n_sortie]
+             + puissance_tec * self._superposer(n_sortie, self.reponses["tec"], TEC_momment_inversion)
+             + puissance_pertu * self._superposer(n_sortie, self.reponses["pertu"], PERTU_momment_inversion))
+
+        time_values = np.arange(len(n_sortie)) * self.dt * self.steps_per_frame
+        return np.column_stack((time_values, T))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Traces des thermistances par superposition de réponses indicielles.")
+    parser.add_argument("parametres", help="Fichier JSON de paramètres")
+    parser.add_argument("sortie", help="Fichier CSV des traces (même format que simulation_headless.py)")
+    parser.add_argument("--cache", default="cache_reponses", help="Dossier du cache des réponses indicielles")
+    args = parser.parse_args(argv)
+
+    moteur = LinearResponseEngine(args.parametres, dossier_cache=args.cache)
+    debut = time.perf_counter()
+    historique = moteur.traces()
+    print(f"Traces calculées en {(time.perf_counter() - debut) * 1e3:.1f} ms")
+
+    np.savetxt(args.sortie, historique, delimiter=',', header='Time (s), T1, T2, T3', comments='', fmt='%.4f')
+    print(f"Fichier sauvegardé: {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
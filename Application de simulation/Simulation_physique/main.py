@@ -1,11 +1,28 @@
+import os
+import sys
+
+# Exécutable (SimulationPhysique.spec) : le cache des noyaux Numba va dans un dossier utilisateur
+# persistant, le dossier d'installation n'étant pas forcément accessible en écriture.
+# (À faire avant le premier import de numba.)
+if getattr(sys, "frozen", False):
+    os.environ.setdefault(
+        "NUMBA_CACHE_DIR",
+        os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", ".cache")),
+                     "SimulationPhysique", "numba_cache")
+    )
+
+if __name__ == "__main__" and "--precompiler" in sys.argv:
+    # Remplit le cache de compilation sans ouvrir l'interface (à lancer après l'installation)
+    import precompiler
+    precompiler.main([])
+    sys.exit()
+
 import matplotlib
 import matplotlib.pyplot as plt
 matplotlib.use('QtAgg')  # ou 'Qt5Agg', selon la version
 from PySide6.QtWidgets import QApplication
 from PySide6.QtGui import QIcon
 from GUI.MainWindow import MainWindow
-import os
-import sys
 
 # Augmenter la taille globale de la police (par défaut environ 10, ici on passe à 20)
 plt.rcParams.update({'font.size': 20})
@@ -21,8 +38,6 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 if __name__ == "__main__":
-    
-
     app = QApplication([])
 
     icon_path = os.path.abspath("icon.ico")
@@ -0,0 +1,227 @@
+"""
+Identification de paramètres : ajuste des champs de parametres.json pour que les traces T1/T2/T3
+simulées suivent des traces mesurées sur le banc.
+
+Les mesures sont lues dans un CSV au format écrit par l'interface (Time (s), T1, T2, T3). Les résidus
+sont les écarts simulé - mesuré aux temps mesurés (traces simulées interpolées), pour les trois
+thermistances. L'ajustement est un moindres carrés borné (scipy.optimize.least_squares, région de
+confiance) sur des variables normalisées par la valeur de départ. Les colonnes de la jacobienne par
+différences finies sont simulées en parallèle, une par processus du pool. Chaque processus garde
+ses noyaux Numba compilés d'une simulation à l'autre, mais construit un moteur par simulation :
+les paramètres ajustés entrent dans tous les coefficients précalculés du moteur.
+
+Les intervalles de confiance (95 %) viennent de la jacobienne au point ajusté et de la variance
+des résidus : ils supposent un bruit de mesure indépendant et un modèle correct.
+
+Exemple :
+    python parameter_fit.py parametres.json mesures.csv --sortie ajuste.json
+    python parameter_fit.py parametres.json mesures.csv --parametre boundary_conditions.h 5 30 --parametre TEC.couplage 0.2 1.5
+"""
+
+import argparse
+import contextlib
+import copy
+import io
+import json
+import multiprocessing
+import os
+import time
+
+import numba
+import numpy as np
+from scipy.optimize import least_squares
+from scipy.stats import t as loi_student
+
+from parameter_sweep import appliquer_valeur
+from thermal_engine import ThermalEngine
+
+# Paramètres ajustés par défaut : (chemin pointé, borne basse, borne haute)
+PARAMETRES_DEFAUT = [
+    ("boundary_conditions.h", 2.0, 50.0),
+    ("material_properties.k", 50.0, 400.0),
+    ("TEC.couplage", 0.05, 2.0),
+    ("material_properties.diff_de_densite", 0.05, 1.0),
+]
+
+# Valeurs utilisées quand une clé facultative est absente du JSON (mêmes défauts que ThermalEngine)
+VALEURS_DEFAUT = {"material_properties.diff_de_densite": 0.80}
+
+# Contexte gardé dans chaque processus du pool : paramètres de base, chemins ajustés, temps mesurés
+_contexte_processus = None
+
+
+def lire_traces(chemin):
+    """Lit un CSV de traces (Time (s), T1, T2, T3) ; retourne (temps, tableau (n, 3))."""
+    donnees = np.loadtxt(chemin, delimiter=",", skiprows=1, ndmin=2)
+    return donnees[:, 0], donnees[:, 1:4]
+
+
+def lire_valeur(params, chemin):
+    """Retourne la valeur désignée par un chemin pointé, ou sa valeur par défaut si la clé facultative est absente."""
+    section = params
+    for cle in chemin.split("."):
+        if cle not in section:
+            if chemin in VALEURS_DEFAUT:
+                return VALEURS_DEFAUT[chemin]
+            raise KeyError(f"Paramètre inconnu : {chemin}")
+        section = section[cle]
+    return section
+
+
+def _initialiser_processus(params_base, chemins, temps):
+    """Initialise un processus du pool : un fil Numba par processus et compilation des noyaux."""
+    global _contexte_processus
+    # Le parallélisme vient du pool ; on évite la sursouscription des cœurs par les prange
+    numba.set_num_threads(1)
+    _contexte_processus = (params_base, chemins, temps)
+    with contextlib.redirect_stdout(io.StringIO()):
+        ThermalEngine(params=copy.deepcopy(params_base))
+
+
+def _simuler(valeurs):
+    """Simule le cas de base avec les valeurs données et retourne les traces (n, 3) aux temps mesurés."""
+    params_base, chemins, temps = _contexte_processus
+    params = copy.deepcopy(params_base)
+    for chemin, valeur in zip(chemins, valeurs):
+        appliquer_valeur(params, chemin, float(valeur))
+    # Les messages du moteur (dimensions, dt, régime stationnaire) seraient répétés à chaque simulation
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine = ThermalEngine(params=params)
+        # La dernière ligne de l'historique est une frame partielle : pour que des frames complètes
+        # couvrent toutes les mesures, la simulation va une frame au-delà de la dernière. La durée du
+        # JSON est gardée si elle est entre les deux (mêmes instants que l'essai mesuré).
+        fin = temps.max() + engine.dt * engine.steps_per_frame
+        if engine.steps_total < temps.max() or engine.steps_total > fin:
+            engine.definir_duree(fin)
+        engine.executer()
+    historique = engine.historique()
+    return np.column_stack([np.interp(temps, historique[:, 0], historique[:, c]) for c in (1, 2, 3)])
+
+
+class AjustementParametres:
+    """
+    Ajustement borné de quelques paramètres du JSON sur des traces mesurées.
+    Les simulations sont faites par un pool de processus gardé ouvert pendant tout l'ajustement.
+    """
+
+    def __init__(self, params_base, temps, mesures, parametres=PARAMETRES_DEFAUT, processus=None, pas_relatif=1e-3):
+        self.params_base = copy.deepcopy(params_base)
+        self.temps = temps
+        self.mesures = mesures
+        self.chemins = [chemin for chemin, _, _ in parametres]
+        self.bas = np.array([bas for _, bas, _ in parametres], dtype=float)
+        self.haut = np.array([haut for _, _, haut in parametres], dtype=float)
+        self.depart = np.clip([lire_valeur(params_base, chemin) for chemin in self.chemins], self.bas, self.haut)
+        # Variables normalisées : u = x / échelle, de l'ordre de 1 pour tous les paramètres
+        self.echelle = np.where(self.depart != 0, np.abs(self.depart), (self.haut - self.bas) / 2)
+        self.processus = processus or os.cpu_count()
+        self.pas_relatif = pas_relatif
+        self.n_simulations = 0
+        self._dernier = None  # (u, résidus) du dernier point évalué, réutilisé par la jacobienne
+
+    def _residus_de(self, traces):
+        return (traces - self.mesures).ravel()
+
+    def _residus(self, u):
+        if self._dernier is not None and np.array_equal(self._dernier[0], u):
+            return self._dernier[1]
+        traces = self._pool.apply(_simuler, (u * self.echelle,))
+        self.n_simulations += 1
+        residus = self._residus_de(traces)
+        self._dernier = (u.copy(), residus)
+        return residus
+
+    def _jacobienne(self, u):
+        """
+        Différences finies avant, toutes les colonnes simulées en parallèle. Le pas est arrière seulement
+        si le pas avant dépasse la borne haute : près de la borne basse, le pas avant s'en éloigne et reste
+        dans les bornes.
+        """
+        r0 = self._residus(u)
+        pas = self.pas_relatif * np.maximum(np.abs(u), 1.0)
+        pas = np.where(u + pas > self.haut / self.echelle, -pas, pas)
+        points = [u + np.eye(len(u))[i] * pas[i] for i in range(len(u))]
+        colonnes = self._pool.map(_simuler, [p * self.echelle for p in points])
+        self.n_simulations += len(points)
+        return np.column_stack([(self._residus_de(c) - r0) / h for c, h in zip(colonnes, pas)])
+
+    def ajuster(self, evaluations_max=100):
+        """
+        Lance l'ajustement. Retourne un dictionnaire : valeurs de départ et ajustées, demi-largeur de
+        l'intervalle de confiance à 95 %, écart quadratique moyen avant/après (°C), simulations, durée (s).
+        """
+        debut = time.perf_counter()
+        with multiprocessing.Pool(self.processus, initializer=_initialiser_processus,
+                                  initargs=(self.params_base, self.chemins, self.temps)) as self._pool:
+            rms_depart = np.sqrt(np.mean(self._residus(self.depart / self.echelle) ** 2))
+            resultat = least_squares(
+                self._residus, self.depart / self.echelle, jac=self._jacobienne,
+                bounds=(self.bas / self.echelle, self.haut / self.echelle), max_nfev=evaluations_max,
+            )
+
+        # Covariance des paramètres : s² (JᵀJ)⁻¹, ramenée aux unités physiques. Un paramètre qui pèse sur
+        # une direction sans effet sur les traces n'est pas identifiable : intervalle infini.
+        m, n = resultat.fun.size, resultat.x.size
+        variance = 2 * resultat.cost / max(m - n, 1)
+        J = resultat.jac * (1 / self.echelle)
+        _, valeurs_sing, Vt = np.linalg.svd(J, full_matrices=False)
+        nulles = valeurs_sing <= valeurs_sing.max() * max(J.shape) * np.finfo(float).eps
+        covariance = variance * np.linalg.pinv(J.T @ J)
+        demi_largeur = loi_student.ppf(0.975, max(m - n, 1)) * np.sqrt(np.diag(covariance))
+        demi_largeur[(np.abs(Vt[nulles]) > 1e-8).any(axis=0)] = np.inf
+
+        return {
+            "chemins": self.chemins,
+            "depart": self.depart,
+            "ajuste": resultat.x * self.echelle,
+            "ic95": demi_largeur,
+            "bornes": list(zip(self.bas, self.haut)),
+            "rms_depart": rms_depart,
+            "rms_ajuste": np.sqrt(np.mean(resultat.fun ** 2)),
+            "simulations": self.n_simulations,
+            "duree": time.perf_counter() - debut,
+            "message": resultat.message,
+        }
+
+
+def _lire_parametres(liste):
+    """Convertit les options --parametre CHEMIN MIN MAX en [(chemin, min, max)]."""
+    return [(chemin, float(bas), float(haut)) for chemin, bas, haut in liste]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ajuste des paramètres de la plaque sur des traces mesurées.")
+    parser.add_argument("parametres", help="Fichier JSON de départ")
+    parser.add_argument("mesures", help="CSV des traces mesurées (Time (s), T1, T2, T3)")
+    parser.add_argument("--parametre", nargs=3, action="append", metavar=("CHEMIN", "MIN", "MAX"),
+                        help="Paramètre à ajuster et ses bornes (répétable ; défaut : h, k, couplage, diff_de_densite)")
+    parser.add_argument("--processus", type=int, default=None, help="Nombre de processus (défaut : tous les cœurs)")
+    parser.add_argument("--evaluations", type=int, default=100, help="Nombre maximal d'évaluations des résidus")
+    parser.add_argument("--sortie", default=None, help="JSON de paramètres ajustés à écrire")
+    args = parser.parse_args(argv)
+
+    with open(args.parametres, "r") as f:
+        params = json.load(f)
+    temps, mesures = lire_traces(args.mesures)
+    parametres = _lire_parametres(args.parametre) if args.parametre else PARAMETRES_DEFAUT
+
+    ajustement = AjustementParametres(params, temps, mesures, parametres, args.processus)
+    r = ajustement.ajuster(args.evaluations)
+
+    print(r["message"])
+    print(f"{'paramètre':40s} {'départ':>10s} {'ajusté':>10s} {'± IC 95 %':>10s}  bornes")
+    for chemin, depart, valeur, ic, (bas, haut) in zip(r["chemins"], r["depart"], r["ajuste"], r["ic95"], r["bornes"]):
+        print(f"{chemin:40s} {depart:10.4g} {valeur:10.4g} {ic:10.2g}  [{bas:g}, {haut:g}]")
+    print(f"Écart quadratique moyen : {r['rms_depart']:.4f} °C au départ, {r['rms_ajuste']:.4f} °C ajusté")
+    print(f"{r['simulations']} simulations en {r['duree']:.1f} s ({ajustement.processus} processus)")
+
+    if args.sortie:
+        for chemin, valeur in zip(r["chemins"], r["ajuste"]):
+            appliquer_valeur(params, chemin, float(valeur))
+        with open(args.sortie, "w") as f:
+            json.dump(params, f, indent=4)
+        print(f"Fichier sauvegardé: {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
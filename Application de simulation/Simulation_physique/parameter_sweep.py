@@ -0,0 +1,269 @@
+"""
+Balayage de paramètres exécuté en parallèle sur tous les cœurs.
+
+À partir d'un parametres.json de base et d'un fichier d'axes, la grille de scénarios est
+développée (produit cartésien), chaque scénario est simulé par un processus du pool, et les
+traces T1/T2/T3 sont ajoutées au CSV combiné dès qu'un scénario se termine. Un balayage
+interrompu peut être repris : les scénarios déjà terminés ne sont pas recalculés. La reprise est
+refusée si les paramètres de base ou les axes ont changé (ils sont gardés à côté du CSV, dans
+balayage.csv.balayage.json).
+
+Le fichier d'axes associe un chemin pointé dans le JSON à une liste de valeurs, par exemple :
+    {
+        "material_properties.diff_de_densite": [0.05, 0.15, 0.5, 0.8],
+        "boundary_conditions.h": [10.0, 13.3],
+        "TEC.courant": [0.5, 1.0],
+        "TEC.x_source": [0.025, 0.030795]
+    }
+
+Exemple :
+    python parameter_sweep.py parametres.json axes.json balayage.csv --processus 8
+    python parameter_sweep.py parametres.json axes.json balayage.csv --reprendre
+    python parameter_sweep.py parametres_initiaux.json axes.json balayage.csv --lot
+
+Avec --lot, tous les scénarios sont avancés ensemble par BatchThermalEngine dans un seul
+processus : c'est plus rapide pour les petites grilles. Ils doivent avoir la même grille, la même
+durée, le même res_temporelle et la même précision.
+
+Les scénarios déjà simulés (mêmes paramètres, même version du moteur) sont relus dans le cache
+des résultats (result_cache.py), sauf avec --sans-cache. Un lot n'est relu que si tous ses
+scénarios sont en cache : leur pas de temps commun dépend de la composition du lot.
+"""
+
+import argparse
+import copy
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import time
+
+import numba
+
+from batch_engine import BatchThermalEngine
+from result_cache import CacheResultats
+from thermal_engine import ThermalEngine
+
+# Clés facultatives du JSON qui peuvent être balayées même si elles sont absentes du fichier de base
+CLES_FACULTATIVES = {"diff_de_densite", "noyau", "solveur", "dt", "maillage", "precision"}
+
+# Cache des résultats de chaque processus du pool
+_cache_processus = None
+
+
+def appliquer_valeur(params, chemin, valeur):
+    """Remplace la valeur désignée par un chemin pointé ("TEC.courant") dans le dictionnaire de paramètres."""
+    cles = chemin.split(".")
+    section = params
+    for cle in cles[:-1]:
+        section = section[cle]
+    if cles[-1] not in section and cles[-1] not in CLES_FACULTATIVES:
+        raise KeyError(f"Paramètre inconnu dans le balayage : {chemin}")
+    section[cles[-1]] = valeur
+
+
+def developper_grille(params_base, axes):
+    """Retourne la liste des scénarios (indice, valeurs des axes, paramètres complets) du produit cartésien."""
+    noms = list(axes.keys())
+    scenarios = []
+    for indice, valeurs in enumerate(itertools.product(*(axes[nom] for nom in noms))):
+        params = copy.deepcopy(params_base)
+        for nom, valeur in zip(noms, valeurs):
+            appliquer_valeur(params, nom, valeur)
+        scenarios.append((indice, valeurs, params))
+    return scenarios
+
+
+def _initialiser_processus(params_base, cache=None):
+    """Initialise un processus du pool : un fil Numba par processus et compilation des noyaux."""
+    global _cache_processus
+    # Le parallélisme vient du pool ; on évite la sursouscription des cœurs par les prange
+    numba.set_num_threads(1)
+    ThermalEngine(params=copy.deepcopy(params_base))
+    _cache_processus = cache
+
+
+def _executer_scenario(scenario):
+    """Simule un scénario complet dans le processus courant (ou le relit dans le cache) et retourne son historique."""
+    indice, valeurs, params = scenario
+    if _cache_processus is not None:
+        entree = _cache_processus.lire(_cache_processus.cle(params))
+        if entree is not None:
+            return indice, valeurs, entree["historique"]
+    engine = ThermalEngine(params=params)
+    engine.executer()
+    if _cache_processus is not None:
+        _cache_processus.enregistrer_moteur(engine)
+    return indice, valeurs, engine.historique()
+
+
+def _lot_en_cache(moteur, a_faire, cache):
+    """Retourne (clés, historiques) des scénarios du lot ; historiques vaut None si l'un d'eux manque au cache."""
+    # Dans un lot, dt, durée et pas par frame sont communs : ils font partie de la clé
+    contexte = {"lot": True, "dt": moteur.dt, "sim_duration": moteur.steps_total, "res_temporelle": moteur.steps_per_frame}
+    cles = [cache.cle(params, contexte) for _, _, params in a_faire]
+    historiques = []
+    for cle in cles:
+        entree = cache.lire(cle)
+        if entree is None:
+            return cles, None
+        historiques.append(entree["historique"])
+    return cles, historiques
+
+
+def _description(params_base, axes):
+    """Paramètres de base et axes tels qu'ils sont relus d'un fichier JSON (pour comparer deux balayages)."""
+    return json.loads(json.dumps({"params": params_base, "axes": axes}))
+
+
+def _verifier_reprise(chemin_sortie, params_base, axes):
+    """
+    Vérifie que le balayage interrompu a les mêmes paramètres de base et les mêmes axes : sinon, un
+    indice de scénario désignerait un autre scénario et le CSV mélangerait deux balayages.
+    """
+    chemin_description = chemin_sortie + ".balayage.json"
+    if not os.path.exists(chemin_description):
+        raise ValueError(f"{chemin_description} est absent : impossible de vérifier que le balayage à reprendre est le même")
+    with open(chemin_description, "r") as f:
+        precedent = json.load(f)
+    actuel = _description(params_base, axes)
+    if precedent["axes"] != actuel["axes"]:
+        raise ValueError(f"Les axes diffèrent de ceux du balayage interrompu ({chemin_description}) : reprise impossible")
+    if precedent["params"] != actuel["params"]:
+        raise ValueError(f"Les paramètres de base diffèrent de ceux du balayage interrompu ({chemin_description}) : reprise impossible")
+
+
+def _scenarios_termines(chemin_sortie):
+    """Lit le fichier de progression et retourne l'ensemble des indices déjà terminés."""
+    chemin_progression = chemin_sortie + ".progression"
+    if not os.path.exists(chemin_progression):
+        return set()
+    with open(chemin_progression, "r") as f:
+        return {int(ligne) for ligne in f if ligne.strip()}
+
+
+def _nettoyer_sortie(chemin_sortie, termines, entete):
+    """
+    Retire du CSV les lignes d'un scénario dont l'écriture a été interrompue, et les lignes vides ou tronquées.
+    Retourne les scénarios terminés : aucun si le CSV est vide (arrêt avant l'écriture de l'en-tête).
+    """
+    with open(chemin_sortie, "r", newline="") as f:
+        lignes = list(csv.reader(f))
+    if not lignes:
+        termines = set()
+        open(chemin_sortie + ".progression", "w").close()
+    donnees = lignes[1:]
+
+    def complete(ligne):
+        if len(ligne) != len(entete) or not all(ligne):
+            return False
+        try:
+            return int(ligne[0]) in termines
+        except ValueError:
+            return False
+
+    with open(chemin_sortie, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(entete)
+        writer.writerows(ligne for ligne in donnees if complete(ligne))
+    return termines
+
+
+def _ecrire_scenario(writer, sortie, progression, indice, valeurs, historique):
+    """Ajoute les lignes d'un scénario au CSV combiné puis le marque comme terminé."""
+    writer.writerows(
+        [indice, *valeurs] + [f"{v:.4f}" for v in ligne] for ligne in historique
+    )
+    sortie.flush()
+    # Le scénario n'est marqué terminé qu'une fois ses lignes écrites sur le disque
+    progression.write(f"{indice}\n")
+    progression.flush()
+
+
+def executer_balayage(params_base, axes, chemin_sortie, processus=None, reprendre=False, lot=False, cache=None):
+    """
+    Exécute tous les scénarios du balayage dans un pool de processus (ou en un seul lot compilé
+    si lot est vrai) et écrit les résultats au fur et à mesure dans chemin_sortie.
+    cache (CacheResultats ou None) fournit les scénarios déjà simulés.
+    Les paramètres de base et les axes sont gardés dans chemin_sortie + ".balayage.json" ; la reprise
+    lève ValueError s'ils ont changé. Retourne le nombre de scénarios calculés.
+    """
+    scenarios = developper_grille(params_base, axes)
+    noms = list(axes.keys())
+
+    entete = ["scenario"] + noms + ["Time (s)", "T1", "T2", "T3"]
+    termines = set()
+    if reprendre and os.path.exists(chemin_sortie):
+        _verifier_reprise(chemin_sortie, params_base, axes)
+        termines = _nettoyer_sortie(chemin_sortie, _scenarios_termines(chemin_sortie), entete)
+    else:
+        with open(chemin_sortie, "w", newline="") as f:
+            csv.writer(f).writerow(entete)
+        open(chemin_sortie + ".progression", "w").close()
+        with open(chemin_sortie + ".balayage.json", "w") as f:
+            json.dump(_description(params_base, axes), f, indent=4)
+
+    a_faire = [s for s in scenarios if s[0] not in termines]
+    print(f"{len(scenarios)} scénarios, {len(termines)} déjà terminés, {len(a_faire)} à calculer")
+    if not a_faire:
+        return 0
+
+    debut = time.perf_counter()
+    if lot:
+        moteur = BatchThermalEngine([params for _, _, params in a_faire])
+        historiques = None
+        if cache is not None:
+            cles, historiques = _lot_en_cache(moteur, a_faire, cache)
+        if historiques is None:
+            moteur.executer()
+            historiques = [moteur.historique(n) for n in range(len(a_faire))]
+            if cache is not None:
+                for cle, historique in zip(cles, historiques):
+                    cache.ecrire(cle, historique=historique)
+            print(f"{len(a_faire)} scénarios terminés en un lot ({time.perf_counter() - debut:.1f} s)")
+        else:
+            print(f"{len(a_faire)} scénarios du lot relus dans le cache ({time.perf_counter() - debut:.1f} s)")
+        with open(chemin_sortie, "a", newline="") as sortie, open(chemin_sortie + ".progression", "a") as progression:
+            writer = csv.writer(sortie)
+            for (indice, valeurs, _), historique in zip(a_faire, historiques):
+                _ecrire_scenario(writer, sortie, progression, indice, valeurs, historique)
+        return len(a_faire)
+
+    processus = processus or os.cpu_count()
+    with multiprocessing.Pool(processus, initializer=_initialiser_processus, initargs=(params_base, cache)) as pool, \
+            open(chemin_sortie, "a", newline="") as sortie, \
+            open(chemin_sortie + ".progression", "a") as progression:
+        writer = csv.writer(sortie)
+        for n, (indice, valeurs, historique) in enumerate(pool.imap_unordered(_executer_scenario, a_faire), start=1):
+            _ecrire_scenario(writer, sortie, progression, indice, valeurs, historique)
+            print(f"[{n}/{len(a_faire)}] scénario {indice} terminé ({time.perf_counter() - debut:.1f} s)")
+
+    return len(a_faire)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Balayage de paramètres en parallèle de la simulation thermique.")
+    parser.add_argument("parametres", help="Fichier JSON de paramètres de base")
+    parser.add_argument("axes", help="Fichier JSON des axes du balayage (chemin pointé -> liste de valeurs)")
+    parser.add_argument("sortie", help="Fichier CSV combiné des résultats")
+    parser.add_argument("--processus", type=int, default=None, help="Nombre de processus (défaut : tous les cœurs)")
+    parser.add_argument("--reprendre", action="store_true", help="Reprend un balayage interrompu")
+    parser.add_argument("--lot", action="store_true", help="Avance tous les scénarios ensemble dans un seul noyau compilé")
+    parser.add_argument("--sans-cache", action="store_true", help="Recalcule tous les scénarios sans lire ni écrire le cache des résultats")
+    args = parser.parse_args(argv)
+
+    with open(args.parametres, "r") as f:
+        params_base = json.load(f)
+    with open(args.axes, "r") as f:
+        axes = json.load(f)
+
+    cache = None if args.sans_cache else CacheResultats()
+    try:
+        executer_balayage(params_base, axes, args.sortie, args.processus, args.reprendre, args.lot, cache)
+    except ValueError as erreur:
+        parser.error(str(erreur))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Vérification de la simple précision : le même cas est simulé en float64 puis en float32 et l'écart
+maximal de chaque thermistance est rapporté, avec le gain de temps. Permet de choisir
+"precision": "float32" pour les gros balayages en sachant ce que l'on perd.
+
+Exemple :
+    python precision_check.py parametres.json --tolerance 0.01
+"""
+
+import argparse
+import copy
+import json
+import time
+
+import numpy as np
+
+from thermal_engine import ThermalEngine
+
+
+def comparer_precisions(params):
+    """
+    Simule le cas en float64 et en float32. Retourne (écart maximal par thermistance en °C,
+    écart sur la dernière lecture, {précision: durée en s}).
+    """
+    historiques, durees = {}, {}
+    for precision in ("float64", "float32"):
+        p = copy.deepcopy(params)
+        p["simulation_parameters"]["precision"] = precision
+        engine = ThermalEngine(params=p)  # Compilation faite dans le constructeur, hors chronomètre
+        debut = time.perf_counter()
+        engine.executer()
+        durees[precision] = time.perf_counter() - debut
+        historiques[precision] = engine.historique()
+
+    reference, simple = historiques["float64"], historiques["float32"]
+    n = min(len(reference), len(simple))  # Un arrêt anticipé peut survenir à une frame différente
+    ecarts = np.abs(reference[:n, 1:] - simple[:n, 1:])
+    return ecarts.max(axis=0), ecarts[-1], durees
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare les traces de la simulation en float64 et en float32.")
+    parser.add_argument("parametres", help="Fichier JSON du cas de référence")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="Écart acceptable aux thermistances (°C)")
+    args = parser.parse_args(argv)
+
+    with open(args.parametres, "r") as f:
+        params = json.load(f)
+
+    ecarts, ecarts_fin, durees = comparer_precisions(params)
+    print(f"float64 : {durees['float64']:.2f} s, float32 : {durees['float32']:.2f} s "
+          f"(accélération x{durees['float64'] / durees['float32']:.2f})")
+    for numero, (ecart, ecart_fin) in enumerate(zip(ecarts, ecarts_fin), start=1):
+        print(f"T{numero} : écart maximal {ecart:.2e} °C, à la fin {ecart_fin:.2e} °C")
+    if ecarts.max() <= args.tolerance:
+        print(f"float32 acceptable pour ce cas (écart sous {args.tolerance} °C)")
+    else:
+        print(f"float32 déconseillé pour ce cas (écart au-delà de {args.tolerance} °C)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Remplissage du cache de compilation Numba, à lancer une fois après l'installation (ou après une
+mise à jour du code) : chaque configuration de noyau est construite sur une petite grille et avance
+d'une frame, de sorte que les noyaux compilés sont écrits sur disque. Les lancements suivants de
+l'interface ou des scripts les rechargent au lieu de les recompiler.
+
+Depuis l'exécutable construit avec SimulationPhysique.spec (SimulationPhysique --precompiler), le
+cache va dans le dossier utilisateur choisi par main.py. Sans les fichiers .py des noyaux à un
+emplacement fixe (exécutable « onefile »), Numba ne peut pas garder de cache.
+
+Les signatures compilées ne dépendent que des types (précision, maillage, solveur) et non de la
+taille de la grille : une grille grossière suffit.
+
+Exemple :
+    python precompiler.py parametres.json
+    python main.py --precompiler
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+
+from rendu import ReducteurChamp
+from thermal_engine import CACHE_JIT, ThermalEngine
+
+# (nom, options ajoutées à simulation_parameters). Le solveur "expo" n'a pas de noyau Numba propre.
+CONFIGURATIONS = [
+    ("explicite précalculé", {}),
+    ("explicite précalculé float32", {"precision": "float32"}),
+    ("explicite original", {"noyau": "original"}),
+    ("explicite raffiné", {"maillage": "raffine"}),
+    ("adi", {"solveur": "adi"}),
+    ("adi float32", {"solveur": "adi", "precision": "float32"}),
+]
+
+
+def precompiler(params, res_spatiale=40):
+    """Construit et avance d'une frame un moteur par configuration ; retourne {nom: durée en s}."""
+    durees = {}
+    for nom, options in CONFIGURATIONS:
+        p = copy.deepcopy(params)
+        p["simulation_parameters"].update(options, res_spatiale=res_spatiale)
+        debut = time.perf_counter()
+        engine = ThermalEngine(params=p)
+        engine.avancer_frame()
+        ReducteurChamp().reduire(engine.state["T"], 2, 2)  # Réduction du champ pour l'affichage
+        durees[nom] = time.perf_counter() - debut
+    return durees
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile les noyaux Numba et les garde dans le cache sur disque.")
+    parser.add_argument("parametres", nargs="?", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "parametres.json"),
+                        help="Fichier JSON de référence (défaut : parametres.json à côté du script)")
+    args = parser.parse_args(argv)
+
+    if not CACHE_JIT:
+        print("Sources .py des noyaux absentes : Numba ne peut pas garder de cache (construire avec SimulationPhysique.spec)")
+        return
+
+    with open(args.parametres, "r") as f:
+        params = json.load(f)
+    for nom, duree in precompiler(params).items():
+        print(f"{nom:30s} {duree:6.2f} s")
+    print(f"Cache : {os.environ.get('NUMBA_CACHE_DIR') or 'dossiers __pycache__ à côté des sources'}")
+
+
+if __name__ == "__main__":
+    main()
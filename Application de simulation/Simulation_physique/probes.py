@@ -0,0 +1,131 @@
+"""
+Sondes de température nommées pour ThermalEngine.
+
+Chaque sonde est lue par interpolation bilinéaire entre les centres des quatre cellules actives qui
+l'entourent (au lieu de la cellule la plus proche) et échantillonnée à une fréquence physique
+choisie, indépendante de res_temporelle, directement dans la boucle compilée. Les lectures vont dans
+des tableaux préalloués ; avec une capacité plus petite que la durée, ils deviennent un tampon
+circulaire qui garde les derniers échantillons.
+
+Dans le JSON (facultatif, par défaut les trois thermistances T1, T2, T3) :
+    "sondes": {"centre": {"x": 0.031, "y": 0.058}, "bord": {"x": 0.005, "y": 0.1}},
+    "simulation_parameters": {"frequence_sondes": 10.0, "capacite_sondes": 100000, ...}
+"""
+
+import os
+
+import numpy as np
+from numba import njit
+
+# Même règle que thermal_engine.CACHE_JIT : cache sur disque seulement si le fichier source est présent
+CACHE_JIT = os.path.isfile(__file__)
+
+
+@njit(nogil=True, cache=CACHE_JIT)
+def echantillonner_sondes(T, sim_steps, dt, indices_i, indices_j, poids, valeurs, temps, n_echantillons):
+    """Écrit la lecture interpolée de toutes les sondes dans la ligne suivante du tampon ; retourne le nouveau compte."""
+    ligne = n_echantillons % valeurs.shape[0]
+    for s in range(indices_i.shape[0]):
+        v = 0.0
+        for c in range(4):
+            v += poids[s, c] * T[indices_i[s, c], indices_j[s, c]]
+        valeurs[ligne, s] = v
+    temps[ligne] = sim_steps * dt
+    return n_echantillons + 1
+
+
+def _interpolation_axe(centres, position):
+    """
+    Retourne (indice bas, indice haut, poids du haut) pour une position le long d'un axe, entre les
+    centres des cellules actives seulement (les cellules fantômes du pourtour ne sont jamais lues).
+    """
+    premier, dernier = 1, len(centres) - 2
+    if position <= centres[premier]:
+        return premier, premier, 0.0
+    if position >= centres[dernier]:
+        return dernier, dernier, 0.0
+    bas = int(np.searchsorted(centres, position, side="right")) - 1
+    bas = min(max(bas, premier), dernier - 1)
+    return bas, bas + 1, (position - centres[bas]) / (centres[bas + 1] - centres[bas])
+
+
+class ProbeSet:
+    """Ensemble de sondes d'un moteur : poids d'interpolation et tampons de lecture préalloués."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        params = engine.params
+        therm = params['thermistances']
+        sondes = params.get('sondes') or {
+            f"T{numero}": {"x": therm[f'pos_t{numero}_x'], "y": therm[f'pos_t{numero}_y']} for numero in (1, 2, 3)
+        }
+        self.noms = list(sondes.keys())
+        self.positions = [(sondes[nom]["x"], sondes[nom]["y"]) for nom in self.noms]
+
+        # Quatre cellules et quatre poids par sonde
+        n = len(self.noms)
+        self.indices_i = np.zeros((n, 4), dtype=np.int64)
+        self.indices_j = np.zeros((n, 4), dtype=np.int64)
+        self.poids = np.zeros((n, 4))
+        for s, (x, y) in enumerate(self.positions):
+            j0, j1, wx = _interpolation_axe(engine.centres_x, x)
+            i0, i1, wy = _interpolation_axe(engine.centres_y, y)
+            self.indices_i[s] = (i0, i0, i1, i1)
+            self.indices_j[s] = (j0, j1, j0, j1)
+            self.poids[s] = ((1 - wy) * (1 - wx), (1 - wy) * wx, wy * (1 - wx), wy * wx)
+
+        self.frequence = params['simulation_parameters'].get('frequence_sondes')
+        self.capacite = params['simulation_parameters'].get('capacite_sondes')
+        self.allouer()
+
+    def allouer(self):
+        """
+        Calcule le nombre de pas entre deux échantillons pour le dt courant (défaut : une lecture par frame)
+        et préalloue les tampons pour toute la durée, ou pour capacite_sondes lectures au plus.
+        """
+        e = self.engine
+        if self.frequence:
+            self.pas = max(1, round(1.0 / (self.frequence * e.dt)))
+        else:
+            self.pas = e.steps_per_frame
+        n_max = e.n_pas_fin // self.pas + 2  # Lectures aux multiples de pas, plus la lecture finale
+        capacite = min(n_max, self.capacite) if self.capacite else n_max
+        self.valeurs = np.zeros((capacite, len(self.noms)))
+        self.temps = np.zeros(capacite)
+        self.n_echantillons = 0
+
+    def reinitialiser(self):
+        """Vide les tampons (sans les réallouer)."""
+        self.n_echantillons = 0
+
+    def doit_echantillonner(self, sim_steps, fini=False):
+        """Vrai si l'état au pas sim_steps doit être lu (multiple du pas d'échantillonnage, ou fin de la simulation)."""
+        return sim_steps % self.pas == 0 or fini
+
+    def echantillonner(self, T, sim_steps):
+        """Lit toutes les sondes dans le champ T (boucles Python, ADI et solveur exponentiel)."""
+        self.n_echantillons = echantillonner_sondes(
+            T, sim_steps, self.engine.dt, self.indices_i, self.indices_j, self.poids,
+            self.valeurs, self.temps, self.n_echantillons
+        )
+
+    def traces(self):
+        """Retourne les colonnes temps (s) et une colonne par sonde, dans l'ordre chronologique."""
+        capacite = len(self.temps)
+        if self.n_echantillons <= capacite:
+            ordre = np.arange(self.n_echantillons)
+        else:
+            # Tampon circulaire plein : la plus vieille lecture est juste après la dernière écrite
+            ordre = (np.arange(capacite) + self.n_echantillons) % capacite
+        return np.column_stack((self.temps[ordre], self.valeurs[ordre]))
+
+    def ecrire_csv(self, filename):
+        """Écrit les traces des sondes dans le fichier CSV donné (une colonne par sonde)."""
+        np.savetxt(
+            filename,
+            self.traces(),
+            delimiter=',',
+            header=', '.join(['Time (s)'] + self.noms),
+            comments='',
+            fmt='%.4f'
+        )
@@ -0,0 +1,250 @@
+"""
+Modèle d'ordre réduit (POD) de la plaque pour l'exploration interactive.
+
+Des instantanés du champ complet sont enregistrés pendant trois simulations d'entraînement faites
+avec le moteur (refroidissement libre, échelon de 1 W au TEC, échelon de 1 W à la perturbation).
+Leur décomposition en valeurs singulières donne une base orthonormée Phi de quelques dizaines de
+modes (décomposition orthogonale aux valeurs propres). L'opérateur du modèle complet est projeté
+sur cette base (Galerkin) :
+    da/dt = Phi^T A Phi a + Phi^T b,    T ≈ Phi a
+et le petit système est intégré exactement entre deux bascules. Un pas réduit ne coûte qu'un
+produit matrice-vecteur de la taille du rang au lieu d'un stencil sur toute la grille.
+
+La base est gardée sur disque, une par géométrie (même empreinte que linear_response.py).
+
+Exemple :
+    python reduced_order.py parametres.json resultats.csv --comparer
+"""
+
+import argparse
+import copy
+import json
+import os
+import time
+
+import numpy as np
+from scipy.linalg import expm
+
+from ToggleManager import ToggleManager
+from linear_response import champs_unitaires, cle_geometrie
+from steady_state import assembler_operateur
+from thermal_engine import ThermalEngine
+
+
+class ReducedOrderModel:
+    """Modèle réduit POD : base apprise sur des instantanés du moteur, traces T1/T2/T3 en quelques microsecondes par pas."""
+
+    def __init__(self, param_file_path="parametres.json", params=None, tolerance=1e-9, rang_max=60,
+                 dossier_cache="cache_rom"):
+        if params is None:
+            with open(param_file_path, "r") as f:
+                params = json.load(f)
+        self.params = params
+        self.engine = ThermalEngine(params=copy.deepcopy(params))
+        self.dt = self.engine.dt
+        self.steps_per_frame = self.engine.steps_per_frame
+        self.tolerance = tolerance  # Fraction d'énergie des instantanés laissée hors de la base
+        self.rang_max = rang_max
+        self.dossier_cache = dossier_cache
+        self.cle = cle_geometrie(params)
+        self.base = None
+        self.valeurs_singulieres = None
+        self.n_pas_entrainement = 0
+
+    def _n_pas_fin(self, duree):
+        """Nombre de pas simulés par le moteur pour une durée donnée (premier n tel que n*dt > durée)."""
+        n_pas = int(duree / self.dt)
+        while n_pas * self.dt <= duree:
+            n_pas += 1
+        return n_pas
+
+    def _chemin_cache(self):
+        return os.path.join(self.dossier_cache, f"pod_{self.cle}.npz")
+
+    def _instantanes(self, n_pas):
+        """
+        Simule les trois cas d'entraînement et retourne la matrice des instantanés (cellules actives, k),
+        un instantané par frame. Chaque bloc est normalisé pour que les trois cas pèsent autant dans la base.
+        """
+        e = self.engine
+        Ny, Nx = e.Ny, e.Nx
+        P_tec, P_pertu = champs_unitaires(e)
+
+        blocs = []
+        for P, T_depart, T_ambiant in ((np.zeros((Ny, Nx)), e.T_piece, e.T_ambiant),
+                                       (P_tec, 0.0, 0.0),
+                                       (P_pertu, 0.0, 0.0)):
+            e.P_perm = P
+            T = np.full((Ny, Nx), T_depart, dtype=np.float64)
+            T_new = T.copy()
+            colonnes = []
+            for n in range(n_pas + 1):
+                if n % self.steps_per_frame == 0 or n == n_pas:
+                    colonnes.append(T[1:Ny-1, 1:Nx-1].ravel().copy())
+                if n == n_pas:
+                    break
+                T_new = e._pas_temperature(T, T_new, T_ambiant)
+                T, T_new = T_new, T  # Échange des buffers
+            bloc = np.column_stack(colonnes)
+            norme = np.linalg.norm(bloc)
+            blocs.append(bloc / norme if norme > 0 else bloc)
+        e.P_perm = np.zeros((Ny, Nx))
+        return np.hstack(blocs)
+
+    def entrainer(self, n_pas):
+        """Calcule la base POD sur n_pas pas d'entraînement et la sauvegarde dans le cache."""
+        debut = time.perf_counter()
+        X = self._instantanes(n_pas)
+        Phi, s, _ = np.linalg.svd(X, full_matrices=False)
+        energie_restante = 1.0 - np.cumsum(s ** 2) / np.sum(s ** 2)
+        rang = min(int(np.searchsorted(-energie_restante, -self.tolerance)) + 1, self.rang_max, len(s))
+        self.base = Phi[:, :rang]
+        self.valeurs_singulieres = s
+        self.n_pas_entrainement = n_pas
+        print(f"Base POD de rang {rang} calculée en {time.perf_counter() - debut:.1f} s "
+              f"({X.shape[1]} instantanés, énergie hors base {energie_restante[rang - 1]:.1e})")
+        os.makedirs(self.dossier_cache, exist_ok=True)
+        np.savez(self._chemin_cache(), dt=self.dt, n_pas=n_pas, base=self.base, valeurs_singulieres=s)
+        self._projeter()
+
+    def _charger_base(self, n_pas):
+        """Charge la base du cache si elle a été apprise sur au moins n_pas pas, sinon l'entraîne."""
+        if self.base is not None and self.n_pas_entrainement >= n_pas:
+            return
+        chemin = self._chemin_cache()
+        if os.path.exists(chemin):
+            with np.load(chemin) as donnees:
+                if int(donnees["n_pas"]) >= n_pas and float(donnees["dt"]) == self.dt:
+                    self.base = donnees["base"]
+                    self.valeurs_singulieres = donnees["valeurs_singulieres"]
+                    self.n_pas_entrainement = int(donnees["n_pas"])
+                    self._projeter()
+                    return
+        self.entrainer(n_pas)
+
+    def _projeter(self):
+        """Projette l'opérateur, les sources et les thermistances du modèle complet sur la base."""
+        e = self.engine
+        Ny, Nx = e.Ny, e.Nx
+        Phi = self.base
+        A, indices = assembler_operateur(e)
+        P_tec, P_pertu = champs_unitaires(e)
+
+        self.A_r = Phi.T @ (A @ Phi)
+        self.b_ambiant = Phi.T @ e.taux_convection[1:Ny-1, 1:Nx-1].ravel()  # Par °C d'ambiant
+        self.b_tec = Phi.T @ (e.taux_source * P_tec)[1:Ny-1, 1:Nx-1].ravel()  # Par watt
+        self.b_pertu = Phi.T @ (e.taux_source * P_pertu)[1:Ny-1, 1:Nx-1].ravel()  # Par watt
+        self.C = Phi[[indices[pos] for pos in e.thermistances_pos]]
+        self.a_initial = Phi.T @ np.full(Phi.shape[0], float(e.T_piece))
+        self._propagateurs = {}
+
+    def _propagateur(self, n_pas):
+        """
+        Retourne (E, G) tels que a(n + n_pas) = E a(n) + G f pour un forçage f constant,
+        avec E = exp(n_pas dt A_r) et G = A_r^-1 (E - I). Gardés en mémoire par longueur de saut.
+        """
+        if n_pas not in self._propagateurs:
+            E = expm(n_pas * self.dt * self.A_r)
+            G = np.linalg.solve(self.A_r, E - np.eye(len(E)))
+            self._propagateurs[n_pas] = (E, G)
+        return self._propagateurs[n_pas]
+
+    def champ(self, a):
+        """Reconstruit le champ complet (Ny, Nx) à partir des coordonnées réduites ; le pourtour est à l'ambiant."""
+        e = self.engine
+        T = np.full((e.Ny, e.Nx), float(e.T_ambiant))
+        T[1:e.Ny-1, 1:e.Nx-1] = (self.base @ a).reshape(e.Ny - 2, e.Nx - 2)
+        return T
+
+    def traces(self, TEC_momment_inversion=None, courant=None, couplage=None,
+               PERTU_momment_inversion=None, puissance_pertu=None, duree=None):
+        """
+        Retourne les colonnes temps, T1, T2, T3 (même échantillonnage et format que ThermalEngine.historique)
+        pour le calendrier et les puissances donnés ; les valeurs absentes sont prises dans le JSON.
+        """
+        p = self.params
+        TEC_momment_inversion = p["TEC"]["TEC_momment_inversion"] if TEC_momment_inversion is None else TEC_momment_inversion
+        courant = p["TEC"]["courant"] if courant is None else courant
+        couplage = p["TEC"]["couplage"] if couplage is None else couplage
+        PERTU_momment_inversion = (p["perturbation_properties"]["PERTU_momment_inversion"]
+                                   if PERTU_momment_inversion is None else PERTU_momment_inversion)
+        puissance_pertu = p["perturbation_properties"]["power"] if puissance_pertu is None else puissance_pertu
+        duree = p["simulation_parameters"]["sim_duration"] if duree is None else duree
+
+        # Pas d'échantillonnage du moteur : une lecture par frame, plus la lecture finale
+        n_fin = self._n_pas_fin(duree)
+        n_sortie = np.append(np.arange(self.steps_per_frame, n_fin + 1, self.steps_per_frame), n_fin)
+        self._charger_base(n_fin)
+
+        puissance_tec = couplage * (0.3123 * (courant ** 2) + 1.0217 * courant)
+        bascules_tec = set(ToggleManager(TEC_momment_inversion, self.dt).toggle_steps)
+        bascules_pertu = set(ToggleManager(PERTU_momment_inversion, self.dt).toggle_steps)
+        frontieres = sorted(set(n_sortie.tolist()) | {s for s in bascules_tec | bascules_pertu if 0 < s < n_fin})
+
+        # Sauts exacts d'une frontière à la suivante, le forçage étant constant entre deux
+        a = self.a_initial
+        tec, pertu = 0, 0
+        n = 0
+        lectures = {}
+        for cible in frontieres:
+            if n in bascules_tec:
+                tec = 1 - tec
+            if n in bascules_pertu:
+                pertu = 1 - pertu
+            f = (self.engine.T_ambiant * self.b_ambiant + tec * puissance_tec * self.b_tec
+                 + pertu * puissance_pertu * self.b_pertu)
+            E, G = self._propagateur(cible - n)
+            a = E @ a + G @ f
+            n = cible
+            lectures[n] = self.C @ a
+
+        time_values = np.arange(len(n_sortie)) * self.dt * self.steps_per_frame
+        return np.column_stack((time_values, np.array([lectures[n] for n in n_sortie])))
+
+    def comparer(self):
+        """
+        Compare le modèle réduit au modèle complet sur le scénario du JSON.
+        Retourne (écart maximal par thermistance en °C, durée du modèle complet, durée du modèle réduit).
+        """
+        debut = time.perf_counter()
+        complet = ThermalEngine(params=copy.deepcopy(self.params))
+        complet.executer()
+        reference = complet.historique()
+        duree_complet = time.perf_counter() - debut
+
+        self._charger_base(self._n_pas_fin(self.params["simulation_parameters"]["sim_duration"]))
+        debut = time.perf_counter()
+        reduit = self.traces()
+        duree_reduit = time.perf_counter() - debut
+
+        n = min(len(reference), len(reduit))  # Un arrêt anticipé raccourcit l'historique complet
+        ecarts = np.abs(reference[:n, 1:] - reduit[:n, 1:]).max(axis=0)
+        return ecarts, duree_complet, duree_reduit
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Traces des thermistances par modèle d'ordre réduit (POD).")
+    parser.add_argument("parametres", help="Fichier JSON de paramètres")
+    parser.add_argument("sortie", help="Fichier CSV des traces (même format que simulation_headless.py)")
+    parser.add_argument("--cache", default="cache_rom", help="Dossier du cache des bases POD")
+    parser.add_argument("--tolerance", type=float, default=1e-9, help="Fraction d'énergie laissée hors de la base")
+    parser.add_argument("--comparer", action="store_true", help="Rapporte l'écart au modèle complet sur le scénario du JSON")
+    args = parser.parse_args(argv)
+
+    modele = ReducedOrderModel(args.parametres, tolerance=args.tolerance, dossier_cache=args.cache)
+    debut = time.perf_counter()
+    historique = modele.traces()
+    print(f"Traces calculées en {(time.perf_counter() - debut) * 1e3:.1f} ms (rang {modele.base.shape[1]})")
+
+    np.savetxt(args.sortie, historique, delimiter=',', header='Time (s), T1, T2, T3', comments='', fmt='%.4f')
+    print(f"Fichier sauvegardé: {args.sortie}")
+
+    if args.comparer:
+        ecarts, duree_complet, duree_reduit = modele.comparer()
+        print(f"Modèle complet : {duree_complet:.2f} s, modèle réduit : {duree_reduit * 1e3:.1f} ms")
+        for numero, ecart in enumerate(ecarts, start=1):
+            print(f"Écart maximal T{numero} = {ecart:.4f} °C")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Rendu en direct de l'interface : le coût d'un dessin ne dépend plus de la durée de la simulation.
+
+- RenduBlit : seuls les artistes animés (champ, courbes, titre) sont redessinés par-dessus un fond
+  mis en cache (blitting). Le dessin complet de la figure (axes, graduations, barre de couleur)
+  n'est refait que lorsque les limites changent.
+- CourbeDecimee : les courbes reçoivent seulement les nouveaux points à chaque frame et en gardent
+  une vue réduite par l'algorithme « largest triangle three buckets » (LTTB), qui conserve la forme
+  (pics, bascules) en ne gardant qu'un point par seau. La taille des seaux double quand la vue
+  devient trop longue : le nombre de points dessinés reste borné.
+- ReducteurChamp : le champ est ramené à la taille en pixels de son axe (moyenne par blocs dans un
+  tampon réutilisé) avant d'être donné à matplotlib ; une grille fine s'anime aussi vite qu'une grossière.
+"""
+
+import math
+import os
+
+import numpy as np
+from numba import njit
+
+# Même règle que thermal_engine.CACHE_JIT : cache sur disque seulement si le fichier source est présent
+CACHE_JIT = os.path.isfile(__file__)
+
+
+# Noyau séquentiel : il tourne dans le fil de l'interface pendant que le fil de calcul est dans ses
+# noyaux parallèles, ce que la couche de threads « workqueue » de Numba refuse (arrêt du processus)
+@njit(nogil=True, cache=CACHE_JIT)
+def _moyenne_blocs(T, fy, fx, sortie):
+    """Moyenne de T par blocs de fy x fx cellules (blocs partiels au bord haut et droit) écrite dans sortie."""
+    ny, nx = T.shape
+    for i in range(sortie.shape[0]):
+        i_fin = min((i + 1) * fy, ny)
+        for j in range(sortie.shape[1]):
+            j_fin = min((j + 1) * fx, nx)
+            somme = 0.0
+            for a in range(i * fy, i_fin):
+                for b in range(j * fx, j_fin):
+                    somme += T[a, b]
+            sortie[i, j] = somme / ((i_fin - i * fy) * (j_fin - j * fx))
+
+
+def _point_lttb(x, y, ax, ay, cx, cy):
+    """Indice du point de (x, y) qui forme le plus grand triangle avec A (point retenu précédent) et C (moyenne du seau suivant)."""
+    aires = np.abs((ax - cx) * (y - ay) - (ax - x) * (cy - ay))
+    return int(np.argmax(aires))
+
+
+class CourbeDecimee:
+    """
+    Série (x, y) qui grandit frame après frame, avec une vue décimée par LTTB en ligne.
+    Un seau est figé dès que le seau suivant est complet ; les points des seaux non figés
+    sont dessinés tels quels à la fin de la vue.
+    """
+
+    def __init__(self, points_max=1000):
+        self.points_max = points_max
+        self.x = np.empty(1024)
+        self.y = np.empty(1024)
+        self.n = 0
+        self.taille_seau = 1
+        # Points retenus, suivis des points bruts non figés au moment de vue()
+        self.vue_x = np.empty(2 * points_max + 2)
+        self.vue_y = np.empty(2 * points_max + 2)
+        self._recommencer()
+
+    def _recommencer(self):
+        """Repart du premier point avec la taille de seau courante (après un doublement)."""
+        self.n_choisis = min(self.n, 1)
+        self.vue_x[:self.n_choisis] = self.x[:self.n_choisis]
+        self.vue_y[:self.n_choisis] = self.y[:self.n_choisis]
+        self.prochain = 1  # Début du premier seau non figé
+        self._figer_seaux()
+
+    def ajouter(self, x, y):
+        """Ajoute des points à la fin de la série."""
+        n = self.n + len(x)
+        if n > len(self.x):
+            capacite = max(n, 2 * len(self.x))
+            self.x = np.resize(self.x, capacite)
+            self.y = np.resize(self.y, capacite)
+        self.x[self.n:n] = x
+        self.y[self.n:n] = y
+        debut, self.n = self.n, n
+        if debut == 0:
+            self._recommencer()
+        else:
+            self._figer_seaux()
+        while self.n_choisis > 2 * self.points_max:  # Plusieurs doublements si beaucoup de points arrivent d'un coup
+            self.taille_seau *= 2
+            self._recommencer()
+
+    def _figer_seaux(self):
+        b = self.taille_seau
+        while self.prochain + 2 * b <= self.n:
+            seau = slice(self.prochain, self.prochain + b)
+            suivant = slice(self.prochain + b, self.prochain + 2 * b)
+            i = self.prochain
+            if b > 1:
+                i += _point_lttb(self.x[seau], self.y[seau], self.vue_x[self.n_choisis - 1], self.vue_y[self.n_choisis - 1],
+                                 self.x[suivant].mean(), self.y[suivant].mean())
+            if self.n_choisis == len(self.vue_x):
+                # Au plus un seau de trop avant le doublement ; on agrandit par sécurité
+                self.vue_x = np.resize(self.vue_x, 2 * len(self.vue_x))
+                self.vue_y = np.resize(self.vue_y, 2 * len(self.vue_y))
+            self.vue_x[self.n_choisis] = self.x[i]
+            self.vue_y[self.n_choisis] = self.y[i]
+            self.n_choisis += 1
+            self.prochain += b
+
+    def vue(self):
+        """Retourne (x, y) à dessiner : points retenus des seaux figés, puis les derniers points bruts."""
+        return (np.concatenate((self.vue_x[:self.n_choisis], self.x[self.prochain:self.n])),
+                np.concatenate((self.vue_y[:self.n_choisis], self.y[self.prochain:self.n])))
+
+
+class RenduBlit:
+    """
+    Redessine les artistes animés sur le fond de la figure mis en cache. Le fond est recapturé
+    après chaque dessin complet (événement draw_event), demandé par redessiner_tout().
+    """
+
+    def __init__(self, fig, artistes):
+        self.fig = fig
+        self.artistes = artistes
+        for artiste in artistes:
+            artiste.set_animated(True)  # Exclus du dessin complet, dessinés par-dessus le fond
+        self.canvas = None
+        self.fond = None
+        self._connexion = None
+
+    def _brancher(self):
+        """Se connecte au canvas courant de la figure (l'interface Qt le remplace après la création)."""
+        canvas = self.fig.canvas
+        if canvas is not self.canvas:
+            if self.canvas is not None:
+                self.canvas.mpl_disconnect(self._connexion)
+            self.canvas = canvas
+            self._connexion = canvas.mpl_connect("draw_event", self._sur_dessin)
+            self.fond = None
+        return canvas
+
+    def _sur_dessin(self, event):
+        self.fond = self.canvas.copy_from_bbox(self.fig.bbox)
+        self._dessiner_artistes()
+
+    def _dessiner_artistes(self):
+        for artiste in self.artistes:
+            self.fig.draw_artist(artiste)
+
+    def redessiner_tout(self, immediat=False):
+        """
+        Demande un dessin complet (limites, graduations ou étiquettes modifiées). Avec immediat, le
+        dessin est fait tout de suite au lieu d'être confié à la boucle Qt (pour le chronométrer).
+        """
+        canvas = self._brancher()
+        self.fond = None
+        if immediat:
+            canvas.draw()
+        else:
+            canvas.draw_idle()
+
+    def mettre_a_jour(self):
+        """Affiche l'état courant des artistes animés."""
+        canvas = self._brancher()
+        if self.fond is None or not canvas.supports_blit:
+            canvas.draw_idle()
+            return
+        canvas.restore_region(self.fond)
+        self._dessiner_artistes()
+        canvas.blit(self.fig.bbox)
+
+
+class ReducteurChamp:
+    """Réduit le champ à la résolution d'affichage avant imshow (les pixels en trop seraient jetés par matplotlib)."""
+
+    def __init__(self):
+        self.sortie = None
+
+    def reduire(self, T, hauteur_px, largeur_px):
+        """
+        Retourne T moyenné par blocs pour ne pas dépasser hauteur_px x largeur_px, ou T lui-même s'il
+        est déjà plus petit. Le tableau retourné est réutilisé à l'appel suivant.
+        """
+        fy = max(1, math.ceil(T.shape[0] / max(hauteur_px, 1)))
+        fx = max(1, math.ceil(T.shape[1] / max(largeur_px, 1)))
+        if fy == 1 and fx == 1:
+            return T
+        forme = (math.ceil(T.shape[0] / fy), math.ceil(T.shape[1] / fx))
+        if self.sortie is None or self.sortie.shape != forme or self.sortie.dtype != T.dtype:
+            self.sortie = np.empty(forme, dtype=T.dtype)
+        _moyenne_blocs(T, fy, fx, self.sortie)
+        return self.sortie
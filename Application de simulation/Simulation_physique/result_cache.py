@@ -0,0 +1,246 @@
+"""
+Cache des résultats sur disque, adressé par le contenu des paramètres.
+
+La clé d'un résultat est l'empreinte SHA-256 du jeu de paramètres normalisé (clés triées, nombres
+en flottants, valeurs par défaut des clés facultatives écrites explicitement, clés sans effet sur
+les traces retirées) et de la version du moteur (empreinte des sources du moteur : toute
+modification du code de calcul invalide le cache). Un même parametres.json relancé depuis
+l'interface, un balayage ou un script retrouve donc son résultat sans refaire la simulation.
+
+Chaque entrée est un fichier .npz : traces T1/T2/T3, lectures des sondes, état final des sources
+et champ final, de sorte qu'un moteur relu est dans le même état qu'à la fin d'un calcul.
+Une entrée illisible (fichier endommagé) est traitée comme absente. La taille totale du dossier est bornée : les entrées les moins
+récemment utilisées (date de modification, rafraîchie à chaque lecture) sont effacées en premier.
+Les écritures passent par un fichier temporaire renommé : plusieurs processus peuvent partager le
+même dossier.
+
+Exemple :
+    python result_cache.py info
+    python result_cache.py vider
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+# Modules dont le code détermine les résultats : leur contenu fait partie de la clé
+SOURCES_MOTEUR = ["thermal_engine.py", "probes.py", "graded_mesh.py", "ToggleManager.py",
+                  "exponential_integrator.py", "steady_state.py", "batch_engine.py"]
+
+# Version utilisée quand les sources sont absentes (exécutable construit sans les .py) :
+# à incrémenter à chaque modification du calcul
+VERSION_MOTEUR = 1
+
+TAILLE_MAX_DEFAUT = 2 * 1024 ** 3  # 2 Go
+
+# Valeurs prises par ThermalEngine quand une clé facultative est absente
+DEFAUTS = {
+    "material_properties": {"diff_de_densite": 0.80},
+    "simulation_parameters": {
+        "maillage": "uniforme",
+        "solveur": "explicite",
+        "noyau": "precalcule",
+        "precision": "float64",
+        "arret_stationnaire": 0.0,
+        "bande_stabilisation": 0.1,
+    },
+}
+
+
+def dossier_defaut():
+    """Dossier utilisateur persistant du cache (à côté du cache de compilation de l'exécutable)."""
+    base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(os.path.join("~", ".cache"))
+    return os.path.join(base, "SimulationPhysique", "resultats")
+
+
+def version_moteur():
+    """Empreinte des sources du moteur, ou VERSION_MOTEUR si elles sont absentes."""
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    empreinte = hashlib.sha256()
+    for nom in SOURCES_MOTEUR:
+        chemin = os.path.join(dossier, nom)
+        if not os.path.isfile(chemin):
+            return f"v{VERSION_MOTEUR}"
+        with open(chemin, "rb") as f:
+            empreinte.update(nom.encode() + b"\0" + f.read())
+    return empreinte.hexdigest()
+
+
+def _nombres_en_flottants(valeur):
+    """Écrit 10 et 10.0 de la même façon (les booléens restent des booléens)."""
+    if isinstance(valeur, dict):
+        return {cle: _nombres_en_flottants(v) for cle, v in valeur.items()}
+    if isinstance(valeur, list):
+        return [_nombres_en_flottants(v) for v in valeur]
+    if isinstance(valeur, int) and not isinstance(valeur, bool):
+        return float(valeur)
+    return valeur
+
+
+def normaliser_params(params):
+    """Retourne une copie des paramètres où deux jeux équivalents pour le moteur sont identiques."""
+    params = copy.deepcopy(params)
+    for section, defauts in DEFAUTS.items():
+        for cle, valeur in defauts.items():
+            params.setdefault(section, {}).setdefault(cle, valeur)
+
+    simulation = params["simulation_parameters"]
+    # Les instantanés sur disque ne changent pas les résultats (charger_moteur recalcule s'ils sont demandés)
+    simulation.pop("instantanes", None)
+    # dt n'est lu que par les solveurs implicites ; le raffinement seulement par le maillage raffiné
+    if simulation["solveur"] == "explicite":
+        simulation.pop("dt", None)
+    else:
+        simulation.setdefault("dt", 0.1)
+    if simulation["maillage"] != "raffine":
+        simulation.pop("raffinement", None)
+    return _nombres_en_flottants(params)
+
+
+class CacheResultats:
+    """Dossier d'entrées .npz adressées par l'empreinte des paramètres, borné en taille (LRU)."""
+
+    def __init__(self, dossier=None, taille_max=TAILLE_MAX_DEFAUT):
+        self.dossier = dossier or dossier_defaut()
+        self.taille_max = taille_max
+        self.version = version_moteur()
+        os.makedirs(self.dossier, exist_ok=True)
+
+    def cle(self, params, contexte=None):
+        """
+        Empreinte des paramètres normalisés et de la version du moteur. contexte (dictionnaire
+        facultatif) distingue un même scénario calculé autrement, par exemple dans un lot.
+        """
+        contenu = {"version": self.version, "params": normaliser_params(params), "contexte": contexte}
+        texte = json.dumps(contenu, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(texte.encode()).hexdigest()
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, cle + ".npz")
+
+    def lire(self, cle):
+        """Retourne le dictionnaire de tableaux de l'entrée, ou None si elle est absente."""
+        chemin = self._chemin(cle)
+        try:
+            with np.load(chemin) as donnees:
+                entree = {nom: donnees[nom] for nom in donnees.files}
+            os.utime(chemin)  # Entrée utilisée : la plus récente pour l'éviction
+        except (FileNotFoundError, ValueError, OSError, EOFError, zipfile.BadZipFile):
+            return None  # Absente, effacée entre-temps par un autre processus, ou endommagée
+        return entree
+
+    def ecrire(self, cle, **tableaux):
+        """Enregistre une entrée (tableaux numpy nommés) puis évince les plus anciennes si nécessaire."""
+        descripteur, temporaire = tempfile.mkstemp(dir=self.dossier, suffix=".tmp")
+        with os.fdopen(descripteur, "wb") as f:
+            np.savez(f, **tableaux)
+        os.replace(temporaire, self._chemin(cle))
+        self.evincer()
+
+    def _entrees(self):
+        """Liste [(date, taille, chemin)] des entrées, de la moins récemment utilisée à la plus récente."""
+        entrees = []
+        for nom in os.listdir(self.dossier):
+            if nom.endswith(".npz"):
+                try:
+                    info = os.stat(os.path.join(self.dossier, nom))
+                except FileNotFoundError:
+                    continue
+                entrees.append((info.st_mtime, info.st_size, os.path.join(self.dossier, nom)))
+        return sorted(entrees)
+
+    def taille(self):
+        """Retourne (nombre d'entrées, taille totale en octets)."""
+        entrees = self._entrees()
+        return len(entrees), sum(taille for _, taille, _ in entrees)
+
+    def evincer(self):
+        """Efface les entrées les moins récemment utilisées jusqu'à repasser sous taille_max."""
+        entrees = self._entrees()
+        total = sum(taille for _, taille, _ in entrees)
+        for _, taille, chemin in entrees:
+            if total <= self.taille_max:
+                break
+            try:
+                os.remove(chemin)
+            except FileNotFoundError:
+                pass
+            total -= taille
+
+    def vider(self):
+        """Efface toutes les entrées."""
+        for _, _, chemin in self._entrees():
+            try:
+                os.remove(chemin)
+            except FileNotFoundError:
+                pass
+
+    def charger_moteur(self, engine):
+        """
+        Si le résultat des paramètres du moteur est en cache, remet le moteur dans l'état de fin de
+        simulation (champ, pas simulés, historique, sondes, sources) et retourne True.
+        Le moteur doit être à t = 0. Une simulation qui doit écrire des instantanés est toujours recalculée.
+        """
+        if engine.config_instantanes:
+            return False
+        entree = self.lire(self.cle(engine.params))
+        if entree is None or "champ" not in entree:
+            return False
+        noms = list(entree["noms_sondes"])
+        if sorted(noms) != sorted(engine.sondes.noms) or entree["sondes_valeurs"].shape[0] != len(engine.sondes.temps):
+            return False
+
+        historique = entree["historique"]
+        engine.T_hist_1[:] = historique[:, 1]
+        engine.T_hist_2[:] = historique[:, 2]
+        engine.T_hist_3[:] = historique[:, 3]
+        # Colonnes des sondes dans l'ordre du moteur (l'ordre des clés du JSON ne compte pas dans la clé)
+        colonnes = [noms.index(nom) for nom in engine.sondes.noms]
+        engine.sondes.valeurs[:] = entree["sondes_valeurs"][:, colonnes]
+        engine.sondes.temps[:] = entree["sondes_temps"]
+        engine.sondes.n_echantillons = int(entree["sondes_n"])
+        engine.state["simulation_steps"] = int(entree["etat"][0])
+        engine.power_enabled = int(entree["etat"][1])
+        engine.perturbation_state = int(entree["etat"][2])
+        engine.arret_anticipe = bool(entree["etat"][3])
+        engine.vitesse_max = float(entree["vitesse_max"])
+        engine.state["T"][:] = entree["champ"]
+        return True
+
+    def enregistrer_moteur(self, engine):
+        """Enregistre le résultat d'un moteur arrivé en fin de simulation."""
+        tableaux = {
+            "historique": engine.historique(),
+            "noms_sondes": np.array(engine.sondes.noms),
+            "sondes_valeurs": engine.sondes.valeurs,
+            "sondes_temps": engine.sondes.temps,
+            "sondes_n": np.array(engine.sondes.n_echantillons),
+            "etat": np.array([engine.state["simulation_steps"], engine.power_enabled,
+                              engine.perturbation_state, engine.arret_anticipe]),
+            "vitesse_max": np.array(engine.vitesse_max),
+            "champ": engine.state["T"],
+        }
+        self.ecrire(self.cle(engine.params), **tableaux)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gestion du cache des résultats de simulation.")
+    parser.add_argument("action", choices=["info", "vider"], help="info : contenu du cache ; vider : efface toutes les entrées")
+    parser.add_argument("--dossier", default=None, help="Dossier du cache (défaut : dossier utilisateur)")
+    args = parser.parse_args(argv)
+
+    cache = CacheResultats(args.dossier)
+    if args.action == "vider":
+        cache.vider()
+    n, taille = cache.taille()
+    print(f"{cache.dossier} : {n} entrées, {taille / 1024 ** 2:.1f} Mo (maximum {cache.taille_max / 1024 ** 2:.0f} Mo)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Exécution de la simulation en ligne de commande, sans Qt ni matplotlib.
+Utile sur les machines de calcul sans écran : la simulation roule à pleine vitesse
+(aucun dessin par frame) et les traces T1/T2/T3 sont écrites dans le CSV demandé.
+
+Exemple :
+    python simulation_headless.py parametres.json resultats.csv
+    python simulation_headless.py parametres.json resultats.csv --sondes sondes.csv
+    python simulation_headless.py parametres.json resultats.csv --instantanes run_1 --intervalle 30
+
+Un paramètres déjà simulé est relu dans le cache des résultats (result_cache.py) au lieu d'être
+recalculé, sauf avec --sans-cache ou --instantanes.
+"""
+
+import argparse
+import time
+
+from result_cache import CacheResultats
+from thermal_engine import ThermalEngine
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation thermique 2D sans interface graphique.")
+    parser.add_argument("parametres", help="Chemin du fichier JSON de paramètres (même format que parametres.json)")
+    parser.add_argument("sortie", help="Chemin du fichier CSV où écrire les traces des thermistances")
+    parser.add_argument("--instantanes", default=None, help="Dossier où enregistrer le champ complet (reprise possible)")
+    parser.add_argument("--intervalle", type=float, default=10.0, help="Intervalle entre deux instantanés (s simulées)")
+    parser.add_argument("--sondes", default=None, help="Fichier CSV où écrire les traces des sondes (section \"sondes\" du JSON)")
+    parser.add_argument("--sans-cache", action="store_true", help="Recalcule même si le résultat est dans le cache")
+    args = parser.parse_args(argv)
+
+    engine = ThermalEngine(args.parametres)
+    if args.instantanes:
+        engine.activer_instantanes(args.instantanes, args.intervalle)
+
+    cache = None if args.sans_cache or args.instantanes else CacheResultats()
+    debut = time.perf_counter()
+    depuis_cache = cache is not None and cache.charger_moteur(engine)
+    if depuis_cache:
+        print(f"Résultat lu dans le cache ({cache.dossier})")
+    else:
+        engine.executer()
+        if cache is not None:
+            cache.enregistrer_moteur(engine)
+    duree = time.perf_counter() - debut
+    if engine.instantanes is not None:
+        engine.instantanes.fermer()
+        print(f"{len(engine.instantanes)} instantanés du champ enregistrés dans {args.instantanes}")
+
+    engine.ecrire_csv(args.sortie)
+    if depuis_cache:
+        print(f"{engine.state['simulation_steps']} pas simulés (résultat du cache, relu en {duree:.2f} s)")
+    else:
+        print(f"{engine.state['simulation_steps']} pas simulés en {duree:.2f} s")
+    if engine.arret_anticipe:
+        print(f"Arrêt anticipé : régime stationnaire à t = {engine.state['simulation_steps'] * engine.dt:.2f} s")
+    for numero, temps in enumerate(engine.temps_stabilisation(), start=1):
+        if temps is None:
+            print(f"Thermistance {numero} non stabilisée à +/- {engine.bande_stabilisation} °C en fin de simulation")
+        else:
+            print(f"Thermistance {numero} stabilisée à +/- {engine.bande_stabilisation} °C dès t = {temps:.2f} s")
+    print(f"Fichier sauvegardé: {args.sortie}")
+    if args.sondes:
+        engine.sondes.ecrire_csv(args.sondes)
+        print(f"{engine.sondes.n_echantillons} lectures de {len(engine.sondes.noms)} sondes "
+              f"(toutes les {engine.sondes.pas * engine.dt:.4g} s), fichier sauvegardé: {args.sondes}")
+
+
+if __name__ == "__main__":
+    main()
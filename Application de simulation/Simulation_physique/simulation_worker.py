@@ -0,0 +1,155 @@
+"""
+Fil de calcul de la simulation, découplé de l'affichage.
+
+Le fil avance le moteur frame après frame aussi vite que les noyaux le permettent (ils libèrent le
+GIL, voir nogil dans thermal_engine.py) et dépose après chaque frame une copie du champ et des
+dernières lectures dans une boîte aux lettres à trois tampons. L'interface lit la boîte à son propre
+rythme : elle n'affiche que la frame la plus récente et les frames intermédiaires sont simplement
+écrasées. Un dessin lent ne ralentit donc plus la physique, et inversement.
+
+Les actions de l'utilisateur qui modifient le moteur (bascule du TEC, etc.) ne le touchent jamais
+directement : elles sont confiées au fil, qui les applique entre deux frames.
+"""
+
+import queue
+import threading
+
+import numpy as np
+
+
+class BoiteFrames:
+    """
+    Boîte aux lettres à trois tampons préalloués : un en écriture (fil de calcul), un prêt (dernière
+    frame publiée) et un en lecture (interface). Le verrou ne protège qu'un échange d'indices ; le
+    champ est copié hors verrou et aucun tampon n'est jamais écrit pendant qu'on le lit.
+    """
+
+    def __init__(self, forme, dtype):
+        self.tampons = [np.zeros(forme, dtype=dtype) for _ in range(3)]
+        self.infos = [None, None, None]
+        self.ecriture, self.pret, self.lecture = 0, 1, 2
+        self.nouvelle = False
+        self.numero = 0  # Frames publiées depuis la création
+        self._verrou = threading.Lock()
+
+    def publier(self, T, infos):
+        """Copie le champ dans le tampon d'écriture puis en fait la dernière frame disponible."""
+        np.copyto(self.tampons[self.ecriture], T)
+        self.infos[self.ecriture] = infos
+        with self._verrou:
+            self.ecriture, self.pret = self.pret, self.ecriture
+            self.nouvelle = True
+            self.numero += 1
+
+    def lire(self):
+        """
+        Retourne (champ, infos) de la frame la plus récente, ou None si rien n'a été publié depuis
+        la dernière lecture. Le champ reste valide jusqu'à l'appel suivant.
+        """
+        with self._verrou:
+            if not self.nouvelle:
+                return None
+            self.lecture, self.pret = self.pret, self.lecture
+            self.nouvelle = False
+        return self.tampons[self.lecture], self.infos[self.lecture]
+
+
+class SimulationWorker:
+    """Fil d'arrière-plan qui fait avancer un ThermalEngine et publie chaque frame dans une BoiteFrames."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.boite = BoiteFrames(engine.state["T"].shape, engine.dtype)
+        self.fini = False
+        self.erreur = None  # Exception levée dans le fil, signalée par l'interface
+        self.depuis_cache = False  # Vrai si la dernière frame vient du cache des résultats, pas d'un calcul
+        self._commandes = queue.Queue()
+        self._actif = threading.Event()  # Effacé : simulation en pause
+        self._arret = threading.Event()
+        self._fil = None
+
+    def demarrer(self):
+        """Lance le fil de calcul à partir de l'état courant du moteur (les frames d'un test précédent sont oubliées)."""
+        self.boite = BoiteFrames(self.engine.state["T"].shape, self.engine.dtype)
+        self.fini = False
+        self.erreur = None
+        self.depuis_cache = False
+        self._arret.clear()
+        self._actif.set()
+        self._fil = threading.Thread(target=self._boucle, name="calcul", daemon=True)
+        self._fil.start()
+
+    def publier_resultat(self):
+        """Publie l'état courant du moteur (résultat relu dans le cache) comme frame finale, sans lancer de calcul."""
+        self.boite = BoiteFrames(self.engine.state["T"].shape, self.engine.dtype)
+        self.erreur = None
+        self.depuis_cache = True
+        self.fini = True
+        self._publier(True)
+
+    def pause(self, en_pause):
+        """Suspend (True) ou relance (False) le calcul à la fin de la frame en cours."""
+        if en_pause:
+            self._actif.clear()
+        else:
+            self._actif.set()
+
+    def arreter(self):
+        """Demande l'arrêt et attend la fin de la frame en cours ; le moteur peut ensuite être lu sans risque."""
+        self._arret.set()
+        self._actif.set()
+        if self._fil is not None:
+            self._fil.join()
+            self._fil = None
+        self._appliquer_commandes()  # Commandes arrivées après la dernière frame
+
+    def en_cours(self):
+        return self._fil is not None and self._fil.is_alive()
+
+    def executer_entre_frames(self, fonction):
+        """Applique fonction(engine) dans le fil de calcul, avant la prochaine frame (tout de suite s'il est arrêté)."""
+        if self.en_cours():
+            self._commandes.put(fonction)
+        else:
+            fonction(self.engine)
+
+    def _appliquer_commandes(self):
+        while True:
+            try:
+                fonction = self._commandes.get_nowait()
+            except queue.Empty:
+                return
+            fonction(self.engine)
+
+    def _boucle(self):
+        engine = self.engine
+        try:
+            while not self._arret.is_set():
+                self._actif.wait()
+                if self._arret.is_set():
+                    break
+                self._appliquer_commandes()
+                fini = engine.avancer_frame()
+                with engine.chronometres.mesurer("publication"):
+                    self._publier(fini)
+                if fini:
+                    self.fini = True
+                    break
+        except Exception as erreur:
+            self.erreur = erreur
+            self._publier(True)
+
+    def _publier(self, fini):
+        engine = self.engine
+        sondes = engine.sondes
+        derniere_lecture = (sondes.valeurs[(sondes.n_echantillons - 1) % len(sondes.temps)].copy()
+                            if sondes.n_echantillons else None)
+        infos = {
+            "simulation_steps": engine.state["simulation_steps"],
+            "n_hist": len(engine.T_hist_1),  # Les listes d'historique ne font que grandir : on lit leurs n premiers éléments
+            "power_enabled": engine.power_enabled,
+            "perturbation_state": engine.perturbation_state,
+            "sondes": derniere_lecture,
+            "fini": fini,
+        }
+        self.boite.publier(engine.state["T"], infos)
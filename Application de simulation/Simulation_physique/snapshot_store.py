@@ -0,0 +1,279 @@
+"""
+Enregistrement du champ complet sur disque, avec reprise d'une simulation à partir d'un instantané.
+
+À intervalle choisi (en secondes simulées, vérifié à la fin de chaque frame), le champ T et les
+lignes d'historique et de sondes ajoutées depuis l'instantané précédent sont copiés et confiés à
+un fil d'écriture : la boucle de calcul ne fait que ces copies. Le fil les écrit dans des tableaux
+.npy préalloués ouverts en mémoire virtuelle (np.memmap), puis met à jour les métadonnées. La
+mémoire vive et le coût de chaque instantané restent bornés quelle que soit la durée de la simulation.
+
+Si le fil d'écriture a pris du retard (file pleine), la boucle n'attend pas : l'instantané est
+reporté à la fin de la frame suivante. Seul l'instantané de fin de simulation attend sa place.
+
+Contenu du dossier :
+    champs.npy       champs (capacité, Ny, Nx), seuls les n premiers sont valides
+    meta.json        paramètres de la simulation et, par instantané : pas, temps, états on/off,
+                     nombre de lignes d'historique et de lectures des sondes
+    historique.npy   traces T1/T2/T3 par frame (capacité, 3), seules les n_hist premières lignes sont valides
+    sondes.npy       lectures des sondes (capacité, 1 + sondes) : temps puis une colonne par sonde
+
+Chaque instantané contient tout ce qu'il faut pour repartir de ce point (état des sources et
+historiques), de sorte qu'une simulation arrêtée ou interrompue n'a pas à recommencer à t = 0.
+
+Exemple :
+    python simulation_headless.py parametres.json resultats.csv --instantanes run_1500s --intervalle 30
+    python snapshot_store.py liste run_1500s
+    python snapshot_store.py reprendre run_1500s resultats.csv --indice 12
+"""
+
+import argparse
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from thermal_engine import ThermalEngine
+
+
+class SnapshotStore:
+    """Magasin d'instantanés du champ sur disque, écrit par un fil d'arrière-plan."""
+
+    def __init__(self, dossier, meta, mode):
+        self.dossier = dossier
+        self.meta = meta
+        forme = (meta["capacite"], *meta["forme"])
+        self.champs = np.lib.format.open_memmap(
+            os.path.join(dossier, "champs.npy"), mode=mode, dtype=np.dtype(meta["dtype"]), shape=forme
+        )
+        self.historique = np.lib.format.open_memmap(
+            os.path.join(dossier, "historique.npy"), mode=mode, dtype=np.float64, shape=tuple(meta["forme_historique"])
+        )
+        self.sondes = np.lib.format.open_memmap(
+            os.path.join(dossier, "sondes.npy"), mode=mode, dtype=np.float64, shape=tuple(meta["forme_sondes"])
+        )
+        self.prochain_temps = 0.0
+        self._recaler_prochain_temps()
+        # Lignes d'historique et lectures des sondes déjà confiées au fil d'écriture
+        dernier = meta["instantanes"][-1] if meta["instantanes"] else {"n_hist": 0, "n_sondes": 0}
+        self._n_hist, self._n_sondes = dernier["n_hist"], dernier["n_sondes"]
+
+        # File bornée : si le disque est plus lent que le calcul, les instantanés sont reportés au lieu de s'accumuler
+        self._file = queue.Queue(maxsize=4)
+        self._fil = threading.Thread(target=self._ecrire, daemon=True)
+        self._fil.start()
+
+    @classmethod
+    def creer(cls, dossier, engine, intervalle):
+        """Crée un magasin vide pour la simulation du moteur donné (un instantané toutes les intervalle secondes)."""
+        os.makedirs(dossier, exist_ok=True)
+        meta = {
+            "params": engine.params,
+            "intervalle": intervalle,
+            "forme": [engine.Ny, engine.Nx],
+            "dtype": engine.dtype.str,
+            # Un instantané par multiple de l'intervalle atteint (le premier, 0, à la fin de la première frame)
+            # jusqu'au dernier pas simulé, plus celui de la fin
+            "capacite": int(engine.n_pas_fin * engine.dt / intervalle) + 2,
+            # Une ligne d'historique par frame et toutes les lectures des sondes (le tampon en mémoire peut être circulaire)
+            "forme_historique": [engine.n_pas_fin // engine.steps_per_frame + 2, 3],
+            "forme_sondes": [engine.n_pas_fin // engine.sondes.pas + 2, 1 + len(engine.sondes.noms)],
+            "instantanes": [],
+        }
+        return cls(dossier, meta, mode="w+")
+
+    @classmethod
+    def ouvrir(cls, dossier):
+        """Ouvre un magasin existant pour le lire ou le prolonger."""
+        with open(os.path.join(dossier, "meta.json"), "r") as f:
+            meta = json.load(f)
+        return cls(dossier, meta, mode="r+")
+
+    def __len__(self):
+        return len(self.meta["instantanes"])
+
+    def _recaler_prochain_temps(self):
+        """Prochain temps d'enregistrement : le premier multiple de l'intervalle après le dernier instantané."""
+        if self.meta["instantanes"]:
+            dernier = self.meta["instantanes"][-1]["temps"]
+            self.prochain_temps = (np.floor(dernier / self.meta["intervalle"]) + 1) * self.meta["intervalle"]
+        else:
+            self.prochain_temps = 0.0
+
+    def observer(self, engine, fini=False):
+        """Appelé à la fin de chaque frame : enregistre un instantané si l'intervalle est écoulé ou si la simulation est finie."""
+        temps = engine.state["simulation_steps"] * engine.dt
+        if temps >= self.prochain_temps or fini:
+            self.ajouter(engine, fini)
+
+    def ajouter(self, engine, fini=False):
+        """
+        Copie l'état courant du moteur et les lignes ajoutées depuis l'instantané précédent, et les
+        confie au fil d'écriture (fini : dernier état de la simulation). Si le fil a pris du retard,
+        l'instantané est reporté à la frame suivante, sauf le dernier qui attend sa place dans la file.
+        """
+        if len(self) >= self.meta["capacite"]:
+            print("Magasin d'instantanés plein, instantané ignoré")
+            return
+        if self._file.full() and not fini:
+            return  # Fil d'écriture en retard : observer() réessaie à la fin de la frame suivante
+
+        sim_steps = engine.state["simulation_steps"]
+        n_hist = len(engine.T_hist_1)
+        historique = np.column_stack((engine.T_hist_1[self._n_hist:n_hist], engine.T_hist_2[self._n_hist:n_hist],
+                                      engine.T_hist_3[self._n_hist:n_hist]))
+        # Lectures des sondes depuis l'instantané précédent, dans le tampon (éventuellement circulaire) du moteur ;
+        # seules les len(tampon) dernières y sont encore si le tampon a fait le tour entre deux instantanés
+        sondes = engine.sondes
+        n_sondes = sondes.n_echantillons
+        debut_sondes = max(self._n_sondes, n_sondes - len(sondes.temps))
+        lignes = np.arange(debut_sondes, n_sondes) % len(sondes.temps)
+        lectures = np.column_stack((sondes.temps[lignes], sondes.valeurs[lignes]))
+
+        entree = {
+            "pas": sim_steps,
+            "temps": sim_steps * engine.dt,
+            "power_enabled": engine.power_enabled,
+            "perturbation_state": engine.perturbation_state,
+            "n_hist": n_hist,
+            "n_sondes": n_sondes,
+            "fini": fini,
+        }
+        element = (len(self), engine.state["T"].copy(), self._n_hist, historique, debut_sondes, lectures,
+                   [dict(e) for e in self.meta["instantanes"]] + [entree])
+        if fini:
+            self._file.put(element)
+        else:
+            self._file.put_nowait(element)  # Une seule boucle de calcul remplit la file : la place vue plus haut est libre
+        self.meta["instantanes"].append(entree)
+        self._n_hist, self._n_sondes = n_hist, n_sondes
+        self._recaler_prochain_temps()
+
+    def _ecrire(self):
+        """Fil d'écriture : champ dans le memmap, historiques, puis métadonnées (remplacées d'un bloc)."""
+        while True:
+            element = self._file.get()
+            if element is None:
+                self._file.task_done()
+                return
+            indice, T, debut_hist, historique, debut_sondes, lectures, instantanes = element
+            self.champs[indice] = T
+            self.champs.flush()
+            self._ecrire_lignes(self.historique, debut_hist, historique)
+            self._ecrire_lignes(self.sondes, debut_sondes, lectures)
+            meta = dict(self.meta, instantanes=instantanes)
+            chemin = os.path.join(self.dossier, "meta.json")
+            with open(chemin + ".tmp", "w") as f:
+                json.dump(meta, f, indent=1)
+            os.replace(chemin + ".tmp", chemin)  # Les métadonnées ne décrivent que des champs déjà écrits
+            self._file.task_done()
+
+    @staticmethod
+    def _ecrire_lignes(tableau, debut, lignes):
+        """Écrit lignes dans le memmap à partir de la ligne debut (au-delà de la capacité, les lignes sont perdues)."""
+        n = max(0, min(len(lignes), len(tableau) - debut))
+        if n < len(lignes):
+            print(f"{os.path.basename(tableau.filename)} plein, {len(lignes) - n} lignes ignorées")
+        tableau[debut:debut + n] = lignes[:n]
+        tableau.flush()
+
+    def vider(self):
+        """Attend que tous les instantanés en file soient écrits."""
+        self._file.join()
+
+    def fermer(self):
+        """Écrit les instantanés en attente et arrête le fil d'écriture."""
+        self._file.put(None)
+        self._fil.join()
+
+    def temps(self):
+        """Temps (s) de chaque instantané enregistré."""
+        return np.array([e["temps"] for e in self.meta["instantanes"]])
+
+    def champ(self, indice):
+        """Retourne le champ (Ny, Nx) de l'instantané donné (vue sur le fichier)."""
+        return self.champs[range(len(self))[indice]]
+
+    def restaurer(self, engine, indice=-1):
+        """
+        Remet le moteur dans l'état de l'instantané donné (champ, sources, historiques, sondes).
+        Les instantanés suivants sont oubliés : ils seront réécrits par la suite de la simulation.
+        """
+        self.vider()
+        indice = range(len(self))[indice]
+        entree = self.meta["instantanes"][indice]
+
+        attache, engine.instantanes = engine.instantanes, None  # reinitialiser fermerait le magasin
+        engine.reinitialiser()
+        engine.instantanes = attache
+        T = np.array(self.champs[indice], dtype=engine.dtype)
+        engine.state["T"] = T
+        engine.state["T_new"] = T.copy()
+        engine.state["simulation_steps"] = entree["pas"]
+        engine.power_enabled = entree["power_enabled"]
+        engine.perturbation_state = entree["perturbation_state"]
+        engine._mettre_a_jour_sources()
+
+        historique = self.historique[:entree["n_hist"]]
+        for colonne, hist in enumerate((engine.T_hist_1, engine.T_hist_2, engine.T_hist_3)):
+            hist.extend(historique[:, colonne].tolist())
+        # Lectures des sondes faites avant l'instantané, remises à leur place dans le tampon (éventuellement circulaire)
+        sondes = engine.sondes
+        n_sondes = entree["n_sondes"]
+        numeros = np.arange(max(0, n_sondes - len(sondes.temps)), n_sondes)
+        sondes.temps[numeros % len(sondes.temps)] = self.sondes[numeros, 0]
+        sondes.valeurs[numeros % len(sondes.temps)] = self.sondes[numeros, 1:]
+        sondes.n_echantillons = n_sondes
+
+        del self.meta["instantanes"][indice + 1:]
+        self._n_hist, self._n_sondes = entree["n_hist"], n_sondes
+        self._recaler_prochain_temps()
+
+
+def reprendre(dossier, indice=-1):
+    """
+    Recrée le moteur d'une simulation enregistrée et le place à l'instantané donné ;
+    les instantanés suivants continuent d'être écrits dans le même dossier.
+    """
+    magasin = SnapshotStore.ouvrir(dossier)
+    engine = ThermalEngine(params=magasin.meta["params"])
+    magasin.restaurer(engine, indice)
+    engine.instantanes = magasin
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Instantanés du champ de température : liste et reprise.")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+    liste = commandes.add_parser("liste", help="Liste les instantanés d'un dossier")
+    liste.add_argument("dossier")
+    suite = commandes.add_parser("reprendre", help="Reprend la simulation à partir d'un instantané")
+    suite.add_argument("dossier")
+    suite.add_argument("sortie", help="Fichier CSV des traces de toute la simulation")
+    suite.add_argument("--indice", type=int, default=-1, help="Instantané de départ (défaut : le dernier)")
+    args = parser.parse_args(argv)
+
+    if args.commande == "liste":
+        magasin = SnapshotStore.ouvrir(args.dossier)
+        for indice, entree in enumerate(magasin.meta["instantanes"]):
+            print(f"{indice:4d}  t = {entree['temps']:10.2f} s  (pas {entree['pas']})")
+        magasin.fermer()
+        return
+
+    engine = reprendre(args.dossier, args.indice)
+    if engine.instantanes.meta["instantanes"][-1]["fini"]:
+        print("Cet instantané est la fin de la simulation : rien à reprendre")
+    else:
+        print(f"Reprise à t = {engine.state['simulation_steps'] * engine.dt:.2f} s")
+        debut = time.perf_counter()
+        engine.executer()
+        print(f"Simulation terminée en {time.perf_counter() - debut:.2f} s")
+    engine.instantanes.fermer()
+    engine.ecrire_csv(args.sortie)
+    print(f"Fichier sauvegardé: {args.sortie}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Solveur direct du régime stationnaire de la plaque.
+
+Le même opérateur discret que les noyaux de ThermalEngine (conduction avec la bande de densité
+modifiée, convection latérale et des faces vers l'ambiant, sources du TEC et de la perturbation)
+est assemblé en un système creux A T = -b. Sa factorisation LU est calculée une seule fois :
+changer seulement l'intensité des sources ne coûte qu'une paire de substitutions.
+
+Exemple :
+    python steady_state.py parametres.json --champ champ_stationnaire.csv
+"""
+
+import argparse
+import time
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.linalg import splu
+
+from thermal_engine import ThermalEngine
+
+
+def assembler_operateur(engine):
+    """
+    Assemble la matrice creuse A (cellules actives seulement) telle que dT/dt = A T + b.
+    Retourne (A au format CSC, tableau des indices des cellules actives de forme (Ny, Nx), -1 ailleurs).
+    """
+    Ny, Nx = engine.Ny, engine.Nx
+    indices = -np.ones((Ny, Nx), dtype=np.int64)
+    n_actifs = (Ny - 2) * (Nx - 2)
+    indices[1:Ny-1, 1:Nx-1] = np.arange(n_actifs).reshape(Ny - 2, Nx - 2)
+
+    centre = indices[1:Ny-1, 1:Nx-1]
+    lignes, colonnes, valeurs = [centre.ravel()], [centre.ravel()], []
+    diagonale = -engine.taux_convection[1:Ny-1, 1:Nx-1].copy()
+    for taux, di, dj in ((engine.taux_ouest, 0, -1), (engine.taux_est, 0, 1),
+                         (engine.taux_sud, -1, 0), (engine.taux_nord, 1, 0)):
+        t = taux[1:Ny-1, 1:Nx-1]
+        voisin = indices[1+di:Ny-1+di, 1+dj:Nx-1+dj]
+        masque = t > 0
+        lignes.append(centre[masque])
+        colonnes.append(voisin[masque])
+        valeurs.append(t[masque])
+        diagonale -= t
+    valeurs.insert(0, diagonale.ravel())
+
+    A = coo_matrix(
+        (np.concatenate(valeurs), (np.concatenate(lignes), np.concatenate(colonnes))),
+        shape=(n_actifs, n_actifs), dtype=np.float64  # La factorisation reste en double précision
+    )
+    return A.tocsc(), indices
+
+
+class SteadyStateSolver:
+    """Calcule le champ stationnaire d'une plaque ; la factorisation est réutilisée d'une résolution à l'autre."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        debut = time.perf_counter()
+        self.A, self.indices = assembler_operateur(engine)
+        self.lu = splu(self.A)
+        self.temps_factorisation = time.perf_counter() - debut
+
+    def sources(self, tec=1, pertu=1, puissance_tec=None, puissance_pertu=None):
+        """
+        Construit le champ de puissance volumique P (W/m^3) comme le fait le moteur.
+        Par défaut les puissances sont celles du JSON (courant, couplage et puissance de la perturbation).
+        """
+        e = self.engine
+        if puissance_tec is None:
+            puissance_tec = e.couplage_thermique * e.initial_P_in
+        P_perturbation = e.P_perturbation if puissance_pertu is None else puissance_pertu / e.volume_perturbation
+        P = np.zeros((e.Ny, e.Nx))
+        P[e.yl_start:e.yl_end, e.xl_start:e.xl_end] = tec * puissance_tec / e.surface_source
+        P[e.y_perturbation, e.x_perturbation] = pertu * P_perturbation
+        return P
+
+    def resoudre(self, P=None, T_ambiant=None):
+        """
+        Résout A T = -b pour le champ de puissance P (défaut : TEC et perturbation allumés).
+        Retourne le champ (Ny, Nx) ; le pourtour fantôme est mis à la température ambiante.
+        """
+        e = self.engine
+        P = self.sources() if P is None else P
+        T_ambiant = e.T_ambiant if T_ambiant is None else T_ambiant
+        Ny, Nx = e.Ny, e.Nx
+
+        b = e.taux_source * (P + e.P_mouse) + e.taux_convection * T_ambiant
+        T_actif = self.lu.solve(-b[1:Ny-1, 1:Nx-1].ravel())
+
+        T = np.full((Ny, Nx), float(T_ambiant))
+        T[1:Ny-1, 1:Nx-1] = T_actif.reshape(Ny - 2, Nx - 2)
+        return T
+
+    def thermistances(self, T):
+        """Retourne les lectures des thermistances dans le champ T."""
+        return [T[pos] for pos in self.engine.thermistances_pos]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Régime stationnaire de la plaque par résolution creuse directe.")
+    parser.add_argument("parametres", help="Fichier JSON de paramètres")
+    parser.add_argument("--champ", default=None, help="Fichier CSV où écrire le champ stationnaire (lignes = y)")
+    args = parser.parse_args(argv)
+
+    solveur = SteadyStateSolver(ThermalEngine(args.parametres))
+    debut = time.perf_counter()
+    T = solveur.resoudre()
+    duree = time.perf_counter() - debut
+
+    print(f"Factorisation : {solveur.temps_factorisation * 1e3:.1f} ms, résolution : {duree * 1e3:.1f} ms")
+    for numero, valeur in enumerate(solveur.thermistances(T), start=1):
+        print(f"T{numero} = {valeur:.4f} °C")
+    if args.champ:
+        np.savetxt(args.champ, T, delimiter=',', fmt='%.4f')
+        print(f"Fichier sauvegardé: {args.champ}")
+
+
+if __name__ == "__main__":
+    main()
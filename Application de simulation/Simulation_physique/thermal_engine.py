@@ -0,0 +1,1023 @@
+import numpy as np
+import json
+import os
+import time
+from numba import njit, prange
+from ToggleManager import ToggleManager
+from chronometres import ChronometresFrames
+from graded_mesh import largeurs_graduees
+from probes import ProbeSet, echantillonner_sondes
+
+# Les noyaux compilés sont gardés sur disque (dossier __pycache__ ou NUMBA_CACHE_DIR) : seul le premier
+# lancement paie la compilation. Numba ne garde un cache que si le fichier source existe ; s'il est
+# absent (exécutable construit sans SimulationPhysique.spec), on compile en mémoire à chaque lancement.
+# nogil : les noyaux libèrent le GIL, l'interface reste fluide pendant que simulation_worker.py calcule.
+CACHE_JIT = os.path.isfile(__file__)
+
+
+@njit(inline='always', cache=CACHE_JIT)
+def _sources_et_faces(val, T_ij, coef_src, coef_conv, P_perm, P_mouse, T_piece, aire_top):
+    """Ajoute l'injection des sources et la convection des faces supérieure/inférieure."""
+    val += coef_src * (P_perm + P_mouse)
+    val += coef_conv * (T_piece - T_ij) * 2 * aire_top
+    return val
+
+
+class ThermalEngine:
+    """
+    Moteur de simulation thermique 2D sans aucune dépendance graphique (ni Qt, ni matplotlib).
+    Contient la physique, les noyaux Numba et la boucle de temps ; les interfaces graphiques
+    et l'exécution en ligne de commande sont construites par-dessus.
+    """
+
+    def __init__(self, param_file_path="parametres.json", params=None):
+        """
+        Charge les paramètres depuis le JSON et initialise la simulation.
+        Un dictionnaire déjà chargé (même structure que le JSON) peut être passé via params.
+        """
+
+        #Chargement des paramètres
+        if params is not None:
+            self.params = params
+        else:
+            with open(param_file_path, 'r') as file:
+                self.params = json.load(file)
+        
+        #Paramètres physiques
+        self.Lx_phys = self.params['dimensions']['Lx']         # Taille physique en x de la plaque en mètres
+        self.Ly_phys = self.params['dimensions']['Ly']         # Taille physique en y de la plaque en mètres
+        self.thickness = self.params['dimensions']['e']        # Épaisseur de la plaque en mètres (axe z)
+        self.steps_total = float(self.params['simulation_parameters']['sim_duration'])                        # Nombre total d'étapes de simulation
+        
+        # Propriétés du matériau
+        self.k = self.params['material_properties']['k']       # Conductivité thermique [W/m·K]
+        self.rho = self.params['material_properties']['rho']   # Densité [kg/m^3]
+        self.cp = self.params['material_properties']['cp']     # Chaleur spécifique [J/kg·K]
+        self.alphanormal = self.k / (self.rho * self.cp)             # Diffusivité thermique [m^2/s]
+        self.diff_de_densite = self.params['material_properties'].get('diff_de_densite', 0.80)  # Rapport de densité de la bande défectueuse
+        
+        # Définition de la résolution (nombre d'éléments sur le côté le plus petit)
+        self.resolution = self.params['simulation_parameters']['res_spatiale']
+        if self.Lx_phys < self.Ly_phys:
+            self.dx = self.Lx_phys / self.resolution
+            self.dy = self.dx
+            self.Nx = self.resolution
+            self.Ny = round(self.Ly_phys / self.dy)
+        else:
+            self.dy = self.Ly_phys / self.resolution
+            self.dx = self.dy
+            self.Nx = round(self.Lx_phys / self.dx)
+            self.Ny = self.resolution
+
+        # Maillage : "uniforme" (dx = dy partout) ou "raffine" (taille dx près du TEC, de la bande
+        # défectueuse, des thermistances et de la perturbation, cellules plus grosses ailleurs)
+        self.maillage = self.params['simulation_parameters'].get('maillage', 'uniforme')
+        if self.maillage not in ("uniforme", "raffine"):
+            raise ValueError(f"Maillage inconnu : {self.maillage}")
+        if self.maillage == "raffine":
+            self._construire_maillage_raffine()
+            # Bande défectueuse : les deux rangées fines de part et d'autre du milieu de la plaque
+            self.lignes_bande = np.nonzero(np.abs(self.centres_y - self.Ly_phys / 2) < self.dy)[0]
+        else:
+            # Largeurs, distances entre centres et positions des cellules le long de chaque axe
+            self.largeurs_x = np.full(self.Nx, self.dx)
+            self.largeurs_y = np.full(self.Ny, self.dy)
+            self.distances_x = np.full(self.Nx - 1, self.dx)
+            self.distances_y = np.full(self.Ny - 1, self.dy)
+            self.centres_x = np.arange(self.Nx) * self.dx
+            self.centres_y = np.arange(self.Ny) * self.dy
+            self.lignes_bande = range(round((self.Ny/2)-1), round((self.Ny/2))+1)
+
+        #définir rho comme une matrice
+        self.rhomatrice = np.ones((self.Ny,self.Nx)) * self.rho
+        #self.rhomatrice = np.full((self.Ny, self.Nx), self.rho)
+
+        for i in self.lignes_bande:
+            for j in prange(1, self.Nx-1):
+                self.rhomatrice[i,j] = self.rho * self.diff_de_densite
+        
+        #définir alpha comme une matrice
+        #self.alphamatrice = np.ones((self.Ny,self.Nx))
+        self.alphamatrice = np.full((self.Ny, self.Nx), self.alphanormal)
+        self.alphamodif = self.k / (self.rho * self.diff_de_densite * self.cp)
+
+        for i in self.lignes_bande:
+            for j in prange(1, self.Nx-1):
+                self.alphamatrice[i,j] = self.alphamodif
+
+        
+        
+
+        if self.maillage == "raffine":
+            print(f"nx = {self.Nx}, ny = {self.Ny}, dx de {self.largeurs_x.min():.4g} à {self.largeurs_x.max():.4g}, "
+                  f"dy de {self.largeurs_y.min():.4g} à {self.largeurs_y.max():.4g}")
+        else:
+            print(f"nx = {self.Nx}, ny = {self.Ny}, dx = dy = {self.dx}")
+        
+        # Paramètres de convection
+        self.aire_sides_up_down = self.dx * self.thickness     # Aire latérale pour les côtés haut/bas
+        self.aire_sides_left_right = self.dy * self.thickness  # Aire latérale pour les côtés gauche/droite
+        self.aire_top = self.dx * self.dy                       # Aire d'une face du dessus ou du dessous
+        self.volume = self.dx * self.dy * self.thickness        # Volume d'un élément
+        self.h_conv = self.params['boundary_conditions']['h']   # Coefficient de convection [W/m^2·K]
+        
+        # Position de la source
+        self.x_source = self.params['TEC']['x_source']          # Position de la source en x en mètres
+        self.y_source = self.params['TEC']['y_source']          # Position de la source en y en mètres
+        self.x_source_idx = round(self.x_source / self.dx)
+        self.y_source_idx = round(self.y_source / self.dy)
+
+        # Largeur de la source
+        self.Lx_source = self.params['TEC']['Lx_source']
+        self.Ly_source = self.params['TEC']['Ly_source']
+        self.Nx_source = round(self.Lx_source / self.dx)
+        self.Ny_source = round(self.Ly_source / self.dy)
+        
+        self.xl_start = self.x_source_idx - self.Nx_source // 2
+        self.xl_end = self.x_source_idx + self.Nx_source // 2 + 1
+        self.yl_start = self.y_source_idx - self.Ny_source // 2
+        self.yl_end = self.y_source_idx + self.Ny_source // 2 + 1
+
+        if self.maillage == "raffine":
+            # Cellules dont le centre est dans l'empreinte du TEC
+            self.xl_start, self.xl_end = np.searchsorted(
+                self.centres_x, [self.x_source - self.Lx_source / 2, self.x_source + self.Lx_source / 2])
+            self.yl_start, self.yl_end = np.searchsorted(
+                self.centres_y, [self.y_source - self.Ly_source / 2, self.y_source + self.Ly_source / 2])
+            self.surface_source = (self.largeurs_x[self.xl_start:self.xl_end].sum()
+                                   * self.largeurs_y[self.yl_start:self.yl_end].sum() * self.thickness)
+        else:
+            self.surface_source = (self.xl_end - self.xl_start) * (self.yl_end - self.yl_start) * self.dx * self.dy * self.thickness
+
+        # Échelon de courant ou puissance permanente
+        self.courant = self.params['TEC']['courant']
+        self.initial_P_in = 0.3123 * (self.courant ** 2) + 1.0217 * self.courant 
+        self.couplage_thermique = self.params['TEC']['couplage']
+        
+        # Gestion de la perturbation
+        self.P_in_perturbation = self.params['perturbation_properties']['power']
+        self.x_perturbation = self._indice_x(self.params['perturbation_properties']['pos_x'])
+        self.y_perturbation = self._indice_y(self.params['perturbation_properties']['pos_y'])
+        if self.maillage == "raffine":
+            self.volume_perturbation = self.largeurs_x[self.x_perturbation] * self.largeurs_y[self.y_perturbation] * self.thickness
+        else:
+            self.volume_perturbation = self.dx * self.dy * self.thickness
+        self.P_perturbation = self.P_in_perturbation / self.volume_perturbation
+
+        # Pour être cohérent avec l'affichage (axe horizontal = x, vertical = y),
+        # les tableaux sont de forme (Ny, Nx)
+        self.P_perm = np.zeros((self.Ny, self.Nx))
+        self.P_perm[self.yl_start:self.yl_end, self.xl_start:self.xl_end] = (
+            (self.couplage_thermique * self.initial_P_in) / self.surface_source
+        )
+
+        #Gestion des thermistances
+        #Thermistance 1
+        pos_t1_x = self.params['thermistances']['pos_t1_x']
+        pos_t1_y = self.params['thermistances']['pos_t1_y']
+        pos_t2_x = self.params['thermistances']['pos_t2_x']
+        pos_t2_y = self.params['thermistances']['pos_t2_y']
+        pos_t3_x = self.params['thermistances']['pos_t3_x']
+        pos_t3_y = self.params['thermistances']['pos_t3_y']
+
+        # Indices sur la grille
+        self.thermistances_pos = [
+            (self._indice_y(pos_t1_y), self._indice_x(pos_t1_x)),
+            (self._indice_y(pos_t2_y), self._indice_x(pos_t2_x)),
+            (self._indice_y(pos_t3_y), self._indice_x(pos_t3_x))
+        ]
+
+        
+        self.P_mouse = np.zeros((self.Ny, self.Nx))
+
+        # Calcul du pas temporel
+        dt_y_normal = self.dy ** 2 / (8 * self.alphanormal)
+        dt_x_normal = self.dx ** 2 / (8 * self.alphanormal)
+        dt_y_modifier = self.dy ** 2 / (8 * self.alphamodif)
+        dt_x_modifier = self.dx ** 2 / (8 * self.alphamodif)
+        self.dt = min([dt_x_normal, dt_y_normal, dt_y_modifier, dt_x_modifier])
+
+        # Modèle continu en temps (ne dépend pas de dt)
+        self._calculer_taux()
+        if self.maillage == "raffine":
+            # Même marge que sur la grille uniforme (dx²/(8 alpha) = 1 / (2 * somme des taux de conduction)),
+            # mais cellule par cellule
+            somme_taux = self.taux_ouest + self.taux_est + self.taux_sud + self.taux_nord
+            self.dt = 1.0 / (2 * somme_taux.max())
+
+        # Choix du solveur : "explicite" (pas limité par la stabilité), "adi" (implicite, dt libre)
+        # ou "expo" (intégrateur exponentiel, sauts exacts d'un événement au suivant)
+        self.solveur = self.params['simulation_parameters'].get('solveur', 'explicite')
+        if self.solveur not in ("explicite", "adi", "expo"):
+            raise ValueError(f"Solveur inconnu : {self.solveur}")
+        if self.solveur in ("adi", "expo"):
+            # Ces solveurs sont inconditionnellement stables : dt est choisi pour la précision
+            # (pour "expo", dt ne fixe que la grille des événements et de l'échantillonnage)
+            self.dt = self.params['simulation_parameters'].get('dt', 0.1)
+        print(f"Pas temporel choisi (dt): {self.dt}")
+
+        # Choix du noyau de calcul : "precalcule" (sans branchement) ou "original" (chaîne if/elif)
+        self.noyau = self.params['simulation_parameters'].get('noyau', 'precalcule')
+        if self.noyau not in ("precalcule", "original"):
+            raise ValueError(f"Noyau de calcul inconnu : {self.noyau}")
+
+        # Précision des champs : "float64" (défaut) ou "float32" (deux fois moins d'octets par cellule
+        # pour des noyaux limités par la bande passante mémoire)
+        self.precision = self.params['simulation_parameters'].get('precision', 'float64')
+        if self.precision not in ("float64", "float32"):
+            raise ValueError(f"Précision inconnue : {self.precision}")
+        self.dtype = np.dtype(self.precision)
+
+        self._precalculer_coefficients()
+        if self.solveur == "adi":
+            self._precalculer_adi()
+        if self.solveur == "expo":
+            from exponential_integrator import ExponentialIntegrator
+            self.integrateur = ExponentialIntegrator(self)
+        self._appliquer_precision()
+
+        self._preparer_calendrier()
+
+        # Initialisation de la température
+        self.T_piece = 150 #self.params['boundary_conditions']['T_piece']
+        T_init = np.full((self.Ny, self.Nx), self.T_piece, dtype=self.dtype) # Tableau de température (lignes = y, colonnes = x)
+
+        # État initial de la simulation
+        self.state = {
+            "T": T_init.copy(),
+            "T_new": T_init.copy(),
+            "simulation_steps": 0
+        }
+
+        # Variables globales de contrôle
+        self.power_enabled = 0  # Active/désactive la source permanente
+        self.perturbation_state = 0  # État de la perturbation (0 = off, 1 = on)
+        self.T_ambiant = 23  # Température ambiante vue par la convection
+
+        # Nombre de pas de simulation par frame d’animation
+        self.steps_per_frame = self.params['simulation_parameters']['res_temporelle']
+
+        # Historique de température
+        self.T_hist_1, self.T_hist_2, self.T_hist_3 = [], [], []
+
+        # Sondes nommées, lues par interpolation à leur propre fréquence d'échantillonnage
+        self.sondes = ProbeSet(self)
+
+        # Instantanés du champ sur disque : {"dossier": ..., "intervalle": secondes}, désactivé par défaut
+        self.config_instantanes = self.params['simulation_parameters'].get('instantanes')
+        self.instantanes = None
+
+        # Détection du régime stationnaire : arrêt lorsque max|dT/dt| < tolérance (°C/s), 0 = désactivé
+        self.tolerance_stationnaire = self.params['simulation_parameters'].get('arret_stationnaire', 0.0)
+        self.bande_stabilisation = self.params['simulation_parameters'].get('bande_stabilisation', 0.1)  # °C
+        self.vitesse_max = float('inf')  # Dernière valeur du moniteur de convergence (°C/s)
+        self.arret_anticipe = False
+
+        # Chronomètres par phase (éteints par défaut), voir chronometres.py
+        self.chronometres = ChronometresFrames()
+
+        # Préparer la Numba JIT compilation afin de ne pas avoir de délai lorsqu'on commence la simulation
+        dummy_T = self.state["T"].copy()
+        dummy_T_new = self.state["T_new"].copy()
+        _ = self._pas_temperature(dummy_T, dummy_T_new, self.T_piece)
+        if self._frame_compilee():
+            # Zéro pas : compile seulement le noyau multi-pas sans toucher à l'état
+            _ = self._appel_fusionne(0)
+
+    def _construire_maillage_raffine(self):
+        """
+        Construit le maillage gradué : cellules de taille dx (celle de la grille uniforme) près des zones
+        d'intérêt, jusqu'à facteur * dx ailleurs. Options lues dans simulation_parameters.raffinement :
+        facteur (défaut 4), croissance d'une cellule à la suivante (défaut 1.2) et marge autour des
+        zones fines en mètres (défaut 4 * dx). Une cellule fantôme est ajoutée de chaque côté.
+        """
+        options = self.params['simulation_parameters'].get('raffinement', {})
+        h = self.dx
+        facteur = options.get('facteur', 4)
+        croissance = options.get('croissance', 1.2)
+        marge = options.get('marge', 4 * h)
+
+        tec = self.params['TEC']
+        pertu = self.params['perturbation_properties']
+        therm = self.params['thermistances']
+        zones_x = [(tec['x_source'] - tec['Lx_source'] / 2 - marge, tec['x_source'] + tec['Lx_source'] / 2 + marge),
+                   (pertu['pos_x'] - marge, pertu['pos_x'] + marge)]
+        zones_y = [(tec['y_source'] - tec['Ly_source'] / 2 - marge, tec['y_source'] + tec['Ly_source'] / 2 + marge),
+                   (pertu['pos_y'] - marge, pertu['pos_y'] + marge),
+                   (self.Ly_phys / 2 - h - marge, self.Ly_phys / 2 + h + marge)]
+        for numero in (1, 2, 3):
+            zones_x.append((therm[f'pos_t{numero}_x'] - marge, therm[f'pos_t{numero}_x'] + marge))
+            zones_y.append((therm[f'pos_t{numero}_y'] - marge, therm[f'pos_t{numero}_y'] + marge))
+
+        # En y, le réseau fin passe par le milieu de la plaque pour que la bande tombe sur deux rangées
+        actives_x = largeurs_graduees(self.Lx_phys, h, facteur, croissance, zones_x,
+                                      ancre=tec['x_source'] - tec['Lx_source'] / 2)
+        actives_y = largeurs_graduees(self.Ly_phys, h, facteur, croissance, zones_y, ancre=self.Ly_phys / 2)
+
+        for axe, actives in (("x", actives_x), ("y", actives_y)):
+            largeurs = np.concatenate(([actives[0]], actives, [actives[-1]]))
+            centres = np.cumsum(largeurs) - largeurs / 2 - actives[0]
+            setattr(self, f"largeurs_{axe}", largeurs)
+            setattr(self, f"centres_{axe}", centres)
+            setattr(self, f"distances_{axe}", np.diff(centres))
+        self.Nx = len(self.largeurs_x)
+        self.Ny = len(self.largeurs_y)
+
+    def _indice_x(self, x):
+        """Indice de la colonne qui contient la position x (m)."""
+        if self.maillage == "raffine":
+            return int(np.argmin(np.abs(self.centres_x - x)))
+        return round(x / self.dx)
+
+    def _indice_y(self, y):
+        """Indice de la rangée qui contient la position y (m)."""
+        if self.maillage == "raffine":
+            return int(np.argmin(np.abs(self.centres_y - y)))
+        return round(y / self.dy)
+
+    def _frame_compilee(self):
+        """Vrai si les frames passent par le noyau multi-pas compilé (explicite précalculé sur grille uniforme)."""
+        return self.solveur == "explicite" and self.noyau == "precalcule" and self.maillage == "uniforme"
+
+    def definir_dt(self, dt):
+        """Change le pas de temps et recalcule tout ce qui en dépend (coefficients et moments d'inversion)."""
+        self.dt = dt
+        self._precalculer_coefficients()
+        if self.solveur == "adi":
+            self._precalculer_adi()
+        self._appliquer_precision()
+        self._preparer_calendrier()
+        self.sondes.allouer()
+
+    def definir_duree(self, duree):
+        """Change la durée simulée (sim_duration) et recalcule ce qui en dépend (fin, moments d'inversion, sondes)."""
+        self.steps_total = float(duree)
+        self._preparer_calendrier()
+        self.sondes.allouer()
+
+    def _appliquer_precision(self):
+        """
+        Convertit à la précision choisie tous les tableaux lus par les noyaux (matériau, sources,
+        coefficients, taux et facteurs ADI). Les coefficients sont calculés d'abord, puis arrondis une fois.
+        """
+        noms = ("rhomatrice", "alphamatrice", "P_perm", "P_mouse",
+                "coef_source", "coef_convection", "coef_voisins_interieur", "coef_voisins_bord",
+                "taux_ouest", "taux_est", "taux_sud", "taux_nord", "taux_convection", "taux_source",
+                "adi_bas_x", "adi_haut_x", "adi_inv_x", "adi_bas_y", "adi_haut_y", "adi_inv_y",
+                "T_demi", "adi_tampon")
+        for nom in noms:
+            if hasattr(self, nom):
+                setattr(self, nom, getattr(self, nom).astype(self.dtype, copy=False))
+
+    def _preparer_calendrier(self):
+        """
+        Convertit les moments d'inversion du TEC et de la perturbation en pas de simulation,
+        et en tableaux de bascules par pas utilisés par le noyau multi-pas compilé.
+        """
+        self.TEC_momment_inversion = ToggleManager(self.params['TEC']['TEC_momment_inversion'], self.dt)  # Temps d'activation de la source
+        self.PERTU_momment_inversion = ToggleManager(self.params['perturbation_properties']['PERTU_momment_inversion'], self.dt)  # Temps d'activation de la source
+        n_steps = int(self.steps_total / self.dt) + 2  # Couvre tous les pas jusqu'au test de fin
+        # Premier pas où le test de fin (sim_steps * dt > durée) est vrai
+        self.n_pas_fin = int(self.steps_total / self.dt)
+        while self.n_pas_fin * self.dt <= self.steps_total:
+            self.n_pas_fin += 1
+        self.calendrier_tec = self.TEC_momment_inversion.calendrier(n_steps)
+        self.calendrier_pertu = self.PERTU_momment_inversion.calendrier(n_steps)
+
+    def _precalculer_coefficients(self):
+        """
+        Calcule une seule fois les coefficients par cellule utilisés par le noyau sans branchement.
+        Les expressions sont identiques à celles de _update_temperature (même ordre des opérations)
+        afin que les deux noyaux donnent exactement les mêmes résultats.
+        """
+        # Mise à l'échelle des sources : dt / (rho * cp)
+        self.coef_source = self.dt / (self.rhomatrice * self.cp)
+        # Convection vers l'ambiant : (dt / (rho * cp)) * h / volume
+        self.coef_convection = self.coef_source * self.h_conv / self.volume
+        # Poids des voisins à l'intérieur (divisé par dx*dy dans le noyau) : (dt / (rho * cp)) * k
+        self.coef_voisins_interieur = self.coef_source * self.k
+        # Poids des voisins sur les bords et les coins : dt * alpha / (dx * dy)
+        self.coef_voisins_bord = (self.dt * self.alphamatrice) / (self.dx * self.dy)
+
+    def _calculer_taux(self):
+        """
+        Écrit le modèle de la plaque sous forme continue en temps, dT/dt = A T + b, cellule par cellule :
+        taux de conduction vers chaque voisin (nuls vers les cellules fantômes du pourtour), taux de
+        convection vers l'ambiant (faces + côtés exposés, mêmes aires que le noyau explicite) et
+        facteur 1/(rho*cp) appliqué aux sources. Utilisé par les solveurs qui assemblent l'opérateur.
+        """
+        Ny, Nx = self.Ny, self.Nx
+        rho_cp = self.rhomatrice * self.cp
+        actif = np.zeros((Ny, Nx), dtype=bool)
+        actif[1:Ny-1, 1:Nx-1] = True
+
+        # Conduction : alpha / (largeur de la cellule * distance au centre du voisin), soit alpha/(dx*dy) sur grille uniforme
+        alpha = self.alphamatrice
+        largeur_x, largeur_y = self.largeurs_x[None, :], self.largeurs_y[:, None]
+        self.taux_ouest = np.zeros((Ny, Nx))
+        self.taux_ouest[:, 1:] = alpha[:, 1:] / (largeur_x[:, 1:] * self.distances_x[None, :])
+        self.taux_est = np.zeros((Ny, Nx))
+        self.taux_est[:, :-1] = alpha[:, :-1] / (largeur_x[:, :-1] * self.distances_x[None, :])
+        self.taux_sud = np.zeros((Ny, Nx))
+        self.taux_sud[1:, :] = alpha[1:, :] / (largeur_y[1:, :] * self.distances_y[:, None])
+        self.taux_nord = np.zeros((Ny, Nx))
+        self.taux_nord[:-1, :] = alpha[:-1, :] / (largeur_y[:-1, :] * self.distances_y[:, None])
+        for taux in (self.taux_ouest, self.taux_est, self.taux_sud, self.taux_nord):
+            taux[~actif] = 0.0
+        self.taux_ouest[:, 1] = 0.0
+        self.taux_est[:, Nx-2] = 0.0
+        self.taux_sud[1, :] = 0.0
+        self.taux_nord[Ny-2, :] = 0.0
+
+        # Convection : deux faces, plus les côtés exposés des cellules du pourtour actif
+        aire_top = largeur_y * largeur_x
+        aire_conv = 2 * aire_top
+        aire_conv[1, 1:Nx-1] += self.largeurs_x[1:Nx-1] * self.thickness
+        aire_conv[Ny-2, 1:Nx-1] += self.largeurs_x[1:Nx-1] * self.thickness
+        aire_conv[1:Ny-1, 1] += self.largeurs_y[1:Ny-1] * self.thickness
+        aire_conv[1:Ny-1, Nx-2] += self.largeurs_y[1:Ny-1] * self.thickness
+        volume = aire_top * self.thickness
+        self.taux_convection = np.where(actif, self.h_conv * aire_conv / (rho_cp * volume), 0.0)
+        self.taux_source = 1.0 / rho_cp
+
+    def _precalculer_adi(self):
+        """
+        Prépare le schéma ADI (Peaceman-Rachford) : factorisation des systèmes tridiagonaux
+        de chaque ligne et colonne. Les matrices ne dépendent pas du temps, on les factorise donc une seule fois.
+        """
+        Ny, Nx = self.Ny, self.Nx
+
+        # Factorisation de Thomas : (I - dt/2 * A) avec la moitié de la convection dans chaque direction
+        demi_dt = self.dt / 2
+        demi_conv = self.taux_convection / 2
+        self.adi_bas_x, self.adi_haut_x, self.adi_inv_x = self._factoriser_tridiagonal(
+            -demi_dt * self.taux_ouest, 1 + demi_dt * (self.taux_ouest + self.taux_est + demi_conv),
+            -demi_dt * self.taux_est, axe=1
+        )
+        self.adi_bas_y, self.adi_haut_y, self.adi_inv_y = self._factoriser_tridiagonal(
+            -demi_dt * self.taux_sud, 1 + demi_dt * (self.taux_sud + self.taux_nord + demi_conv),
+            -demi_dt * self.taux_nord, axe=0
+        )
+        self.T_demi = np.zeros((Ny, Nx))
+        self.adi_tampon = np.zeros((Ny, Nx))
+
+    def _factoriser_tridiagonal(self, bas, diag, haut, axe):
+        """
+        Élimination de Thomas faite d'avance pour tous les systèmes le long de l'axe donné.
+        Retourne la sous-diagonale, la sur-diagonale modifiée et l'inverse des pivots.
+        """
+        bas, diag, haut = (np.moveaxis(a, axe, 1).copy() for a in (bas, diag, haut))
+        n = bas.shape[1]
+        haut_mod = np.zeros_like(haut)
+        inv_pivot = np.zeros_like(diag)
+        inv_pivot[:, 1] = 1.0 / diag[:, 1]
+        haut_mod[:, 1] = haut[:, 1] * inv_pivot[:, 1]
+        for m in range(2, n - 1):
+            inv_pivot[:, m] = 1.0 / (diag[:, m] - bas[:, m] * haut_mod[:, m-1])
+            haut_mod[:, m] = haut[:, m] * inv_pivot[:, m]
+        return (np.ascontiguousarray(np.moveaxis(a, 1, axe)) for a in (bas, haut_mod, inv_pivot))
+
+    def _pas_temperature(self, T, T_new, T_ambiant):
+        """Avance la simulation d'un pas de temps avec le noyau choisi et retourne T_new."""
+        if self.solveur == "expo":
+            T_new[:] = self.integrateur.avancer(T, self.dt, T_ambiant)
+            return T_new
+        if self.solveur == "adi":
+            return self._update_temperature_adi(
+                T, T_new, self.T_demi, self.adi_tampon, self.taux_ouest, self.taux_est,
+                self.taux_sud, self.taux_nord, self.taux_convection, self.taux_source,
+                self.P_perm, self.P_mouse, T_ambiant, self.dt,
+                self.adi_bas_x, self.adi_haut_x, self.adi_inv_x,
+                self.adi_bas_y, self.adi_haut_y, self.adi_inv_y
+            )
+        if self.maillage == "raffine":
+            return self._update_temperature_taux(
+                T, T_new, self.taux_ouest, self.taux_est, self.taux_sud, self.taux_nord,
+                self.taux_convection, self.taux_source, self.P_perm, self.P_mouse, T_ambiant, self.dt
+            )
+        if self.noyau == "original":
+            return self._update_temperature(
+                T, T_new, self.alphamatrice, self.dt, self.dx, self.dy, self.P_perm, self.P_mouse,
+                self.power_enabled, self.rhomatrice, self.cp, self.h_conv, T_ambiant,
+                self.aire_sides_up_down, self.aire_sides_left_right, self.aire_top,
+                self.volume, self.k
+            )
+        return self._update_temperature_precalcule(
+            T, T_new, self.coef_voisins_interieur, self.coef_voisins_bord, self.coef_source,
+            self.coef_convection, self.P_perm, self.P_mouse, self.dx * self.dy, T_ambiant,
+            self.aire_sides_up_down, self.aire_sides_left_right, self.aire_top
+        )
+
+    def toggle_power(self, event=None):
+        """Active/désactive la source permanente."""
+        self.power_enabled = 0 if self.power_enabled == 1 else 1
+
+    def toggle_perturbation(self):
+        """Active/désactive la perturbation."""
+        self.perturbation_state = 0 if self.perturbation_state == 1 else 1
+
+    @staticmethod
+    @njit(parallel=True, nogil=True, cache=CACHE_JIT)
+    def _update_temperature(T, T_new, alpha, dt, dx, dy, P_perm, P_mouse, power_on,
+                            rho, cp, h_conv, T_piece, aire_sides_up_down,
+                            aire_sides_left_right, aire_top, volume, k):
+        """Fonction Numba qui met à jour la matrice de température T_new à partir de T."""
+
+        dt_alpha = dt * alpha
+        dx_dy = dx * dy
+
+        #dt_alpha_dx_dy = dt_alpha / dx_dy
+
+        #((dt * alpha[i,j]) / (dx * dy))
+
+        #dt_rho_cp = dt / (rho * cp)
+        #dt_rho_cp_h_conv_volume = dt_rho_cp * h_conv / volume
+
+        #((dt / (rho * cp)) * h_conv / volume)
+
+        Ny, Nx = T.shape
+        for i in prange(1, Ny-1):
+            for j in prange(1, Nx-1):
+                T_new[i, j] = T[i, j]
+                # Conditions sur les bords (exclusion des coins)
+                if (i == 1 and j > 1 and j < Nx-2):
+                    T_new[i, j] += ((dt * alpha[i,j]) / (dx * dy)) * (T[i + 1, j] + T[i, j + 1] + T[i, j - 1] - 3 * T[i, j])
+                    T_new[i, j] += ((dt / (rho[i,j] * cp)) * h_conv / volume) * (T_piece - T[i, j]) * aire_sides_up_down
+                elif (i == Ny-2 and j > 1 and j < Nx-2):
+                    T_new[i, j] += ((dt * alpha[i,j]) / (dx * dy)) * (T[i - 1, j] + T[i, j + 1] + T[i, j - 1] - 3 * T[i, j])
+                    T_new[i, j] += ((dt / (rho[i,j] * cp)) * h_conv / volume) * (T_piece - T[i, j]) * aire_sides_up_down
+                elif (j == 1 and i > 1 and i < Ny-2):
+                    T_new[i, j] += ((dt * alpha[i,j]) / (dx * dy)) * (T[i + 1, j] + T[i - 1, j] + T[i, j + 1] - 3 * T[i, j])
+                    T_new[i, j] += ((dt / (rho[i,j] * cp)) * h_conv / volume) * (T_piece - T[i, j]) * aire_sides_left_right
+                elif (j == Nx-2 and i > 1 and i < Ny-2):
+                    T_new[i, j] += ((dt * alpha[i,j]) / (dx * dy)) * (T[i + 1, j] + T[i - 1, j] + T[i, j - 1] - 3 * T[i, j])
+                    T_new[i, j] += ((dt / (rho[i,j] * cp)) * h_conv / volume) * (T_piece - T[i, j]) * aire_sides_left_right
+                elif (i == 1 and j == 1):
+                    T_new[i, j] += ((dt * alpha[i,j]) / (dx * dy)) * (T[i + 1, j] + T[i, j + 1] - 2 * T[i, j])
+                    T_new[i, j] += 2 * ((dt / (rho[i,j] * cp)) * h_conv / volume) * (T_piece - T[i, j]) * aire_sides_up_down
+                elif (i == 1 and j == Nx-2):
+                    T_new[i, j] += ((dt * alpha[i,j]) / (dx * dy)) * (T[i + 1, j] + T[i, j - 1] - 2 * T[i, j])
+                    T_new[i, j] += 2 * ((dt / (rho[i,j] * cp)) * h_conv / volume) * (T_piece - T[i, j]) * aire_sides_up_down
+                elif (i == Ny-2 and j == 1):
+                    T_new[i, j] += ((dt * alpha[i,j]) / (dx * dy)) * (T[i - 1, j] + T[i, j + 1] - 2 * T[i, j])
+                    T_new[i, j] += 2 * ((dt / (rho[i,j] * cp)) * h_conv / volume) * (T_piece - T[i, j]) * aire_sides_up_down
+                elif (i == Ny-2 and j == Nx-2):
+                    T_new[i, j] += ((dt * alpha[i,j]) / (dx * dy)) * (T[i - 1, j] + T[i, j - 1] - 2 * T[i, j])
+                    T_new[i, j] += 2 * ((dt / (rho[i,j] * cp)) * h_conv / volume) * (T_piece - T[i, j]) * aire_sides_up_down
+                else:
+                    T_new[i, j] += (dt / (rho[i,j] * cp)) * k * (
+                        T[i + 1, j] + T[i - 1, j] + T[i, j + 1] + T[i, j - 1] - 4 * T[i, j]
+                    ) / dx_dy
+
+                # Injection (source permanente)
+                T_new[i, j] += (dt / (rho[i,j] * cp)) * (P_perm[i, j] + P_mouse[i, j])
+
+                # Convection sur les faces supérieures / inférieures
+                T_new[i, j] += ((dt / (rho[i,j] * cp)) * h_conv / volume) * (T_piece - T[i, j]) * 2 * aire_top
+
+        return T_new
+
+    @staticmethod
+    @njit(parallel=True, nogil=True, cache=CACHE_JIT)
+    def _update_temperature_precalcule(T, T_new, coef_int, coef_bord, coef_src, coef_conv,
+                                       P_perm, P_mouse, dx_dy, T_piece, aire_sides_up_down,
+                                       aire_sides_left_right, aire_top):
+        """
+        Noyau Numba sans branchement utilisant les coefficients précalculés.
+        L'intérieur est traité en un seul balayage, les bords et les coins en passes minces séparées.
+        """
+        Ny, Nx = T.shape
+
+        # Intérieur : stencil à 5 points sans aucune condition
+        for i in prange(2, Ny-2):
+            for j in range(2, Nx-2):
+                T_ij = T[i, j]
+                val = T_ij + coef_int[i, j] * (
+                    T[i + 1, j] + T[i - 1, j] + T[i, j + 1] + T[i, j - 1] - 4 * T_ij
+                ) / dx_dy
+                T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[i, j], coef_conv[i, j],
+                                                P_perm[i, j], P_mouse[i, j], T_piece, aire_top)
+
+        # Bords haut/bas (exclusion des coins)
+        for j in prange(2, Nx-2):
+            i = 1
+            T_ij = T[i, j]
+            val = T_ij + coef_bord[i, j] * (T[i + 1, j] + T[i, j + 1] + T[i, j - 1] - 3 * T_ij)
+            val += coef_conv[i, j] * (T_piece - T_ij) * aire_sides_up_down
+            T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[i, j], coef_conv[i, j],
+                                            P_perm[i, j], P_mouse[i, j], T_piece, aire_top)
+            i = Ny - 2
+            T_ij = T[i, j]
+            val = T_ij + coef_bord[i, j] * (T[i - 1, j] + T[i, j + 1] + T[i, j - 1] - 3 * T_ij)
+            val += coef_conv[i, j] * (T_piece - T_ij) * aire_sides_up_down
+            T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[i, j], coef_conv[i, j],
+                                            P_perm[i, j], P_mouse[i, j], T_piece, aire_top)
+
+        # Bords gauche/droite (exclusion des coins)
+        for i in prange(2, Ny-2):
+            j = 1
+            T_ij = T[i, j]
+            val = T_ij + coef_bord[i, j] * (T[i + 1, j] + T[i - 1, j] + T[i, j + 1] - 3 * T_ij)
+            val += coef_conv[i, j] * (T_piece - T_ij) * aire_sides_left_right
+            T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[i, j], coef_conv[i, j],
+                                            P_perm[i, j], P_mouse[i, j], T_piece, aire_top)
+            j = Nx - 2
+            T_ij = T[i, j]
+            val = T_ij + coef_bord[i, j] * (T[i + 1, j] + T[i - 1, j] + T[i, j - 1] - 3 * T_ij)
+            val += coef_conv[i, j] * (T_piece - T_ij) * aire_sides_left_right
+            T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[i, j], coef_conv[i, j],
+                                            P_perm[i, j], P_mouse[i, j], T_piece, aire_top)
+
+        # Coins (deux côtés exposés à la convection)
+        for c in range(4):
+            i = 1 if c < 2 else Ny - 2
+            j = 1 if c % 2 == 0 else Nx - 2
+            di = 1 if i == 1 else -1
+            dj = 1 if j == 1 else -1
+            T_ij = T[i, j]
+            val = T_ij + coef_bord[i, j] * (T[i + di, j] + T[i, j + dj] - 2 * T_ij)
+            val += 2 * coef_conv[i, j] * (T_piece - T_ij) * aire_sides_up_down
+            T_new[i, j] = _sources_et_faces(val, T_ij, coef_src[i, j], coef_conv[i, j],
+                                            P_perm[i, j], P_mouse[i, j], T_piece, aire_top)
+
+        return T_new
+
+    @staticmethod
+    @njit(parallel=True, nogil=True, cache=CACHE_JIT)
+    def _update_temperature_taux(T, T_new, ouest, est, sud, nord, conv, src, P_perm, P_mouse, T_piece, dt):
+        """
+        Noyau explicite écrit avec les taux par cellule (dT/dt = A T + b), valable pour n'importe quel
+        maillage cartésien. Les taux vers les cellules fantômes sont nuls : aucun cas particulier aux bords.
+        """
+        Ny, Nx = T.shape
+        for i in prange(1, Ny-1):
+            for j in range(1, Nx-1):
+                T_ij = T[i, j]
+                T_new[i, j] = T_ij + dt * (
+                    ouest[i, j] * (T[i, j - 1] - T_ij) + est[i, j] * (T[i, j + 1] - T_ij)
+                    + sud[i, j] * (T[i - 1, j] - T_ij) + nord[i, j] * (T[i + 1, j] - T_ij)
+                    + conv[i, j] * (T_piece - T_ij) + src[i, j] * (P_perm[i, j] + P_mouse[i, j])
+                )
+        return T_new
+
+    @staticmethod
+    @njit(parallel=True, nogil=True, cache=CACHE_JIT)
+    def _update_temperature_adi(T, T_new, T_demi, tampon, ouest, est, sud, nord, conv, src,
+                                P_perm, P_mouse, T_piece, dt, bas_x, haut_x, inv_x,
+                                bas_y, haut_y, inv_y):
+        """
+        Pas ADI de Peaceman-Rachford : demi-pas implicite en x (une résolution tridiagonale par ligne),
+        puis demi-pas implicite en y (une résolution par colonne). Les sources et la convection vers
+        l'ambiant sont réparties également entre les deux demi-pas.
+        """
+        Ny, Nx = T.shape
+        demi_dt = dt / 2
+
+        # Demi-pas 1 : implicite en x, explicite en y
+        for i in prange(1, Ny-1):
+            for j in range(1, Nx-1):
+                T_ij = T[i, j]
+                g = conv[i, j] / 2
+                d = T_ij + demi_dt * (
+                    sud[i, j] * T[i - 1, j] + nord[i, j] * T[i + 1, j]
+                    - (sud[i, j] + nord[i, j] + g) * T_ij
+                    + src[i, j] * (P_perm[i, j] + P_mouse[i, j]) + conv[i, j] * T_piece
+                )
+                if j > 1:
+                    d -= bas_x[i, j] * tampon[i, j - 1]
+                tampon[i, j] = d * inv_x[i, j]
+            T_demi[i, Nx - 2] = tampon[i, Nx - 2]
+            for j in range(Nx - 3, 0, -1):
+                T_demi[i, j] = tampon[i, j] - haut_x[i, j] * T_demi[i, j + 1]
+
+        # Demi-pas 2 : implicite en y, explicite en x
+        for j in prange(1, Nx-1):
+            for i in range(1, Ny-1):
+                T_ij = T_demi[i, j]
+                g = conv[i, j] / 2
+                d = T_ij + demi_dt * (
+                    ouest[i, j] * T_demi[i, j - 1] + est[i, j] * T_demi[i, j + 1]
+                    - (ouest[i, j] + est[i, j] + g) * T_ij
+                    + src[i, j] * (P_perm[i, j] + P_mouse[i, j]) + conv[i, j] * T_piece
+                )
+                if i > 1:
+                    d -= bas_y[i, j] * tampon[i - 1, j]
+                tampon[i, j] = d * inv_y[i, j]
+            T_new[Ny - 2, j] = tampon[Ny - 2, j]
+            for i in range(Ny - 3, 0, -1):
+                T_new[i, j] = tampon[i, j] - haut_y[i, j] * T_new[i + 1, j]
+
+        return T_new
+
+    def avancer_frame(self):
+        """
+        Avance la simulation d'une frame (steps_per_frame pas de temps) et enregistre les thermistances.
+        Retourne True lorsque la durée de simulation est atteinte.
+        """
+        if self.instantanes is None and self.config_instantanes and self.state["simulation_steps"] == 0:
+            # Un dossier horodaté par simulation : celui d'une simulation arrêtée n'est jamais écrasé
+            dossier = os.path.join(self.config_instantanes["dossier"], time.strftime("%Y%m%d_%H%M%S"))
+            self.activer_instantanes(dossier, self.config_instantanes["intervalle"])
+
+        chronometres = self.chronometres
+        with chronometres.mesurer("calcul frame"):
+            if self._frame_compilee():
+                fini = self._avancer_frame_compilee()
+            elif self.solveur == "expo":
+                fini = self._avancer_frame_expo()
+            else:
+                fini = self._avancer_frame_python()
+            with chronometres.mesurer("stationnaire"):
+                fini = fini or self._verifier_stationnaire()
+
+            if self.instantanes is not None:
+                with chronometres.mesurer("instantanés"):
+                    self.instantanes.observer(self, fini)
+        return fini
+
+    def activer_instantanes(self, dossier, intervalle):
+        """Enregistre le champ complet dans dossier toutes les intervalle secondes simulées (voir snapshot_store.py)."""
+        from snapshot_store import SnapshotStore
+        self.instantanes = SnapshotStore.creer(dossier, self, intervalle)
+
+    def _avancer_frame_python(self):
+        """Boucle de pas en Python, utilisée par le noyau original, le solveur ADI et le maillage raffiné."""
+        T = self.state["T"]
+        T_new = self.state["T_new"]
+        sim_steps = self.state["simulation_steps"]
+        pointage = self.chronometres.pointage()  # None si les chronomètres sont éteints
+
+        # Nombre de pas de calcul par frame
+        for _ in range(self.steps_per_frame):
+            # Gestion de la perturbation
+            if self.TEC_momment_inversion.toggle(sim_steps):
+                self.toggle_power(None)
+            if self.PERTU_momment_inversion.toggle(sim_steps):
+                self.toggle_perturbation()
+            if pointage:
+                pointage("bascules (ToggleManager)")
+
+            self._mettre_a_jour_sources()
+            if pointage:
+                pointage("sources (P_perm)")
+
+            # Lecture des sondes dans l'état au début du pas
+            if self.sondes.doit_echantillonner(sim_steps, sim_steps * self.dt > self.steps_total):
+                self.sondes.echantillonner(T, sim_steps)
+            if pointage:
+                pointage("sondes")
+
+            # Vérifie si on a atteint la fin
+            if sim_steps * self.dt > self.steps_total:
+                if pointage:
+                    pointage.terminer()
+                self.state["T"] = T
+                self.state["T_new"] = T_new
+                self.state["simulation_steps"] = sim_steps
+                with self.chronometres.mesurer("historique"):
+                    self._enregistrer_thermistances(T)
+                return True
+
+            # Mise à jour
+            T_new = self._pas_temperature(T, T_new, self.T_ambiant)
+            T, T_new = T_new, T  # Échange des buffers
+            sim_steps += 1
+            if pointage:
+                pointage("noyau")
+
+        if pointage:
+            pointage.terminer()
+        self.state["T"] = T
+        self.state["T_new"] = T_new
+        self.state["simulation_steps"] = sim_steps
+
+        # Mise à jour de l'historique
+        with self.chronometres.mesurer("historique"):
+            self._enregistrer_thermistances(T)
+        return False
+
+    def _avancer_frame_expo(self):
+        """
+        Frame du solveur exponentiel : saute directement d'une bascule à la suivante (sources constantes
+        entre deux), la fin de frame étant une cible supplémentaire. Mêmes instants que les autres solveurs.
+        """
+        n = self.state["simulation_steps"]
+        T_debut = self.state["T"]
+        fini = self.n_pas_fin < n + self.steps_per_frame
+        n_cible = self.n_pas_fin if fini else n + self.steps_per_frame
+        evenements = self.TEC_momment_inversion.toggle_steps + self.PERTU_momment_inversion.toggle_steps
+
+        T = T_debut
+        while True:
+            # Les bascules et la lecture des sondes du pas cible sont faites au début de la frame suivante
+            if n < n_cible or fini:
+                if self.TEC_momment_inversion.toggle(n):
+                    self.toggle_power(None)
+                if self.PERTU_momment_inversion.toggle(n):
+                    self.toggle_perturbation()
+                self._mettre_a_jour_sources()
+                if self.sondes.doit_echantillonner(n, n == self.n_pas_fin):
+                    self.sondes.echantillonner(T, n)
+            if n == n_cible:
+                break
+            # Prochaine cible : bascule, lecture des sondes ou fin de frame
+            prochaine_lecture = (n // self.sondes.pas + 1) * self.sondes.pas
+            n_suivant = min([s for s in evenements if n < s < n_cible] + [prochaine_lecture, n_cible])
+            with self.chronometres.mesurer("noyau"):
+                T = self.integrateur.avancer(T, (n_suivant - n) * self.dt, self.T_ambiant)
+            n = n_suivant
+
+        # T_new garde le champ du début de frame pour le moniteur de convergence
+        self.ecart_tampon = (n_cible - self.state["simulation_steps"]) * self.dt
+        self.state["T"] = T
+        self.state["T_new"] = T_debut
+        self.state["simulation_steps"] = n
+        with self.chronometres.mesurer("historique"):
+            self._enregistrer_thermistances(T)
+        return fini
+
+    def _verifier_stationnaire(self):
+        """
+        Met à jour le moniteur de convergence : la plus grande vitesse de variation |dT/dt| sur le champ
+        (dernier pas, T_new contient encore l'état précédent) et sur les thermistances (dernière frame).
+        Retourne True si l'arrêt anticipé est demandé et que le régime stationnaire est atteint.
+        """
+        sim_steps = self.state["simulation_steps"]
+        if sim_steps == 0:
+            return False
+        ecart_tampon = self.ecart_tampon if self.solveur == "expo" else self.dt
+        self.vitesse_max = _variation_max(self.state["T"], self.state["T_new"]) / ecart_tampon
+        if len(self.T_hist_1) > 1:
+            duree_frame = self.dt * self.steps_per_frame
+            for hist in (self.T_hist_1, self.T_hist_2, self.T_hist_3):
+                self.vitesse_max = max(self.vitesse_max, abs(hist[-1] - hist[-2]) / duree_frame)
+
+        # Pas d'arrêt tant qu'une bascule du TEC ou de la perturbation reste à venir
+        dernier_evenement = max(self.TEC_momment_inversion.toggle_steps + self.PERTU_momment_inversion.toggle_steps, default=-1)
+        if self.tolerance_stationnaire > 0 and sim_steps > dernier_evenement and self.vitesse_max < self.tolerance_stationnaire:
+            self.arret_anticipe = True
+            print(f"Régime stationnaire atteint à t = {sim_steps * self.dt:.2f} s (max|dT/dt| = {self.vitesse_max:.2e} °C/s)")
+            return True
+        return False
+
+    def temps_stabilisation(self, bande=None):
+        """
+        Retourne, pour chaque thermistance, le premier temps (s) à partir duquel la lecture reste
+        dans +/- bande °C de sa valeur finale, ou None si la trace n'est pas stabilisée : seule la
+        dernière lecture est dans la bande (elle y est toujours, par construction), ou historique vide.
+        """
+        bande = self.bande_stabilisation if bande is None else bande
+        historique = self.historique()
+        temps = []
+        for colonne in range(1, 4):
+            trace = historique[:, colonne]
+            if len(trace) == 0:
+                temps.append(None)
+                continue
+            hors_bande = np.nonzero(np.abs(trace - trace[-1]) > bande)[0]
+            indice = hors_bande[-1] + 1 if len(hors_bande) else 0
+            temps.append(historique[indice, 0] if indice < len(trace) - 1 else None)
+        return temps
+
+    def _avancer_frame_compilee(self):
+        """Même frame qu'avancer_frame, mais tous les pas (bascules et sources compris) sont faits dans Numba."""
+        # Bascules, réécriture de P_perm et sondes sont dans l'appel compilé : une seule phase mesurée
+        with self.chronometres.mesurer("noyau multi-pas"):
+            (T, T_new, sim_steps, self.power_enabled, self.perturbation_state,
+             self.sondes.n_echantillons, fini) = self._appel_fusionne(self.steps_per_frame)
+        self.state["T"] = T
+        self.state["T_new"] = T_new
+        self.state["simulation_steps"] = sim_steps
+        with self.chronometres.mesurer("historique"):
+            self._enregistrer_thermistances(T)
+        return fini
+
+    def _appel_fusionne(self, n_pas):
+        """Appelle le noyau multi-pas compilé pour au plus n_pas pas à partir de l'état courant."""
+        return _avancer_pas_fusionnes(
+            self.state["T"], self.state["T_new"], self.state["simulation_steps"], n_pas,
+            self.steps_total, self.dt, self.power_enabled, self.perturbation_state,
+            self.calendrier_tec, self.calendrier_pertu, self.P_perm,
+            self.yl_start, self.yl_end, self.xl_start, self.xl_end,
+            self.couplage_thermique * self.initial_P_in, self.surface_source,
+            self.y_perturbation, self.x_perturbation, self.P_perturbation,
+            self.coef_voisins_interieur, self.coef_voisins_bord, self.coef_source, self.coef_convection,
+            self.P_mouse, self.dx * self.dy, self.T_ambiant,
+            self.aire_sides_up_down, self.aire_sides_left_right, self.aire_top,
+            self.sondes.pas, self.sondes.indices_i, self.sondes.indices_j, self.sondes.poids,
+            self.sondes.valeurs, self.sondes.temps, self.sondes.n_echantillons
+        )
+
+    def _mettre_a_jour_sources(self):
+        """Réécrit la puissance du TEC et de la perturbation dans P_perm selon leur état on/off."""
+        self.P_perm[self.yl_start:self.yl_end, self.xl_start:self.xl_end] = self.power_enabled * (self.couplage_thermique * self.initial_P_in) / self.surface_source
+        self.P_perm[self.y_perturbation, self.x_perturbation] = self.perturbation_state * self.P_perturbation
+
+    def _enregistrer_thermistances(self, T):
+        """Ajoute la lecture courante des trois thermistances à l'historique."""
+        self.T_hist_1.append(T[self.thermistances_pos[0]])
+        self.T_hist_2.append(T[self.thermistances_pos[1]])
+        self.T_hist_3.append(T[self.thermistances_pos[2]])
+
+    def executer(self):
+        """Exécute toute la simulation d'un coup, sans affichage, jusqu'à sim_duration."""
+        while not self.avancer_frame():
+            pass
+
+    def reinitialiser(self):
+        """Remet la plaque, les sources et l'historique dans leur état initial pour repartir de t=0."""
+        # Les instantanés de la simulation terminée sont écrits et gardés sur disque
+        if self.instantanes is not None:
+            self.instantanes.fermer()
+            self.instantanes = None
+
+        # Réinitialise l'historique de température
+        self.T_hist_1.clear()
+        self.T_hist_2.clear()
+        self.T_hist_3.clear()
+
+        # Réinitialise le compteur de pas si on veut repartir de t=0 au prochain test
+        self.state["simulation_steps"] = 0
+        self.vitesse_max = float('inf')
+        self.arret_anticipe = False
+        self.power_enabled = 0
+        self.perturbation_state = 0
+        self.sondes.reinitialiser()
+
+        T_init = np.full((self.Ny, self.Nx), self.T_piece, dtype=self.dtype)
+        self.state["T"] = T_init.copy()
+        self.state["T_new"] = T_init.copy()
+
+    def historique(self):
+        """Retourne les colonnes temps, T1, T2, T3 de l'historique sous forme de tableau."""
+        time_values = np.arange(len(self.T_hist_1)) * self.dt * self.steps_per_frame
+        return np.column_stack((time_values, np.array(self.T_hist_1), np.array(self.T_hist_2), np.array(self.T_hist_3)))
+
+    def ecrire_csv(self, filename):
+        """Écrit l'historique de température des 3 thermistances dans le fichier CSV donné."""
+        np.savetxt(
+            filename,
+            self.historique(),
+            delimiter=',',
+            header='Time (s), T1, T2, T3',
+            comments='',
+            fmt='%.4f'
+        )
+
+
+@njit(nogil=True, cache=CACHE_JIT)
+def _avancer_pas_fusionnes(T, T_new, sim_steps, n_pas, steps_total, dt, power_enabled, perturbation_state,
+                           calendrier_tec, calendrier_pertu, P_perm, yl_start, yl_end, xl_start, xl_end,
+                           puissance_tec, surface_source, y_perturbation, x_perturbation, P_perturbation,
+                           coef_int, coef_bord, coef_src, coef_conv, P_mouse, dx_dy, T_ambiant,
+                           aire_sides_up_down, aire_sides_left_right, aire_top,
+                           pas_sonde, sonde_i, sonde_j, sonde_poids, sonde_valeurs, sonde_temps, n_echantillons):
+    """
+    Avance jusqu'à n_pas pas de temps dans un seul appel compilé : bascules du TEC et de la perturbation
+    lues dans les calendriers par pas, réécriture de P_perm seulement lorsqu'un état change, lecture
+    des sondes tous les pas_sonde pas dans leurs tampons.
+    Retourne (T, T_new, sim_steps, power_enabled, perturbation_state, n_echantillons, fini).
+    """
+    for n in range(n_pas):
+        change = n == 0  # Au début de l'appel, l'état a pu être modifié à la main (bouton Power)
+        if sim_steps < calendrier_tec.shape[0]:
+            if calendrier_tec[sim_steps]:
+                power_enabled = 1 - power_enabled
+                change = True
+            if calendrier_pertu[sim_steps]:
+                perturbation_state = 1 - perturbation_state
+                change = True
+
+        if change:
+            P_perm[yl_start:yl_end, xl_start:xl_end] = power_enabled * puissance_tec / surface_source
+            P_perm[y_perturbation, x_perturbation] = perturbation_state * P_perturbation
+
+        # Lecture des sondes dans l'état au début du pas, puis vérifie si on a atteint la fin
+        fini = sim_steps * dt > steps_total
+        if sim_steps % pas_sonde == 0 or fini:
+            n_echantillons = echantillonner_sondes(T, sim_steps, dt, sonde_i, sonde_j, sonde_poids,
+                                                   sonde_valeurs, sonde_temps, n_echantillons)
+        if fini:
+            return T, T_new, sim_steps, power_enabled, perturbation_state, n_echantillons, True
+
+        T_new = _noyau_precalcule(T, T_new, coef_int, coef_bord, coef_src, coef_conv, P_perm, P_mouse,
+                                  dx_dy, T_ambiant, aire_sides_up_down, aire_sides_left_right, aire_top)
+        T, T_new = T_new, T  # Échange des buffers
+        sim_steps += 1
+
+    return T, T_new, sim_steps, power_enabled, perturbation_state, n_echantillons, False
+
+
+@njit(parallel=True, nogil=True, cache=CACHE_JIT)
+def _variation_max(T, T_prec):
+    """Plus grand écart absolu entre deux champs sur les cellules actives (réduction parallèle)."""
+    Ny, Nx = T.shape
+    variation = 0.0
+    for i in prange(1, Ny-1):
+        for j in range(1, Nx-1):
+            variation = max(variation, abs(T[i, j] - T_prec[i, j]))
+    return variation
+
+
+# Référence globale au noyau explicite pour l'appeler depuis le code compilé
+_noyau_precalcule = ThermalEngine._update_temperature_precalcule